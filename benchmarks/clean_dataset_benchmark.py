@@ -0,0 +1,80 @@
+"""
+Compares the row-wise and vectorized feature engineering in
+PropertyDatasetProcessor.clean_dataset on synthetic sales.
+
+Usage: python benchmarks/clean_dataset_benchmark.py [--rows 10000 100000 1000000]
+"""
+
+import argparse
+import tempfile
+import os
+
+from utils import setup_service_path, make_sales_frame, timed
+
+setup_service_path()
+
+import pandas as pd  # noqa: E402
+import numpy as np  # noqa: E402
+from add_location.utils import PropertyDatasetProcessor  # noqa: E402
+from geocoding.utils import geocode_cache  # noqa: E402
+from mortgage_rates.utils import mortgage_rate_store  # noqa: E402
+
+
+class _LocalFredClient:
+    def fetch_observations(self, series_id, observation_start=None):
+        dates = pd.date_range("2010-01-01", "2025-01-01", freq="W-THU")
+        return pd.DataFrame({"date": dates, "value": np.linspace(3.0, 7.0, len(dates))})
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument(
+        "--legacy-max-rows",
+        type=int,
+        default=100_000,
+        help="Skip the row-wise path above this size, it takes minutes at 1M rows.",
+    )
+    args = parser.parse_args()
+
+    geocode_cache.set("Seattle", "WA", 47.6062, -122.3321, persist=False)
+    mortgage_rate_store.client = _LocalFredClient()
+    mortgage_rate_store.store_path = os.path.join(
+        tempfile.mkdtemp(), "mortgage_rates.npz"
+    )
+
+    for rows in args.rows:
+        df = make_sales_frame(rows)
+        results = {}
+
+        with timed(results, "vectorized"):
+            vectorized_df = PropertyDatasetProcessor(
+                df, "Seattle", is_training=False, vectorized=True, state="WA"
+            ).clean_dataset()
+
+        if rows <= args.legacy_max_rows:
+            with timed(results, "row-wise"):
+                legacy_df = PropertyDatasetProcessor(
+                    df, "Seattle", is_training=False, vectorized=False, state="WA"
+                ).clean_dataset()
+
+            cols = ["baths", "lot_sqft", "parking_garage", "age", "distance_to_downtown"]
+            mismatches = (
+                (vectorized_df[cols].astype(float) - legacy_df[cols].astype(float))
+                .abs()
+                .gt(1e-9)
+                .sum()
+                .to_dict()
+            )
+            speedup = results["row-wise"] / results["vectorized"]
+            print(
+                f"rows={rows} row-wise={results['row-wise']:.2f}s "
+                f"vectorized={results['vectorized']:.2f}s speedup={speedup:.1f}x "
+                f"mismatches={mismatches}"
+            )
+        else:
+            print(f"rows={rows} vectorized={results['vectorized']:.2f}s row-wise=skipped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Ingest throughput: DataFrame.to_sql appends (write_historical_property_data)
+vs. the staging table + merge path (upsert_historical_property_data), against
+a SQLite file created by the schema migrations. The rollup refresh is turned
+off for both paths so only the ingest itself is measured.
+
+Usage: python benchmarks/ingest_benchmark.py [--rows 100000] [--batch-size 5000]
+"""
+
+import argparse
+import os
+import tempfile
+
+from utils import make_sales_frame, setup_service_path, timed
+
+setup_service_path()
+
+from sqlalchemy import create_engine, text  # noqa: E402
+import database.utils as database_utils  # noqa: E402
+from database.migrations import run_migrations  # noqa: E402
+
+
+def create_local_engine(directory: str, name: str):
+    engine = create_engine(f"sqlite:///{os.path.join(directory, name)}")
+    run_migrations(engine)
+    return engine
+
+
+def count_rows(engine) -> int:
+    with engine.connect() as connection:
+        return connection.execute(
+            text("SELECT COUNT(*) FROM HistoricalPropertyData")
+        ).scalar()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument(
+        "--overlap",
+        type=float,
+        default=0.2,
+        help="share of rows sent again on the incremental run",
+    )
+    args = parser.parse_args()
+
+    database_utils.ensure_trend_rollup = lambda engine: False
+    df = make_sales_frame(args.rows)
+    overlap = df.sample(frac=args.overlap, random_state=1).copy()
+    overlap["sold_price"] = overlap["sold_price"] + 1000
+
+    with tempfile.TemporaryDirectory() as directory:
+        results = {}
+
+        engine = create_local_engine(directory, "to_sql.db")
+        with timed(results, "to_sql"):
+            database_utils.write_historical_property_data(engine, df)
+        with timed(results, "to_sql_incremental"):
+            database_utils.write_historical_property_data(engine, overlap)
+        to_sql_rows = count_rows(engine)
+        engine.dispose()
+
+        engine = create_local_engine(directory, "upsert.db")
+        with timed(results, "upsert"):
+            first_counts = database_utils.upsert_historical_property_data(
+                engine, df, batch_size=args.batch_size
+            )
+        with timed(results, "upsert_incremental"):
+            overlap_counts = database_utils.upsert_historical_property_data(
+                engine, overlap, batch_size=args.batch_size
+            )
+        upsert_rows = count_rows(engine)
+        engine.dispose()
+
+    print(f"rows={args.rows} overlap rows={len(overlap)} batch={args.batch_size}")
+    print(
+        f" to_sql: initial={results['to_sql']:.2f}s "
+        f"({args.rows / results['to_sql']:,.0f} rows/s) "
+        f"incremental={results['to_sql_incremental']:.2f}s "
+        f"table rows={to_sql_rows} (duplicates kept)"
+    )
+    print(
+        f" upsert: initial={results['upsert']:.2f}s "
+        f"({args.rows / results['upsert']:,.0f} rows/s) "
+        f"incremental={results['upsert_incremental']:.2f}s "
+        f"table rows={upsert_rows} "
+        f"inserted={first_counts['inserted'] + overlap_counts['inserted']} "
+        f"updated={overlap_counts['updated']}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+/active-listings response encoding: validating and serializing every listing
+through the pydantic Listing model per request (the previous response_model
+path) vs. joining the fragments pre-encoded when the ListingIndex is built,
+plus the size of the summary view (view=summary) relative to full listings.
+
+Usage: python benchmarks/listings_response_benchmark.py [--listings 1000 5000] [--requests 20]
+"""
+
+import argparse
+import json
+from typing import List
+
+from utils import setup_service_path, timed
+
+setup_service_path()
+
+import orjson  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+from predict_benchmark import make_listings, service_records  # noqa: E402
+from predict_benchmark import train_listing_model  # noqa: E402
+from active_listings.encoding import join_listing_fragments, parse_fields  # noqa: E402
+from active_listings.index import ListingIndex  # noqa: E402
+from active_listings.schemas import Listing  # noqa: E402
+from active_listings.utils import predict_sale_prices  # noqa: E402
+
+LISTINGS_ADAPTER = TypeAdapter(List[Listing])
+
+
+def encode_with_models(index: ListingIndex, page) -> bytes:
+    # What FastAPI does for response_model=List[Listing]: validate, dump to
+    # JSON-compatible Python, then json.dumps in JSONResponse
+    listings = LISTINGS_ADAPTER.validate_python(
+        [
+            {**index.listings[row], "sort_percentage": sort_percentage}
+            for row, sort_percentage in page
+        ]
+    )
+    content = LISTINGS_ADAPTER.dump_python(listings, mode="json")
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--listings", type=int, nargs="+", default=[1_000, 5_000])
+    parser.add_argument("--requests", type=int, default=20)
+    args = parser.parse_args()
+
+    for rows in args.listings:
+        listings = make_listings(rows)
+        records = service_records(
+            predict_sale_prices(listings, train_listing_model(listings))
+        )
+        results = {}
+        with timed(results, "index"):
+            index = ListingIndex(records)
+        page, _ = index.query(index.years[0])
+
+        with timed(results, "models"):
+            for _ in range(args.requests):
+                expected = encode_with_models(index, page)
+        with timed(results, "fragments"):
+            for _ in range(args.requests):
+                actual, full_size = join_listing_fragments(index.encoded, page)
+        with timed(results, "summary"):
+            for _ in range(args.requests):
+                summary, _ = join_listing_fragments(
+                    index.encoded,
+                    page,
+                    fields=parse_fields(None, summary=True),
+                    summary=True,
+                )
+
+        print(
+            f"listings={rows} index build={results['index']:.2f}s "
+            f"per request: models={results['models'] / args.requests * 1000:.1f}ms "
+            f"fragments={results['fragments'] / args.requests * 1000:.1f}ms "
+            f"summary={results['summary'] / args.requests * 1000:.1f}ms "
+            f"same JSON={json.loads(expected) == orjson.loads(actual)} "
+            f"bytes full={full_size} summary={len(summary)} "
+            f"saved={1 - len(summary) / full_size:.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Size and load time of the legacy pickled model vs. the model artifact
+(uncompressed + memory-mapped, and compressed).
+
+Usage: python benchmarks/model_artifact_benchmark.py [--rows 50000] [--trees 50]
+"""
+
+import argparse
+import os
+import pickle
+import tempfile
+
+from utils import setup_service_path, timed
+
+setup_service_path()
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+from sklearn.ensemble import RandomForestRegressor  # noqa: E402
+from model_storage.artifact import dump_model_artifact, load_model_artifact  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--trees", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    X = pd.DataFrame(
+        rng.random((args.rows, 11)), columns=[f"feature_{i}" for i in range(11)]
+    )
+    y = X.sum(axis=1) * 100_000 + rng.normal(0, 10_000, args.rows)
+    model = RandomForestRegressor(n_estimators=args.trees, random_state=42, n_jobs=-1)
+    model.fit(X, y)
+
+    tmp_dir = tempfile.mkdtemp()
+    variants = {
+        "pickle": (pickle.dumps(model), lambda path: pickle.load(open(path, "rb"))),
+        "artifact": (
+            dump_model_artifact(model),
+            lambda path: load_model_artifact(path, mmap=False).model,
+        ),
+        "artifact+mmap": (
+            dump_model_artifact(model),
+            lambda path: load_model_artifact(path, mmap=True).model,
+        ),
+        "artifact+zlib3": (
+            dump_model_artifact(model, compress=3),
+            lambda path: load_model_artifact(path).model,
+        ),
+    }
+
+    expected = model.predict(X.head(1000))
+    for name, (data, load) in variants.items():
+        path = os.path.join(tmp_dir, name)
+        with open(path, "wb") as f:
+            f.write(data)
+
+        timings = []
+        for _ in range(args.repeat):
+            results = {}
+            with timed(results, "load"):
+                loaded = load(path)
+            timings.append(results["load"])
+
+        assert np.array_equal(loaded.predict(X.head(1000)), expected)
+        print(
+            f"{name:16} size={len(data) / 1048576:8.2f} MB "
+            f"load={min(timings) * 1000:8.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
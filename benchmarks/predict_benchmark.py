@@ -0,0 +1,135 @@
+"""
+Compares the previous replicate/apply/groupby predict_sale_prices with the
+array-based one on synthetic listings, and checks the outputs are identical.
+
+Usage: python benchmarks/predict_benchmark.py [--listings 1000 10000 50000]
+"""
+
+import argparse
+from datetime import date
+
+from utils import make_sales_frame, setup_service_path, timed
+
+setup_service_path()
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+from sklearn.ensemble import RandomForestRegressor  # noqa: E402
+from active_listings.utils import PREDICTION_DROP_COLUMNS, predict_sale_prices  # noqa: E402
+from config import config  # noqa: E402
+
+
+def predict_sale_prices_groupby(properties_df, rf_model):
+    years_to_predict = [
+        date.today().year + i for i in range(0, config.yrs_to_predict + 1, 2)
+    ]
+
+    predicted_df = pd.concat(
+        [properties_df.assign(sold_year=year) for year in years_to_predict],
+        ignore_index=True,
+    )
+    predicted_df["age"] = predicted_df.apply(
+        lambda row: row["sold_year"] - row["year_built"], axis=1
+    )
+    predicted_df["sold_price"] = rf_model.predict(
+        predicted_df.drop(PREDICTION_DROP_COLUMNS, axis=1)
+    )
+    predicted_df["percentage"] = (
+        predicted_df["sold_price"] / predicted_df["list_price"] - 1
+    ) * 100
+    predicted_df["predicted_prices"] = predicted_df.apply(
+        lambda row: {
+            "sold_year": row["sold_year"],
+            "sold_price": row["sold_price"],
+            "percentage": row["percentage"],
+        },
+        axis=1,
+    )
+
+    exclude_columns = {
+        "sold_year",
+        "sold_price",
+        "percentage",
+        "predicted_prices",
+        "age",
+    }
+    groupby_cols = [col for col in predicted_df.columns if col not in exclude_columns]
+    final_df = (
+        predicted_df.groupby(groupby_cols, dropna=False, sort=False)["predicted_prices"]
+        .agg(list)
+        .reset_index()
+    )
+    final_df["alt_photos"] = final_df["alt_photos"].str.split(", ")
+    return final_df
+
+
+def service_records(df: pd.DataFrame) -> list:
+    return df.replace([np.inf, -np.inf, np.nan], None).to_dict(orient="records")
+
+
+def make_listings(rows: int) -> pd.DataFrame:
+    """
+    Listings shaped like PropertyDatasetProcessor(is_training=False) output.
+    """
+    rng = np.random.default_rng(0)
+    df = make_sales_frame(rows, seed=1)
+    df["status"] = "FOR_SALE"
+    df["sold_price"] = np.nan
+    df["mls"] = "NWMLS"
+    df["mls_id"] = [str(i) for i in range(rows)]
+    df["primary_photo"] = "https://example.com/photo.jpg"
+    df["alt_photos"] = "https://example.com/a.jpg, https://example.com/b.jpg"
+    df["baths"] = df["full_baths"].fillna(1) + df["half_baths"].fillna(0) * 0.5
+    df["lot_sqft"] = df["lot_sqft"].fillna(0.0)
+    df["parking_garage"] = df["parking_garage"].fillna(0.0)
+    df["sold_year"] = df["last_sold_date"].dt.year
+    df["mortgage_rate"] = 6.5
+    df["age"] = df["sold_year"] - df["year_built"]
+    df["distance_to_downtown"] = rng.uniform(0, 30, rows).round(1)
+    return df
+
+
+def train_listing_model(listings: pd.DataFrame):
+    features = listings.drop(PREDICTION_DROP_COLUMNS, axis=1)
+    target = features["sqft"] * 400 + features["beds"] * 20_000
+    return RandomForestRegressor(n_estimators=50, random_state=42).fit(
+        features.iloc[:2000], target.iloc[:2000]
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--listings", type=int, nargs="+", default=[1_000, 10_000, 50_000]
+    )
+    args = parser.parse_args()
+
+    for rows in args.listings:
+        listings = make_listings(rows)
+        # Exact duplicate listings take the merged-group path
+        listings = pd.concat([listings, listings.iloc[:3]], ignore_index=True)
+        rf_model = train_listing_model(listings)
+
+        results = {}
+        with timed(results, "groupby"):
+            expected = predict_sale_prices_groupby(listings, rf_model)
+        with timed(results, "array"):
+            actual = predict_sale_prices(listings, rf_model)
+
+        # Compared as served: the service maps NaN to None before to_dict. The
+        # groupby turned all-None columns into float NaN, this does not
+        expected_records = service_records(expected)
+        actual_records = service_records(actual)
+        identical = list(expected.columns) == list(actual.columns) and repr(
+            expected_records
+        ) == repr(actual_records)
+        print(
+            f"listings={rows} groupby={results['groupby']:.2f}s "
+            f"array={results['array']:.2f}s "
+            f"speedup={results['groupby'] / results['array']:.1f}x "
+            f"identical={identical}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Throughput of fetch_historical_windows against a local fake scraper that
+sleeps like a network call, serial vs. concurrent.
+
+Usage: python benchmarks/scrape_benchmark.py [--windows 60] [--latency 0.2]
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime
+
+from utils import setup_service_path, timed
+
+setup_service_path()
+
+import pandas as pd  # noqa: E402
+from add_location.utils import fetch_historical_windows, get_scrape_windows  # noqa: E402
+
+
+class FakeScraper:
+    def __init__(self, latency: float, failure_rate: float):
+        self.latency = latency
+        self.failure_rate = failure_rate
+
+    def __call__(self, location, listing_type, date_from, date_to):
+        time.sleep(self.latency)
+        if random.random() < self.failure_rate:
+            raise ConnectionError("fake network error")
+        return pd.DataFrame({"last_sold_date": [date_from, date_to]})
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--windows", type=int, default=60)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--failure-rate", type=float, default=0.05)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--requests-per-sec", type=float, default=0)
+    args = parser.parse_args()
+
+    windows = get_scrape_windows(datetime(2010, 1, 1), until=datetime(2030, 1, 1))
+    windows = windows[: args.windows]
+    scraper = FakeScraper(args.latency, args.failure_rate)
+
+    for workers in args.workers:
+        results = {}
+        with timed(results, "total"):
+            fetched = list(
+                fetch_historical_windows(
+                    "Seattle, WA",
+                    windows,
+                    scraper=scraper,
+                    max_workers=workers,
+                    requests_per_sec=args.requests_per_sec,
+                    retries=2,
+                    backoff_sec=0.05,
+                )
+            )
+        failed = sum(properties is None for _, properties in fetched)
+        in_order = [window for window, _ in fetched] == windows
+        print(
+            f"workers={workers} windows={len(windows)} time={results['total']:.2f}s "
+            f"windows/s={len(windows) / results['total']:.1f} failed={failed} in_order={in_order}"
+        )
+
+
+if __name__ == "__main__":
+    main()
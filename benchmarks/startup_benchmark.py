@@ -0,0 +1,177 @@
+"""
+Cold start of the service: `import main` broken down per module (python -X
+importtime, in a fresh interpreter per run), time until the lifespan startup
+has finished (the port would be accepting requests) and time to the first
+/locations response. Heavy libraries that should only load on first use (see
+warmup.py) are reported when main imports them eagerly.
+
+The lifespan runs against a SQLite stand-in for SQL Server (schema migrations
+included) and the blob listing of the location registry is stubbed with an
+empty container, so no storage account or database server is needed.
+
+For CI: python benchmarks/startup_benchmark.py --max-import-sec 3 --fail-on-eager
+exits with 1 on a regression.
+
+Usage: python benchmarks/startup_benchmark.py [--runs 3] [--top 15]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+from utils import BENCHMARK_ENV, SERVICE_DIR
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+LAZY_MODULES = [
+    "sklearn",
+    "homeharvest",
+    "geopy",
+    "joblib",
+    "azure.storage.blob",
+]
+
+FIRST_RESPONSE_SCRIPT = """
+import sys
+import tempfile
+import time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+sys.path.append({benchmarks_dir!r})
+from fastapi.testclient import TestClient
+from utils import create_standin_engine
+import database.database as database
+from locations.service import location_registry
+location_registry._load_locations = lambda: []
+with tempfile.TemporaryDirectory() as directory:
+    database.create_db_engine = lambda: create_standin_engine(directory)
+    with TestClient(main.app) as client:
+        started = time.perf_counter()
+        response = client.get("/locations")
+        responded = time.perf_counter()
+assert response.status_code == 200, response.text
+print(imported - start, started - start, responded - start)
+""".format(benchmarks_dir=BENCHMARKS_DIR)
+
+
+def run_service_python(args):
+    env = {**os.environ, **BENCHMARK_ENV, "WARMUP_IMPORTS": "false"}
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=SERVICE_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def parse_importtime(stderr: str) -> dict:
+    """
+    Returns {module: (self_sec, cumulative_sec)} from -X importtime output.
+    """
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        modules[name.strip()] = (int(self_us) / 1e6, int(cumulative_us) / 1e6)
+    return modules
+
+
+def service_modules() -> set:
+    return {
+        name.removesuffix(".py")
+        for name in os.listdir(SERVICE_DIR)
+        if name.endswith(".py")
+        or os.path.isfile(os.path.join(SERVICE_DIR, name, "__init__.py"))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--max-import-sec", type=float, default=None)
+    parser.add_argument("--max-first-response-sec", type=float, default=None)
+    parser.add_argument("--fail-on-eager", action="store_true")
+    args = parser.parse_args()
+
+    # Fastest of several runs, the others mostly measure a cold disk cache
+    imports = min(
+        (
+            parse_importtime(
+                run_service_python(["-X", "importtime", "-c", "import main"]).stderr
+            )
+            for _ in range(args.runs)
+        ),
+        key=lambda modules: modules["main"][1],
+    )
+    first_response = min(
+        (
+            tuple(
+                map(
+                    float,
+                    run_service_python(["-c", FIRST_RESPONSE_SCRIPT])
+                    .stdout.splitlines()[-1]
+                    .split(),
+                )
+            )
+            for _ in range(args.runs)
+        ),
+        key=lambda timings: timings[2],
+    )
+
+    packages = service_modules()
+    own = sorted(
+        (
+            (cumulative, name)
+            for name, (_, cumulative) in imports.items()
+            if name.split(".")[0] in packages
+        ),
+        reverse=True,
+    )
+    print(f"import main: {imports['main'][1]:.2f}s")
+    print(f"service modules (cumulative, top {args.top}):")
+    for cumulative, name in own[: args.top]:
+        print(f"  {cumulative:6.3f}s  {name}")
+
+    libraries = sorted(
+        (
+            (cumulative, name)
+            for name, (_, cumulative) in imports.items()
+            if "." not in name and name.split(".")[0] not in packages
+        ),
+        reverse=True,
+    )
+    print(f"third-party and stdlib packages (cumulative, top {args.top}):")
+    for cumulative, name in libraries[: args.top]:
+        print(f"  {cumulative:6.3f}s  {name}")
+
+    eager = [module for module in LAZY_MODULES if module in imports]
+    print(f"lazy libraries imported eagerly: {', '.join(eager) or 'none'}")
+    print(
+        f"startup finished: {first_response[1]:.2f}s "
+        f"(import {first_response[0]:.2f}s), "
+        f"first /locations response: {first_response[2]:.2f}s"
+    )
+
+    failed = (
+        (args.fail_on_eager and eager)
+        or (
+            args.max_import_sec is not None and imports["main"][1] > args.max_import_sec
+        )
+        or (
+            args.max_first_response_sec is not None
+            and first_response[2] > args.max_first_response_sec
+        )
+    )
+    if failed:
+        print("startup regression")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
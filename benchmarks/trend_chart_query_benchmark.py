@@ -0,0 +1,130 @@
+"""
+Trend chart query with values inlined as literals (the old behaviour) vs. bound
+parameters, against an in-memory SQLite stand-in for SQL Server. SQLite keeps a
+prepared statement cache keyed by SQL text, like SQL Server's plan cache, so
+literal statements are prepared on every call while bound ones are reused.
+
+Usage: python benchmarks/trend_chart_query_benchmark.py [--rows 50000] [--queries 500]
+"""
+
+import argparse
+import random
+import sqlite3
+import time
+
+from utils import make_sales_frame, setup_service_path, timed
+
+setup_service_path()
+
+import pandas as pd  # noqa: E402
+from sqlalchemy import create_engine, event  # noqa: E402
+from trend_chart.service import TREND_CHART_TEMPLATE, build_trend_chart_query  # noqa: E402
+
+CITIES = [("Seattle", "WA"), ("Portland", "OR"), ("Austin", "TX"), ("Denver", "CO")]
+
+
+def create_standin_engine():
+    engine = create_engine("sqlite://")
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, _):
+        dbapi_connection.execute("ATTACH DATABASE ':memory:' AS dbo")
+        dbapi_connection.create_function(
+            "YEAR", 1, lambda value: value and int(value[:4]), deterministic=True
+        )
+
+    return engine
+
+
+def random_filters(city: str) -> dict:
+    return dict(
+        city=city,
+        style=None,
+        min_beds=random.choice([None, 1, 2, 3]),
+        max_beds=random.choice([None, 4, 5]),
+        min_baths=None,
+        max_baths=None,
+        min_stories=None,
+        max_stories=None,
+        year_built=None,
+        min_sqft=random.choice([None, 600, 800, 1000, 1200]),
+        max_sqft=random.choice([None, 2500, 3000, 3500]),
+    )
+
+
+def run(engine, workload, literal: bool) -> dict:
+    results, statements = {}, set()
+    with engine.connect() as connection:
+        raw_connection = connection.connection.driver_connection
+
+        # Prepare-only cost: EXPLAIN QUERY PLAN compiles the statement without
+        # running it, and goes through the same statement cache
+        prepare_sec = 0.0
+        for query, params in workload:
+            sql, sql_params = to_driver_sql(engine, query, params, literal)
+            start = time.perf_counter()
+            raw_connection.execute("EXPLAIN QUERY PLAN " + sql, sql_params).fetchall()
+            prepare_sec += time.perf_counter() - start
+
+        with timed(results, "total"):
+            for query, params in workload:
+                sql, sql_params = to_driver_sql(engine, query, params, literal)
+                statements.add(sql)
+                raw_connection.execute(sql, sql_params).fetchall()
+
+    results["prepare"] = prepare_sec
+    results["statements"] = len(statements)
+    return results
+
+
+def to_driver_sql(engine, query, params, literal: bool):
+    if literal:
+        compiled = query.bindparams(**params).compile(
+            engine, compile_kwargs={"literal_binds": True}
+        )
+        return str(compiled), ()
+    compiled = query.compile(engine)
+    return str(compiled), tuple(params[name] for name in compiled.positiontup)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+
+    random.seed(7)
+    engine = create_standin_engine()
+    frames = [
+        make_sales_frame(args.rows // len(CITIES), city=city, state=state, seed=i)
+        for i, (city, state) in enumerate(CITIES)
+    ]
+    data = pd.concat(frames, ignore_index=True)
+    data["last_sold_date"] = data["last_sold_date"].dt.strftime("%Y-%m-%d")
+    data["list_date"] = data["list_date"].dt.strftime("%Y-%m-%d")
+    with engine.begin() as connection:
+        data.to_sql("HistoricalPropertyData", connection, schema="dbo", index=False)
+        connection.exec_driver_sql(
+            "CREATE INDEX dbo.ix_city ON HistoricalPropertyData (city)"
+        )
+
+    workload = [
+        build_trend_chart_query(
+            TREND_CHART_TEMPLATE, random_filters(random.choice(CITIES)[0])
+        )
+        for _ in range(args.queries)
+    ]
+
+    print(f"sqlite {sqlite3.sqlite_version}, rows={len(data)}, queries={len(workload)}")
+    for mode in ("literal", "bound"):
+        results = run(engine, workload, literal=mode == "literal")
+        print(
+            f"{mode:>7}: distinct statements={results['statements']} "
+            f"prepare={results['prepare'] * 1000:.1f}ms "
+            f"total={results['total']:.2f}s "
+            f"per query={results['total'] / len(workload) * 1000:.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
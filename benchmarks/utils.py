@@ -0,0 +1,111 @@
+import math
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+SERVICE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "real_estate_adviser_service",
+)
+
+BENCHMARK_ENV = {
+    "YEARS_TO_PREDICT": "10",
+    "HISTORICAL_START_YEAR": "2010",
+    "HISTORICAL_BATCH_INCREMENT_DAYS": "30",
+    "LOAD_ACTIVE_LISTINGS_DAYS": "30",
+}
+
+
+def setup_service_path():
+    """
+    Service modules import each other relative to real_estate_adviser_service,
+    so benchmarks run with that directory on sys.path and as the working directory.
+    """
+    for key, value in BENCHMARK_ENV.items():
+        os.environ.setdefault(key, value)
+    if SERVICE_DIR not in sys.path:
+        sys.path.insert(0, SERVICE_DIR)
+    os.chdir(SERVICE_DIR)
+
+
+def create_standin_engine(directory: str):
+    """
+    File-backed SQLite stand-in for SQL Server that threads can share: tables
+    live in an attached "dbo" database so [dbo].[...] queries resolve, with
+    the T-SQL functions the service's queries use.
+    """
+    from sqlalchemy import create_engine, event
+
+    engine = create_engine(f"sqlite:///{os.path.join(directory, 'service.db')}")
+    dbo_path = os.path.join(directory, "dbo.db")
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, _):
+        dbapi_connection.execute("ATTACH DATABASE ? AS dbo", (dbo_path,))
+        dbapi_connection.create_function(
+            "YEAR", 1, lambda value: value and int(value[:4]), deterministic=True
+        )
+        dbapi_connection.create_function(
+            "FLOOR",
+            1,
+            lambda value: None if value is None else math.floor(value),
+            deterministic=True,
+        )
+
+    return engine.execution_options(schema_translate_map={None: "dbo"})
+
+
+@contextmanager
+def timed(results: dict, key: str):
+    start = time.perf_counter()
+    yield
+    results[key] = time.perf_counter() - start
+
+
+def make_sales_frame(rows: int, city: str = "Seattle", state: str = "WA", seed=42):
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    sold_dates = pd.Timestamp("2015-01-01") + pd.to_timedelta(
+        rng.integers(0, 365 * 9, rows), unit="D"
+    )
+    full_baths = rng.integers(1, 4, rows).astype(float)
+    full_baths[rng.random(rows) < 0.05] = np.nan
+    half_baths = rng.integers(0, 2, rows).astype(float)
+    half_baths[rng.random(rows) < 0.3] = np.nan
+    lot_sqft = rng.integers(1000, 20000, rows).astype(float)
+    lot_sqft[rng.random(rows) < 0.1] = np.nan
+    parking_garage = rng.integers(0, 3, rows).astype(float)
+    parking_garage[rng.random(rows) < 0.4] = np.nan
+
+    return pd.DataFrame(
+        {
+            "property_url": [f"https://example.com/{i}" for i in range(rows)],
+            "status": "SOLD",
+            "style": rng.choice(["SINGLE_FAMILY", "CONDOS", "TOWNHOMES"], rows),
+            "street": "1 Main St",
+            "unit": None,
+            "city": city,
+            "state": state,
+            "zip_code": rng.integers(98101, 98199, rows),
+            "beds": rng.integers(1, 6, rows).astype(float),
+            "full_baths": full_baths,
+            "half_baths": half_baths,
+            "sqft": rng.integers(500, 4000, rows).astype(float),
+            "year_built": rng.integers(1900, 2014, rows).astype(float),
+            "days_on_mls": rng.integers(0, 120, rows).astype(float),
+            "list_price": rng.integers(200_000, 2_000_000, rows).astype(float),
+            "list_date": sold_dates - pd.Timedelta(days=30),
+            "sold_price": rng.integers(200_000, 2_000_000, rows).astype(float),
+            "last_sold_date": sold_dates,
+            "lot_sqft": lot_sqft,
+            "price_per_sqft": rng.integers(100, 1000, rows).astype(float),
+            "latitude": 47.6062 + rng.normal(0, 0.08, rows),
+            "longitude": -122.3321 + rng.normal(0, 0.08, rows),
+            "stories": rng.integers(1, 4, rows).astype(float),
+            "hoa_fee": rng.integers(0, 500, rows).astype(float),
+            "parking_garage": parking_garage,
+        }
+    )
@@ -0,0 +1,243 @@
+import itertools
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional
+
+from config import config
+
+
+def get_listings_cache_key(location: str) -> str:
+    return location.lower().replace(" ", "")
+
+
+class ListingsCache:
+    """
+    LRU of cleaned listing features per location with single-flight rebuilds: concurrent
+    misses for one key wait on the same build. Entries older than ttl_sec are
+    still served for another stale_ttl_sec while one background refresh runs.
+    Every build gets a new version number, so dependents can tell builds apart
+    without holding on to the features.
+    """
+
+    def __init__(
+        self, maxsize: int, ttl_sec: float, stale_ttl_sec: float, refresh_workers: int
+    ):
+        self.maxsize = maxsize
+        self.ttl_sec = ttl_sec
+        self.stale_ttl_sec = stale_ttl_sec
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._versions = itertools.count(1)
+        self._metrics = defaultdict(
+            lambda: {
+                "hits": 0,
+                "stale_hits": 0,
+                "misses": 0,
+                "coalesced": 0,
+                "rebuilds": 0,
+                "rebuild_errors": 0,
+                "last_rebuild_sec": None,
+                "total_rebuild_sec": 0.0,
+            }
+        )
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=refresh_workers, thread_name_prefix="listings-refresh"
+        )
+
+    def get_or_build(self, key: str, build: Callable):
+        return self.get_or_build_versioned(key, build)[0]
+
+    def get_or_build_versioned(self, key: str, build: Callable) -> tuple:
+        """
+        Returns (value, version of the build that produced it).
+        """
+        with self._lock:
+            metrics = self._metrics[key]
+            entry = self._entries.get(key)
+            age = time.monotonic() - entry[1] if entry else None
+
+            if entry and age < self.ttl_sec:
+                self._entries.move_to_end(key)
+                metrics["hits"] += 1
+                return entry[0], entry[2]
+
+            if entry and age < self.ttl_sec + self.stale_ttl_sec:
+                self._entries.move_to_end(key)
+                metrics["stale_hits"] += 1
+                if key not in self._inflight:
+                    future = self._inflight[key] = Future()
+                    self._executor.submit(self._rebuild, key, build, future)
+                return entry[0], entry[2]
+
+            future = self._inflight.get(key)
+            if future is not None:
+                metrics["coalesced"] += 1
+                is_leader = False
+            else:
+                metrics["misses"] += 1
+                future = self._inflight[key] = Future()
+                is_leader = True
+
+        if is_leader:
+            self._rebuild(key, build, future)
+        return future.result()
+
+    def _rebuild(self, key: str, build: Callable, future: Future):
+        start = time.perf_counter()
+        try:
+            value = build()
+        except BaseException as e:
+            with self._lock:
+                self._metrics[key]["rebuild_errors"] += 1
+                self._inflight.pop(key, None)
+            print(f"Rebuilding listings for {key} failed: {e}")
+            future.set_exception(e)
+            return
+
+        duration = time.perf_counter() - start
+        with self._lock:
+            version = next(self._versions)
+            self._entries[key] = (value, time.monotonic(), version)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+            metrics = self._metrics[key]
+            metrics["rebuilds"] += 1
+            metrics["last_rebuild_sec"] = round(duration, 3)
+            metrics["total_rebuild_sec"] = round(
+                metrics["total_rebuild_sec"] + duration, 3
+            )
+            self._inflight.pop(key, None)
+        future.set_result((value, version))
+
+    def fresh_for(self, key: str) -> float:
+        """
+        Seconds until the entry for key stops being fresh (0 if missing or stale).
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return 0.0
+            return max(self.ttl_sec - (time.monotonic() - entry[1]), 0.0)
+
+    def invalidate(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl_sec": self.ttl_sec,
+                "stale_ttl_sec": self.stale_ttl_sec,
+                "refreshing": list(self._inflight),
+                "locations": {key: dict(value) for key, value in self._metrics.items()},
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class PredictionCache:
+    """
+    Small LRU of prediction results keyed by (location, mortgage rate). An entry
+    is only reused while the version tokens it was computed from (feature build,
+    model ETag) are current, so feature refreshes and model updates drop it.
+    Only the tokens are kept, never the frames or models themselves.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._counters = {
+            "hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "total_compute_sec": 0.0,
+        }
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(location_key: str, mortgage_rate: Optional[float]) -> tuple:
+        # A missing or zero rate means the current market rate
+        return location_key, round(float(mortgage_rate), 4) if mortgage_rate else None
+
+    def get_or_compute(self, key: tuple, version: tuple, compute: Callable):
+        # Concurrent misses for the same key and version wait for one compute
+        flight_key = (key, version)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[1] == version:
+                self._entries.move_to_end(key)
+                self._counters["hits"] += 1
+                return entry[0]
+
+            future = self._inflight.get(flight_key)
+            if future is not None:
+                self._counters["coalesced"] += 1
+                is_leader = False
+            else:
+                self._counters["misses"] += 1
+                future = self._inflight[flight_key] = Future()
+                is_leader = True
+
+        if is_leader:
+            self._compute(key, version, compute, flight_key, future)
+        return future.result()
+
+    def _compute(
+        self,
+        key: tuple,
+        version: tuple,
+        compute: Callable,
+        flight_key: tuple,
+        future: Future,
+    ):
+        start = time.perf_counter()
+        try:
+            value = compute()
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(flight_key, None)
+            future.set_exception(e)
+            return
+        duration = time.perf_counter() - start
+
+        with self._lock:
+            self._entries[key] = (value, version)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+            self._counters["total_compute_sec"] = round(
+                self._counters["total_compute_sec"] + duration, 3
+            )
+            self._inflight.pop(flight_key, None)
+        future.set_result(value)
+
+    def invalidate(self, location_key: str):
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == location_key]:
+                del self._entries[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "maxsize": self.maxsize,
+                "computing": len(self._inflight),
+                **self._counters,
+            }
+
+
+listings_cache = ListingsCache(
+    maxsize=config.listings_cache_size,
+    ttl_sec=config.listings_cache_ttl_sec,
+    stale_ttl_sec=config.listings_cache_stale_ttl_sec,
+    refresh_workers=config.listings_refresh_workers,
+)
+prediction_cache = PredictionCache(maxsize=config.listings_prediction_cache_size)
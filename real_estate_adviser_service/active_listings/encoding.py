@@ -0,0 +1,184 @@
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import orjson
+from pydantic import ValidationError
+
+from active_listings.exceptions import ListingsQueryError
+from active_listings.schemas import Listing
+
+# sort_percentage depends on the requested year, so it is the one field left
+# out of the cached fragments; it is the last field of Listing
+SORT_FIELD = b',"sort_percentage":'
+
+LISTING_FIELDS = [name for name in Listing.model_fields if name != "sort_percentage"]
+FIELD_KEYS = {name: orjson.dumps(name) + b":" for name in LISTING_FIELDS}
+
+# Summary view: no photo arrays, predicted prices as parallel arrays
+SUMMARY_EXCLUDED_FIELDS = {"primary_photo", "alt_photos"}
+SUMMARY_FIELDS = [
+    name for name in LISTING_FIELDS if name not in SUMMARY_EXCLUDED_FIELDS
+]
+SUMMARY_PRICES_COLUMN = "predicted_prices_summary"
+
+
+class EncodedListings:
+    """
+    Pre-encoded JSON of validated listings: one fragment per listing (the
+    whole object without its closing brace) and one encoded value per field
+    and listing, so projections are joined from bytes without building dicts.
+    """
+
+    def __init__(self):
+        self.listings: List[dict] = []
+        self.fragments: List[bytes] = []
+        self.columns: Dict[str, List[bytes]] = {
+            name: [] for name in LISTING_FIELDS + [SUMMARY_PRICES_COLUMN]
+        }
+
+    def append(self, listing: dict, dumped: dict):
+        self.listings.append(listing)
+        self.fragments.append(orjson.dumps(dumped)[:-1])
+        for name in LISTING_FIELDS:
+            self.columns[name].append(orjson.dumps(dumped[name]))
+
+        prices = dumped["predicted_prices"] or []
+        self.columns[SUMMARY_PRICES_COLUMN].append(
+            orjson.dumps(
+                {
+                    "sold_year": [price["sold_year"] for price in prices],
+                    "sold_price": [price["sold_price"] for price in prices],
+                    "percentage": [price["percentage"] for price in prices],
+                }
+            )
+        )
+
+
+def encode_listings(listings: Iterable[dict]) -> EncodedListings:
+    """
+    Validates listings against the Listing schema once and pre-encodes them.
+    Listings failing validation are dropped.
+    """
+    encoded, invalid_count = EncodedListings(), 0
+    for listing in listings:
+        try:
+            validated = Listing.model_validate({**listing, "sort_percentage": 0.0})
+        except ValidationError:
+            invalid_count += 1
+            continue
+        encoded.append(
+            listing, validated.model_dump(mode="json", exclude={"sort_percentage"})
+        )
+
+    if invalid_count:
+        print(f"Dropped {invalid_count} listings that do not match the Listing schema")
+    return encoded
+
+
+def parse_fields(fields: Optional[str], summary: bool) -> Optional[List[str]]:
+    """
+    Field names to project, in Listing order, or None for whole listings.
+    """
+    if not fields and not summary:
+        return None
+
+    allowed = SUMMARY_FIELDS if summary else LISTING_FIELDS
+    if not fields:
+        return allowed
+
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    requested.discard("sort_percentage")
+    unknown = requested - set(allowed)
+    if unknown:
+        raise ListingsQueryError(
+            f"Unknown fields: {', '.join(sorted(unknown))}. "
+            f"Available fields: {', '.join(allowed)}"
+        )
+    if not requested:
+        raise ListingsQueryError(
+            "At least one field besides sort_percentage is required"
+        )
+    return [name for name in allowed if name in requested]
+
+
+def encode_listing_objects(
+    encoded: EncodedListings,
+    page: List[Tuple[int, Optional[float]]],
+    fields: Optional[List[str]] = None,
+    summary: bool = False,
+) -> List[bytes]:
+    """
+    JSON object of every (position, sort_percentage) in page, whole or projected.
+    """
+    sort_parts = [
+        SORT_FIELD + orjson.dumps(sort_percentage) + b"}" for _, sort_percentage in page
+    ]
+    if fields is None:
+        return [
+            encoded.fragments[row] + sort_part
+            for (row, _), sort_part in zip(page, sort_parts)
+        ]
+
+    columns = [
+        (
+            FIELD_KEYS[name],
+            encoded.columns[
+                (
+                    SUMMARY_PRICES_COLUMN
+                    if summary and name == "predicted_prices"
+                    else name
+                )
+            ],
+        )
+        for name in fields
+    ]
+    return [
+        b"{" + b",".join(key + values[row] for key, values in columns) + sort_part
+        for (row, _), sort_part in zip(page, sort_parts)
+    ]
+
+
+def join_listing_fragments(
+    encoded: EncodedListings,
+    page: List[Tuple[int, Optional[float]]],
+    fields: Optional[List[str]] = None,
+    summary: bool = False,
+) -> Tuple[bytes, int]:
+    """
+    Returns (JSON array of the page, size of the same page as whole listings).
+    """
+    objects = encode_listing_objects(encoded, page, fields=fields, summary=summary)
+    if fields is None:
+        full_size = sum(map(len, objects))
+    else:
+        full_size = sum(
+            len(encoded.fragments[row])
+            + len(SORT_FIELD + orjson.dumps(sort_percentage))
+            + 1
+            for row, sort_percentage in page
+        )
+    full_size += max(len(page) - 1, 0) + 2
+    return b"[" + b",".join(objects) + b"]", full_size
+
+
+class PayloadMetrics:
+    def __init__(self):
+        self._views = defaultdict(
+            lambda: {"responses": 0, "bytes_sent": 0, "bytes_saved": 0}
+        )
+        self._lock = threading.Lock()
+
+    def record(self, view: str, bytes_sent: int, full_size: int):
+        with self._lock:
+            metrics = self._views[view]
+            metrics["responses"] += 1
+            metrics["bytes_sent"] += bytes_sent
+            metrics["bytes_saved"] += full_size - bytes_sent
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {view: dict(metrics) for view, metrics in self._views.items()}
+
+
+payload_metrics = PayloadMetrics()
@@ -0,0 +1,6 @@
+class ListingsQueryError(Exception):
+    """
+    A listings request that cannot be answered as asked: unknown sort year or
+    fields, invalid or expired cursor. Routes map it to 400; any other error
+    is a server error.
+    """
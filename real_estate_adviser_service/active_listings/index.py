@@ -0,0 +1,133 @@
+import base64
+import bisect
+import itertools
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from active_listings.encoding import encode_listings
+from active_listings.exceptions import ListingsQueryError
+
+_versions = itertools.count(1)
+
+
+class ListingIndex:
+    """
+    Read-only view over one location's predicted listings. list_price is kept
+    sorted for range lookups by binary search and every forecast year has a
+    precomputed ranking by predicted percentage (descending, ties in listing
+    order, listings without a prediction for the year last). Queries return
+    positions into `listings`; the listing dicts are never modified.
+    Listings are validated and JSON-encoded once here, see encode_listings.
+    """
+
+    def __init__(self, listings: List[dict]):
+        self.encoded = encode_listings(listings)
+        self.listings = tuple(self.encoded.listings)
+        self.version = next(_versions)
+
+        prices = np.array(
+            [
+                np.nan if listing["list_price"] is None else listing["list_price"]
+                for listing in self.listings
+            ],
+            dtype=float,
+        )
+        priced = np.flatnonzero(~np.isnan(prices))
+        order = priced[np.argsort(prices[priced], kind="stable")]
+        self._price_order = order
+        self._sorted_prices = prices[order].tolist()
+
+        self.years = sorted(
+            {
+                price["sold_year"]
+                for listing in self.listings
+                for price in listing["predicted_prices"] or []
+            }
+        )
+        year_positions = {year: i for i, year in enumerate(self.years)}
+        percentages = np.full((len(self.years), len(self.listings)), np.nan)
+        for row, listing in enumerate(self.listings):
+            for price in reversed(listing["predicted_prices"] or []):
+                # reversed, so the first entry of a year wins
+                percentages[year_positions[price["sold_year"]], row] = price[
+                    "percentage"
+                ]
+        self._percentages = percentages
+
+        sort_keys = np.where(np.isnan(percentages), np.inf, -percentages)
+        self._rankings = {
+            year: np.argsort(sort_keys[i], kind="stable")
+            for i, year in enumerate(self.years)
+        }
+
+    def __len__(self):
+        return len(self.listings)
+
+    def price_range(self, min_price=None, max_price=None) -> np.ndarray:
+        """
+        Positions of listings with min_price <= list_price <= max_price.
+        """
+        lo = (
+            0
+            if min_price is None
+            else bisect.bisect_left(self._sorted_prices, min_price)
+        )
+        hi = (
+            len(self._sorted_prices)
+            if max_price is None
+            else bisect.bisect_right(self._sorted_prices, max_price)
+        )
+        return self._price_order[lo:hi]
+
+    def query(
+        self,
+        sold_year: int,
+        min_price=None,
+        max_price=None,
+        offset: int = 0,
+        amount: Optional[int] = None,
+    ) -> Tuple[List[Tuple[int, Optional[float]]], int]:
+        """
+        Returns ([(position, sort_percentage), ...], total matches) for one page
+        of the ranking for sold_year, restricted to the price range.
+        """
+        if sold_year not in self._rankings:
+            raise ListingsQueryError(
+                f"Incorrect sort year passed. Available years: "
+                f"{', '.join(map(str, self.years))}"
+            )
+
+        ranking = self._rankings[sold_year]
+        if min_price is not None or max_price is not None:
+            in_range = np.zeros(len(self.listings), dtype=bool)
+            in_range[self.price_range(min_price, max_price)] = True
+            ranking = ranking[in_range[ranking]]
+
+        end = None if amount is None else offset + amount
+        page = ranking[offset:end]
+        year_percentages = self._percentages[self.years.index(sold_year)]
+        return [
+            (int(row), None if np.isnan(value) else float(value))
+            for row, value in zip(page, year_percentages[page])
+        ], len(ranking)
+
+
+def encode_cursor(version: int, sold_year: int, offset: int) -> str:
+    return base64.urlsafe_b64encode(f"{version}:{sold_year}:{offset}".encode()).decode()
+
+
+def decode_cursor(cursor: str, index: ListingIndex, sold_year: int) -> int:
+    """
+    Returns the offset a cursor points to. Cursors are only valid for the index
+    (and sort year) they were issued for, since rankings change on refresh.
+    """
+    try:
+        version, cursor_year, offset = map(
+            int, base64.urlsafe_b64decode(cursor.encode()).decode().split(":")
+        )
+    except Exception:
+        raise ListingsQueryError("Invalid cursor")
+    if version != index.version or cursor_year != sold_year:
+        raise ListingsQueryError("Cursor expired, listings were refreshed; start over")
+    return offset
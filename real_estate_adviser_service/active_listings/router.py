@@ -1,37 +1,117 @@
-from fastapi import APIRouter, Query, HTTPException
-from typing import List
+from fastapi import APIRouter, Query, HTTPException, Request, Response
+from typing import List, Literal
 
-from active_listings.schemas import Listing
+from active_listings.schemas import (
+    AnyListing,
+    ListingsBatchRequest,
+    ListingsBatchResponse,
+)
 from active_listings import service
+from active_listings.exceptions import ListingsQueryError
 from common import format_location, validate_is_location_added
-
+from config import config
+from http_cache import cached_response, make_etag, not_modified_response
 
 router = APIRouter()
 
 
-@router.get("/active-listings", operation_id="active_listings")
+@router.get(
+    "/active-listings",
+    operation_id="active_listings",
+    response_model=List[AnyListing],
+    response_description="Listing objects, ListingProjection with fields, "
+    "ListingSummary with view=summary",
+)
 def get_active_listings(
+    request: Request,
     location: str = Query(..., description="Location"),
     min_price: int = Query(None, description="Min Listing Price"),
     max_price: int = Query(None, description="Max Listing Price"),
-    sort_by_year: int = Query(2024, description="Sort By Year"),
+    sort_by_year: int = Query(
+        None, description="Sort By Year (defaults to the current year)"
+    ),
     amount: int = Query(None, description="Amount"),
     planned_mortgage_rate: float = Query(None, description="Planned Mortgage Rate"),
-) -> List[Listing]:
+    offset: int = Query(0, ge=0, description="Offset"),
+    cursor: str = Query(None, description="Cursor from X-Next-Cursor"),
+    fields: str = Query(
+        None,
+        description="Comma-separated Listing fields to return (sort_percentage is always included)",
+    ),
+    view: Literal["full", "summary"] = Query(
+        "full",
+        description="summary drops photos and returns predicted prices as parallel arrays",
+    ),
+):
     location, city, state = format_location(location)
 
     validate_is_location_added(location)
 
     try:
-        return service.get_active_listings(
+        index = service.get_listings_index(
             location=location,
             city=city,
             state=state,
+            planned_mortgage_rate=planned_mortgage_rate,
+        )
+        # Index versions change whenever listings or predictions are rebuilt;
+        # the query selects the page and projection of that index
+        etag = make_etag(
+            "active-listings", index.version, sorted(request.query_params.multi_items())
+        )
+        cache_control = service.get_listings_cache_control(location)
+        not_modified = not_modified_response(request, etag, cache_control)
+        if not_modified:
+            return not_modified
+
+        body, total, next_cursor = service.get_listings_page(
+            index,
             min_price=min_price,
             max_price=max_price,
             sort_by_year=sort_by_year,
             amount=amount,
-            planned_mortgage_rate=planned_mortgage_rate,
+            offset=offset,
+            cursor=cursor,
+            fields=fields,
+            view=view,
         )
+    except ListingsQueryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+    # The body is pre-validated and pre-encoded JSON, so it bypasses the
+    # response_model serialization
+    headers = {"X-Total-Count": str(total)}
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    return cached_response(request, body, etag, cache_control, headers=headers)
+
+
+@router.post(
+    "/active-listings/batch",
+    operation_id="active_listings_batch",
+    response_model=ListingsBatchResponse,
+)
+def get_active_listings_batch(request: ListingsBatchRequest):
+    if not request.locations:
+        raise HTTPException(status_code=400, detail="No locations passed")
+    if len(request.locations) > config.listings_batch_max_locations:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {config.listings_batch_max_locations} locations per batch",
+        )
+
+    body = service.get_active_listings_batch(
+        locations=request.locations,
+        min_price=request.min_price,
+        max_price=request.max_price,
+        sort_by_year=request.sort_by_year,
+        amount=request.amount,
+        planned_mortgage_rate=request.planned_mortgage_rate,
+        fields=request.fields,
+        view=request.view,
+        top_n=request.top_n,
+    )
+    # Per-location failures are reported in the body, see LocationListings
+    return Response(content=body, media_type="application/json")
@@ -1,6 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field, create_model
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Literal, Optional, Union
 
 
 class PredictPrice(BaseModel):
@@ -43,3 +43,69 @@ class Listing(BaseModel):
     mortgage_rate: Optional[float]
     predicted_prices: Optional[List[PredictPrice]]
     sort_percentage: float
+
+
+class PredictPricesSummary(BaseModel):
+    sold_year: List[int]
+    sold_price: List[float]
+    percentage: List[float]
+
+
+# Listing shapes returned with fields= (only the requested fields are present)
+# and view=summary (no photos, predicted prices as parallel arrays). They only
+# document the API: listing responses are pre-encoded and not re-validated.
+PROJECTED_FIELDS = {
+    name: (field.annotation, None)
+    for name, field in Listing.model_fields.items()
+    if name != "sort_percentage"
+}
+
+ListingProjection = create_model(
+    "ListingProjection",
+    __config__=ConfigDict(extra="forbid"),
+    **PROJECTED_FIELDS,
+    sort_percentage=(float, ...),
+)
+
+ListingSummary = create_model(
+    "ListingSummary",
+    __config__=ConfigDict(extra="forbid"),
+    **{
+        **{
+            name: definition
+            for name, definition in PROJECTED_FIELDS.items()
+            if name not in {"primary_photo", "alt_photos"}
+        },
+        "predicted_prices": (Optional[PredictPricesSummary], None),
+    },
+    sort_percentage=(float, ...),
+)
+
+AnyListing = Union[Listing, ListingProjection, ListingSummary]
+
+
+class ListingsBatchRequest(BaseModel):
+    locations: List[str]
+    min_price: Optional[int] = None
+    max_price: Optional[int] = None
+    sort_by_year: Optional[int] = None
+    amount: Optional[int] = None
+    planned_mortgage_rate: Optional[float] = None
+    fields: Optional[str] = None
+    view: Literal["full", "summary"] = "full"
+    top_n: Optional[int] = Field(
+        None, ge=1, description="Also rank the best listings across all locations"
+    )
+
+
+class LocationListings(BaseModel):
+    location: str
+    status_code: int
+    total: Optional[int] = None
+    listings: Optional[List[AnyListing]] = None
+    error: Optional[str] = None
+
+
+class ListingsBatchResponse(BaseModel):
+    results: List[LocationListings]
+    top: Optional[List[AnyListing]] = None
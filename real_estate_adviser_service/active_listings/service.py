@@ -1,23 +1,132 @@
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
 import numpy as np
-from cachetools import TTLCache
-import re
+import orjson
+from fastapi import HTTPException
 
 
+from active_listings.cache import (
+    get_listings_cache_key,
+    listings_cache,
+    prediction_cache,
+)
+from active_listings.encoding import (
+    encode_listing_objects,
+    join_listing_fragments,
+    parse_fields,
+    payload_metrics,
+)
+from active_listings.exceptions import ListingsQueryError
+from active_listings.index import ListingIndex, decode_cursor, encode_cursor
 from active_listings.utils import (
     scrape_active_sales,
-    read_model_from_storage,
+    read_versioned_model_from_storage,
     predict_sale_prices,
-    filter_properties,
 )
 from add_location.utils import PropertyDatasetProcessor
+from common import format_location
+from config import config
+from locations.service import get_location_names
+
+# Bounds how many locations of one batch request are built at the same time
+batch_executor = ThreadPoolExecutor(
+    max_workers=config.listings_batch_workers, thread_name_prefix="listings-batch"
+)
+
+
+def build_listing_features(location: str, city: str, state: str):
+    raw_sales_df = scrape_active_sales(location)
+    return PropertyDatasetProcessor(
+        raw_sales_df, city, is_training=False, state=state
+    ).clean_dataset()
 
 
-cache = TTLCache(maxsize=10, ttl=60*180)
+def predict_listings(properties_df, rf_model, planned_mortgage_rate: Optional[float]):
+    if planned_mortgage_rate:
+        properties_df = properties_df.assign(mortgage_rate=planned_mortgage_rate)
+    predict_prices_df = predict_sale_prices(properties_df, rf_model)
+    predict_prices_df.replace([np.inf, -np.inf, np.nan], None, inplace=True)
+    return predict_prices_df.to_dict(orient="records")
 
 
-def _get_cache_key(location: str):
-    return str(hash(f"{location.lower().replace(' ', '')}"))
+def get_listings_index(
+    location: str,
+    city: str,
+    state: str,
+    planned_mortgage_rate: Optional[float] = None,
+) -> ListingIndex:
+    # Features are cached per location; predictions per (location, rate), so
+    # a custom mortgage rate only re-runs the model on the cached features
+    location_key = get_listings_cache_key(location)
+    properties_df, features_version = listings_cache.get_or_build_versioned(
+        location_key, lambda: build_listing_features(location, city, state)
+    )
+    rf_model, model_etag = read_versioned_model_from_storage(city, state)
+    return prediction_cache.get_or_compute(
+        prediction_cache.make_key(location_key, planned_mortgage_rate),
+        (features_version, model_etag),
+        lambda: ListingIndex(
+            predict_listings(properties_df, rf_model, planned_mortgage_rate)
+        ),
+    )
+
+
+def get_listings_cache_control(location: str) -> str:
+    # Clients may reuse listings as long as the server-side features are fresh
+    # and keep showing them while the server serves them stale
+    max_age = int(listings_cache.fresh_for(get_listings_cache_key(location)))
+    return (
+        f"public, max-age={max_age}, "
+        f"stale-while-revalidate={int(listings_cache.stale_ttl_sec)}"
+    )
+
+
+def get_sort_year(index: ListingIndex, sort_by_year: Optional[int]):
+    # Defaults to the first forecast year, the current year
+    return sort_by_year or (index.years[0] if index.years else None)
+
+
+def get_listings_page(
+    index: ListingIndex,
+    min_price: int,
+    max_price: int,
+    sort_by_year: Optional[int],
+    amount: int,
+    offset: int = 0,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    view: str = "full",
+):
+    """
+    Returns (JSON body of the listings page, total matching listings, cursor of
+    the next page).
+    """
+    sold_year = get_sort_year(index, sort_by_year)
+    if cursor:
+        offset = decode_cursor(cursor, index, sold_year)
+    page, total = index.query(
+        sold_year,
+        min_price=min_price,
+        max_price=max_price,
+        offset=offset,
+        amount=amount,
+    )
+
+    next_offset = offset + len(page)
+    next_cursor = (
+        encode_cursor(index.version, sold_year, next_offset)
+        if next_offset < total
+        else None
+    )
+    summary = view == "summary"
+    projected_fields = parse_fields(fields, summary)
+    body, full_size = join_listing_fragments(
+        index.encoded, page, fields=projected_fields, summary=summary
+    )
+    payload_metrics.record(
+        view if summary or not fields else "fields", len(body), full_size
+    )
+    return body, total, next_cursor
 
 
 def get_active_listings(
@@ -26,37 +135,148 @@ def get_active_listings(
     state: str,
     min_price: int,
     max_price: int,
-    sort_by_year: int,
+    sort_by_year: Optional[int],
     amount: int,
     planned_mortgage_rate: Optional[float] = None,
+    offset: int = 0,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    view: str = "full",
 ):
-    cache_key = _get_cache_key(location)
-    if cache_key in cache:
-        return filter_properties(
-            cache[cache_key],
-            min_price=min_price,
-            max_price=max_price,
-            sold_year=sort_by_year,
-            amount=amount,
-        )
+    index = get_listings_index(location, city, state, planned_mortgage_rate)
+    return get_listings_page(
+        index,
+        min_price=min_price,
+        max_price=max_price,
+        sort_by_year=sort_by_year,
+        amount=amount,
+        offset=offset,
+        cursor=cursor,
+        fields=fields,
+        view=view,
+    )
 
-    raw_sales_df = scrape_active_sales(location)
-    rf_model = read_model_from_storage(city, state)
-    properties_df = PropertyDatasetProcessor(
-        raw_sales_df,
-        city,
-        is_training=False,
-        planned_mortgage_rate=planned_mortgage_rate,
-    ).clean_dataset()
-    predict_prices_df = predict_sale_prices(properties_df, rf_model)
-    predict_prices_df.replace([np.inf, -np.inf, np.nan], None, inplace=True)
-    result = predict_prices_df.to_dict(orient="records")
 
-    cache[cache_key] = result
-    return filter_properties(
-        result,
+def get_location_batch_listings(
+    location: str, city: str, state: str, filters: dict, top_n: Optional[int]
+):
+    """
+    Returns (JSON body of the listings page, total, top_n [(sort_percentage,
+    listing JSON)]) for one location of a batch.
+    """
+    index = get_listings_index(location, city, state, filters["planned_mortgage_rate"])
+    body, total, _ = get_listings_page(
+        index,
+        min_price=filters["min_price"],
+        max_price=filters["max_price"],
+        sort_by_year=filters["sort_by_year"],
+        amount=filters["amount"],
+        fields=filters["fields"],
+        view=filters["view"],
+    )
+    if not top_n:
+        return body, total, []
+
+    # Each location's own ranking is sorted, so its first top_n listings are
+    # the only candidates for the merged top_n
+    top_page, _ = index.query(
+        get_sort_year(index, filters["sort_by_year"]),
+        min_price=filters["min_price"],
+        max_price=filters["max_price"],
+        amount=top_n,
+    )
+    summary = filters["view"] == "summary"
+    objects = encode_listing_objects(
+        index.encoded,
+        top_page,
+        fields=parse_fields(filters["fields"], summary),
+        summary=summary,
+    )
+    return body, total, list(zip([pct for _, pct in top_page], objects))
+
+
+def get_active_listings_batch(
+    locations: List[str],
+    min_price: Optional[int],
+    max_price: Optional[int],
+    sort_by_year: Optional[int],
+    amount: Optional[int],
+    planned_mortgage_rate: Optional[float] = None,
+    fields: Optional[str] = None,
+    view: str = "full",
+    top_n: Optional[int] = None,
+) -> bytes:
+    """
+    Listings of several locations with shared filters. Locations are built
+    concurrently on batch_executor; a failing location is reported in its own
+    result instead of failing the batch. Returns the JSON body.
+    """
+    filters = dict(
         min_price=min_price,
         max_price=max_price,
-        sold_year=sort_by_year,
+        sort_by_year=sort_by_year,
         amount=amount,
+        planned_mortgage_rate=planned_mortgage_rate,
+        fields=fields,
+        view=view,
     )
+    added_locations = set(get_location_names())
+
+    results, futures = [], {}
+    for requested in locations:
+        result = {"location": requested, "status_code": 200, "total": None}
+        try:
+            location, city, state = format_location(requested)
+        except HTTPException as e:
+            results.append({**result, "status_code": e.status_code, "error": e.detail})
+            continue
+
+        result["location"] = location
+        if location not in added_locations:
+            results.append(
+                {
+                    **result,
+                    "status_code": 404,
+                    "error": f"Location {location} was not found",
+                }
+            )
+            continue
+
+        # A location requested twice is built once and reported twice
+        if location not in futures:
+            futures[location] = batch_executor.submit(
+                get_location_batch_listings, location, city, state, filters, top_n
+            )
+        results.append(result)
+
+    entries, top, ranked_locations = [], [], set()
+    for result in results:
+        listings = b"null"
+        future = futures.get(result["location"]) if "error" not in result else None
+        if future is not None:
+            try:
+                listings, result["total"], location_top = future.result()
+            except ListingsQueryError as e:
+                result.update(status_code=400, error=str(e))
+            except Exception as e:
+                print(f"Batch listings for {result['location']} failed: {e}")
+                result.update(status_code=500, error=str(e))
+            else:
+                if result["location"] not in ranked_locations:
+                    ranked_locations.add(result["location"])
+                    top.extend(location_top)
+        result.setdefault("error", None)
+        entries.append(orjson.dumps(result)[:-1] + b',"listings":' + listings + b"}")
+
+    top_body = b"null"
+    if top_n:
+        # Stable sort keeps request order between equal percentages;
+        # listings without a prediction for the year go last
+        top.sort(key=lambda item: (item[0] is None, -(item[0] or 0)))
+        top_body = b"[" + b",".join(listing for _, listing in top[:top_n]) + b"]"
+
+    return b'{"results":[' + b",".join(entries) + b'],"top":' + top_body + b"}"
+
+
+def shutdown_batch_executor():
+    batch_executor.shutdown(wait=False, cancel_futures=True)
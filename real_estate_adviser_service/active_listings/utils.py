@@ -1,27 +1,30 @@
-import pickle
+import numpy as np
 import pandas as pd
-from azure.storage.blob import BlobServiceClient
-from homeharvest import scrape_property
 from datetime import date, timedelta
 from config import config
+from model_storage.cache import model_cache
+from model_storage.utils import get_model_blob_name
+
+
+def read_model_artifact_from_storage(city: str, state: str):
+    return model_cache.get(get_model_blob_name(city, state))
 
 
 def read_model_from_storage(city: str, state: str):
-    blob_service_client = BlobServiceClient.from_connection_string(
-        config.az_storage_conn_str
-    )
-    blob_name = f"{city.lower()}_{state.lower()}.pkl"
+    return read_model_artifact_from_storage(city, state).model
 
-    blob_client = blob_service_client.get_blob_client(
-        container=config.az_storage_container_name, blob=blob_name
-    )
-    blob_data = blob_client.download_blob().readall()
 
-    model = pickle.loads(blob_data)
-    return model
+def read_versioned_model_from_storage(city: str, state: str):
+    """
+    Returns (model, ETag of its blob).
+    """
+    artifact, etag = model_cache.get_versioned(get_model_blob_name(city, state))
+    return artifact.model, etag
 
 
 def scrape_active_sales(location):
+    from homeharvest import scrape_property
+
     start_date = str(date.today() - timedelta(days=config.active_listing_days))
     end_date = str(date.today())
 
@@ -38,104 +41,94 @@ def scrape_active_sales(location):
     return properties
 
 
+PREDICTION_DROP_COLUMNS = [
+    "property_url",
+    "status",
+    "street",
+    "unit",
+    "city",
+    "state",
+    "days_on_mls",
+    "list_price",
+    "list_date",
+    "latitude",
+    "longitude",
+    "primary_photo",
+    "mls",
+    "mls_id",
+    "price_per_sqft",
+    "alt_photos",
+    "style",
+    "full_baths",
+    "half_baths",
+    "last_sold_date",
+    "sold_price",
+    "stories",
+    "hoa_fee",
+]
+
+PREDICTION_EXCLUDE_COLUMNS = {"sold_year", "sold_price", "percentage", "age"}
+
+
 def predict_sale_prices(properties_df, rf_model):
+    """
+    Predicts every listing for every forecast year with one rf_model.predict
+    call on a (years * listings) feature matrix in year-major order, and
+    attaches each listing's yearly predictions as a list.
+    """
     years_to_predict = [
         date.today().year + i for i in range(0, config.yrs_to_predict + 1, 2)
     ]
-
-    predicted_df = pd.concat(
-        [properties_df.assign(sold_year=year) for year in years_to_predict],
-        ignore_index=True,
-    )
-    predicted_df["age"] = predicted_df.apply(
-        lambda row: row["sold_year"] - row["year_built"], axis=1
-    )
-
-    cols_to_drop = [
-        "property_url",
-        "status",
-        "street",
-        "unit",
-        "city",
-        "state",
-        "days_on_mls",
-        "list_price",
-        "list_date",
-        "latitude",
-        "longitude",
-        "primary_photo",
-        "mls",
-        "mls_id",
-        "price_per_sqft",
-        "alt_photos",
-        "style",
-        "full_baths",
-        "half_baths",
-        "last_sold_date",
-        "sold_price",
-        "stories",
-        "hoa_fee",
+    years = np.array(years_to_predict)
+    n_listings = len(properties_df)
+
+    features = properties_df.drop(PREDICTION_DROP_COLUMNS, axis=1)
+    sold_years = np.repeat(years, n_listings)
+    feature_matrix = {}
+    for col in features.columns:
+        if col == "sold_year":
+            feature_matrix[col] = sold_years
+        elif col == "age":
+            feature_matrix[col] = sold_years - np.tile(
+                properties_df["year_built"].to_numpy(), len(years)
+            )
+        else:
+            feature_matrix[col] = np.tile(features[col].to_numpy(), len(years))
+
+    sold_prices = rf_model.predict(
+        pd.DataFrame(feature_matrix, columns=features.columns)
+    ).reshape(len(years), n_listings)
+    percentages = (sold_prices / properties_df["list_price"].to_numpy() - 1) * 100
+
+    output_cols = [
+        col for col in properties_df.columns if col not in PREDICTION_EXCLUDE_COLUMNS
+    ]
+    final_df = properties_df[output_cols]
+
+    # Rows identical in every output column were merged into one listing (with
+    # each copy's predictions) by the previous groupby-based implementation
+    if final_df.duplicated().any():
+        groups = final_df.groupby(output_cols, dropna=False, sort=False).ngroup()
+        group_rows = pd.Series(np.arange(n_listings)).groupby(groups.to_numpy())
+        members = [rows.to_numpy() for _, rows in group_rows]
+    else:
+        members = [[row] for row in range(n_listings)]
+
+    year_values = years.tolist()
+    predicted_prices = [
+        [
+            {
+                "sold_year": year_values[y],
+                "sold_price": sold_prices[y, row],
+                "percentage": percentages[y, row],
+            }
+            for y in range(len(year_values))
+            for row in rows
+        ]
+        for rows in members
     ]
-    predicted_df["sold_price"] = rf_model.predict(
-        predicted_df.drop(cols_to_drop, axis=1)
-    )
-
-    predicted_df["percentage"] = (
-        predicted_df["sold_price"] / predicted_df["list_price"] - 1
-    ) * 100
-
-    predicted_df["predicted_prices"] = predicted_df.apply(
-        lambda row: {
-            "sold_year": row["sold_year"],
-            "sold_price": row["sold_price"],
-            "percentage": row["percentage"],
-        },
-        axis=1,
-    )
 
-    exclude_columns = {
-        "sold_year",
-        "sold_price",
-        "percentage",
-        "predicted_prices",
-        "age",
-    }
-    groupby_cols = [col for col in predicted_df.columns if col not in exclude_columns]
-
-    final_df = (
-        predicted_df.groupby(groupby_cols, dropna=False, sort=False)["predicted_prices"]
-        .agg(list)
-        .reset_index()
-    )
+    final_df = final_df.iloc[[rows[0] for rows in members]].reset_index(drop=True)
+    final_df["predicted_prices"] = predicted_prices
     final_df["alt_photos"] = final_df["alt_photos"].str.split(", ")
     return final_df
-
-
-def filter_properties(
-    properties, min_price=None, max_price=None, sold_year=2024, amount=None
-):
-    if min_price is not None:
-        properties = [prop for prop in properties if prop["list_price"] >= min_price]
-    if max_price is not None:
-        properties = [prop for prop in properties if prop["list_price"] <= max_price]
-
-    for prop in properties:
-        year_data = next(
-            (
-                price
-                for price in prop["predicted_prices"]
-                if price["sold_year"] == sold_year
-            ),
-            None,
-        )
-
-        if year_data:
-            prop["sort_percentage"] = year_data["percentage"]
-
-    properties = sorted(
-        properties, key=lambda x: x.get("sort_percentage", float("-inf")), reverse=True
-    )
-    if amount is not None:
-        properties = properties[:amount]
-
-    return properties
@@ -3,19 +3,33 @@ from add_location import service
 from common import format_location
 from database.database import DbEngine
 from add_location.schemas import Location
+from jobs.schemas import JobSubmission
+from jobs.service import job_queue
 
 router = APIRouter()
 
 
-@router.post("/add_location", operation_id="add_location")
-def add_location(db_engine: DbEngine, location: Location):
+@router.post("/add_location", operation_id="add_location", status_code=202)
+def add_location(db_engine: DbEngine, location: Location) -> JobSubmission:
+    force_full = location.force_full_retrain
     location, city, state = format_location(location.location)
 
     try:
-        service.initialize_location(
-            engine=db_engine, location=location, city=city, state=state
+        job, created = job_queue.submit(
+            key=location,
+            location=location,
+            func=service.initialize_location,
+            engine=db_engine,
+            city=city,
+            state=state,
+            force_full=force_full,
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-    return {"status": "success", "message": f"Processed location: {location}"}
+    message = (
+        f"Processing location: {location}"
+        if created
+        else f"Location {location} is already being processed"
+    )
+    return JobSubmission(status="accepted", job_id=job.job_id, message=message)
@@ -3,3 +3,4 @@ from pydantic import BaseModel
 
 class Location(BaseModel):
     location: str
+    force_full_retrain: bool = False
@@ -1,17 +1,75 @@
+from contextlib import nullcontext
+from typing import Optional
+
 from sqlalchemy.engine import Engine
 
+from database.utils import read_historical_property_data
 from add_location.utils import (
+    get_training_plan,
     scrape_historical_sales,
     PropertyDatasetProcessor,
     train_model,
+    train_model_incremental,
     write_model_to_storage,
 )
+from jobs.service import JobProgress, get_process_pool
+from model_storage.artifact import dataset_fingerprint
+from model_storage.cache import model_cache
+from model_storage.utils import get_model_blob_name, read_stored_fingerprint
+from locations.service import location_registry
+
+
+def _stage(progress: Optional[JobProgress], name: str):
+    return progress.stage(name) if progress else nullcontext()
+
+
+def initialize_location(
+    engine: Engine,
+    location: str,
+    city: str,
+    state: str,
+    progress: Optional[JobProgress] = None,
+    force_full: bool = False,
+):
+    with _stage(progress, "scrape"):
+        scrape_historical_sales(
+            engine=engine, location=location, city=city, state=state
+        )
+
+    with _stage(progress, "clean"):
+        df = read_historical_property_data(engine, city, state)
+        dataset = PropertyDatasetProcessor(df, city, state=state).clean_dataset()
+        fingerprint = dataset_fingerprint(dataset)
+        del df
+
+    with _stage(progress, "train"):
+        blob_name = get_model_blob_name(city, state)
+        stored_fingerprint = read_stored_fingerprint(blob_name)
+        plan = get_training_plan(stored_fingerprint, fingerprint, force_full)
+        print(f"{location}: training plan {plan} ({fingerprint['row_count']} rows)")
 
+        trained = None
+        if plan == "incremental":
+            base_model = model_cache.get(blob_name).model
+            trained = (
+                get_process_pool()
+                .submit(
+                    train_model_incremental,
+                    base_model,
+                    dataset,
+                    stored_fingerprint["max_sold_date"],
+                )
+                .result()
+            )
+            if trained is None:
+                print(f"{location}: incremental training not possible, rebuilding")
+        if plan != "skip" and trained is None:
+            trained = get_process_pool().submit(train_model, dataset).result()
 
-def initialize_location(engine: Engine, location: str, city: str, state: str):
-    df = scrape_historical_sales(
-        engine=engine, location=location, city=city, state=state
-    )
-    dataset = PropertyDatasetProcessor(df, city).clean_dataset()
-    model, model_score = train_model(dataset)
-    write_model_to_storage(engine, model, city, state, model_score)
+    with _stage(progress, "upload"):
+        if trained is not None:
+            model, model_score = trained
+            write_model_to_storage(
+                engine, model, city, state, model_score, fingerprint=fingerprint
+            )
+        location_registry.refresh()
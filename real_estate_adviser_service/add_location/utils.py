@@ -1,109 +1,356 @@
-import geopy.distance
 import pandas as pd
 import numpy as np
-from geopy.geocoders import Nominatim
-import pickle
+import json
+import os
+import threading
+import time
 import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Optional
 from sqlalchemy import Engine
-import requests
 
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.cluster import DBSCAN
-
-from sklearn.metrics import explained_variance_score
-from sklearn.metrics import confusion_matrix
-from sklearn.metrics import mean_squared_error
-from sklearn.metrics import mean_absolute_error
-from sklearn.metrics import r2_score
-
-from homeharvest import scrape_property
 from datetime import datetime, timedelta
-from azure.storage.blob import BlobServiceClient, BlobBlock
 
 from config import config
+from geocoding.utils import get_downtown_coordinates
+from mortgage_rates.utils import mortgage_rate_store
+from model_storage.artifact import dump_model_artifact, artifact_blob_metadata
+from model_storage.cache import model_cache
+from model_storage.utils import get_model_blob_name, get_model_blob_client
 from database.utils import (
-    read_historical_property_data,
-    write_historical_property_data,
-    remove_location_from_db,
+    get_latest_sold_date,
+    upsert_historical_property_data,
     add_model_score,
 )
 
+# scikit-learn, homeharvest, geopy and azure-storage-blob are imported where
+# they are used, so the service starts without them; see warmup.py
 
-def scrape_historical_sales(engine: Engine, location: str, city: str, state: str):
-    sql_df = read_historical_property_data(engine, city, state)
 
-    if len(sql_df) == 0:
-        latest_ts = None
-    else:
-        sql_df["last_sold_date"] = pd.to_datetime(
-            sql_df["last_sold_date"], errors="coerce"
-        )
-        latest_ts = sql_df["last_sold_date"].max()
+def scrape_property(*args, **kwargs):
+    from homeharvest import scrape_property
 
-    date_format = "%Y-%m-%d"
-    increment = timedelta(days=config.hist_batch_incr_days)
+    return scrape_property(*args, **kwargs)
 
-    if latest_ts is None:
-        start_date = datetime(year=config.hist_start_year, month=1, day=1)
-    else:
-        remove_location_from_db(
-            engine=engine, city=city, state=state, last_sold_date=latest_ts
-        )
-        start_date = latest_ts
+
+class RateLimiter:
+    """
+    Spaces calls at least 1 / requests_per_sec apart across all threads.
+    """
+
+    def __init__(self, requests_per_sec: Optional[float]):
+        self.interval = 1 / requests_per_sec if requests_per_sec else 0.0
+        self._next_at = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            scheduled_at = max(self._next_at, now)
+            self._next_at = scheduled_at + self.interval
+        time.sleep(scheduled_at - now)
+
+
+def get_scrape_windows(start_date: datetime, until: datetime):
+    increment = timedelta(days=config.hist_batch_incr_days)
     end_date = start_date + increment
 
-    dataframes = []
+    windows = []
+    while start_date < until:
+        windows.append((start_date, end_date))
+        start_date = end_date + timedelta(days=1)
+        end_date += increment
+    return windows
+
 
-    while start_date < datetime.utcnow():
-        start_date_str = start_date.strftime(date_format)
-        end_date_str = end_date.strftime(date_format)
+def fetch_window(
+    location: str,
+    window,
+    scraper=scrape_property,
+    rate_limiter: Optional[RateLimiter] = None,
+    retries: int = 0,
+    backoff_sec: float = 0.0,
+):
+    """
+    Returns the sold properties for one window, or None when all attempts failed.
+    ValueError means the request itself is invalid, so it is not retried.
+    """
+    date_format = "%Y-%m-%d"
+    start_date_str = window[0].strftime(date_format)
+    end_date_str = window[1].strftime(date_format)
 
+    for attempt in range(retries + 1):
+        if rate_limiter:
+            rate_limiter.wait()
         try:
-            properties = scrape_property(
+            properties = scraper(
                 location=location,
                 listing_type="sold",
                 date_from=start_date_str,
                 date_to=end_date_str,
             )
             print(f"Start:{start_date_str} End:{end_date_str} Count:{len(properties)}")
-            dataframes.append(properties)
+            return properties
+        except Exception as e:
+            print(
+                f"Start:{start_date_str} End:{end_date_str} Attempt:{attempt + 1} Error:{str(e)}"
+            )
+            if isinstance(e, ValueError) or attempt == retries:
+                return None
+            time.sleep(backoff_sec * 2**attempt)
+
+
+def fetch_historical_windows(
+    location: str,
+    windows,
+    scraper=scrape_property,
+    max_workers: Optional[int] = None,
+    requests_per_sec: Optional[float] = None,
+    retries: Optional[int] = None,
+    backoff_sec: Optional[float] = None,
+):
+    """
+    Fetches windows on a bounded thread pool and yields (window, properties) in
+    window order. Failed windows are yielded with properties=None.
+    At most 2 * max_workers windows are in flight or waiting to be consumed.
+    """
+    max_workers = max_workers or config.scrape_max_workers
+    rate_limiter = RateLimiter(
+        config.scrape_requests_per_sec if requests_per_sec is None else requests_per_sec
+    )
+    fetch_kwargs = dict(
+        scraper=scraper,
+        rate_limiter=rate_limiter,
+        retries=config.scrape_retries if retries is None else retries,
+        backoff_sec=config.scrape_backoff_sec if backoff_sec is None else backoff_sec,
+    )
 
-        except ValueError as e:
-            print(f"Start:{start_date_str} End:{end_date_str} Error:{str(e)}")
+    windows_iter = iter(windows)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = deque(
+            (window, executor.submit(fetch_window, location, window, **fetch_kwargs))
+            for window in islice(windows_iter, max_workers * 2)
+        )
+        while pending:
+            window, future = pending.popleft()
+            properties = future.result()
+
+            next_window = next(windows_iter, None)
+            if next_window is not None:
+                pending.append(
+                    (
+                        next_window,
+                        executor.submit(
+                            fetch_window, location, next_window, **fetch_kwargs
+                        ),
+                    )
+                )
+            yield window, properties
+
+
+def _get_scrape_state_path(city: str, state: str):
+    return os.path.join(
+        config.cache_dir, "scrape_state", f"{city.lower()}_{state.lower()}.json"
+    )
 
-        start_date = end_date + timedelta(days=1)
-        end_date += increment
 
-    scraped_df = pd.concat(dataframes, ignore_index=True)
+def read_scrape_state(city: str, state: str) -> dict:
+    path = _get_scrape_state_path(city, state)
+    if not os.path.exists(path):
+        return {"failed_windows": [], "completed_through": None}
+    with open(path) as f:
+        return json.load(f)
 
-    scraped_df["style"] = scraped_df["style"].apply(lambda x: x.value if x else None)
-    scraped_df.replace([np.inf, -np.inf, np.nan], None, inplace=True)
-    scraped_df.drop(
+
+def write_scrape_state(city: str, state: str, scrape_state: dict):
+    path = _get_scrape_state_path(city, state)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(scrape_state, f, indent=2, default=str)
+    os.replace(tmp_path, path)
+
+
+def remove_scrape_state(city: str, state: str):
+    path = _get_scrape_state_path(city, state)
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def prepare_historical_window(properties: pd.DataFrame):
+    properties["style"] = properties["style"].apply(lambda x: x.value if x else None)
+    properties.replace([np.inf, -np.inf, np.nan], None, inplace=True)
+    properties.drop(
         ["mls", "mls_id", "primary_photo", "alt_photos"], axis=1, inplace=True
     )
+    return properties
 
-    print(scraped_df.info())
-    write_historical_property_data(engine, scraped_df)
 
-    combined_df = (
-        pd.concat([scraped_df, sql_df], ignore_index=True)
-        if len(sql_df) > 0
-        else scraped_df
+def scrape_historical_sales(
+    engine: Engine, location: str, city: str, state: str, scraper=scrape_property
+):
+    """
+    Streams windows into HistoricalPropertyData as they arrive, so memory stays
+    proportional to one window. Progress is recorded in the scrape state after
+    every window; an interrupted run resumes after the last written window.
+    Returns the inserted/updated row counts.
+    """
+    scrape_state = read_scrape_state(city, state)
+    completed_through = scrape_state.get("completed_through")
+
+    # Windows overlapping rows already stored are upserted, so neither a resume
+    # nor an incremental refresh has to delete anything first. A resume never
+    # starts after the stored data ends, in case rows were deleted since the
+    # interrupted run
+    latest_ts = get_latest_sold_date(engine, city, state)
+    if latest_ts is None:
+        start_date = datetime(year=config.hist_start_year, month=1, day=1)
+    else:
+        start_date = latest_ts
+    if completed_through and latest_ts is not None:
+        resume_date = pd.Timestamp(completed_through).to_pydatetime() + timedelta(
+            days=1
+        )
+        start_date = min(start_date, resume_date)
+        print(f"Resuming {location} from {start_date}")
+
+    # Windows that failed in previous runs are re-fetched first. Each stays in
+    # the saved state until it has been written or has failed again, so a
+    # crash during the retries does not lose the remaining ones
+    retry_windows = [
+        (pd.Timestamp(window_start), pd.Timestamp(window_end))
+        for window_start, window_end in scrape_state["failed_windows"]
+    ]
+    windows = retry_windows + get_scrape_windows(start_date, until=datetime.utcnow())
+    scrape_state["failed_windows"] = list(retry_windows)
+
+    counts = {"inserted": 0, "updated": 0}
+    fetched_windows = fetch_historical_windows(location, windows, scraper)
+    for position, (window, properties) in enumerate(fetched_windows):
+        is_retry = position < len(retry_windows)
+        if properties is None:
+            if not is_retry:
+                scrape_state["failed_windows"].append(window)
+        else:
+            if len(properties) > 0:
+                window_df = prepare_historical_window(properties)
+                window_counts = upsert_historical_property_data(engine, window_df)
+                counts["inserted"] += window_counts["inserted"]
+                counts["updated"] += window_counts["updated"]
+            if is_retry:
+                scrape_state["failed_windows"].remove(window)
+
+        if not is_retry:
+            scrape_state["completed_through"] = window[1]
+        write_scrape_state(city, state, scrape_state)
+
+    scrape_state["completed_through"] = None
+    write_scrape_state(city, state, scrape_state)
+
+    failed_count = len(scrape_state["failed_windows"])
+    print(
+        f"{location}: inserted {counts['inserted']} rows, "
+        f"updated {counts['updated']} rows, {failed_count} windows failed"
     )
-    return combined_df
+    return counts
+
+
+WGS84_A = 6378137.0
+WGS84_F = 1 / 298.257223563
+WGS84_B = (1 - WGS84_F) * WGS84_A
+
+
+def geodesic_distance_km(lat1, lon1, lat2, lon2, max_iter=200, tolerance=1e-12):
+    """
+    Vectorized Vincenty inverse formula on the WGS-84 ellipsoid.
+    Agrees with geopy.distance.geodesic well below the 0.1 km rounding used for features.
+    NaN coordinates propagate to NaN distances.
+    """
+    lat1, lon1, lat2, lon2 = np.broadcast_arrays(
+        *(np.asarray(value, dtype=float) for value in (lat1, lon1, lat2, lon2))
+    )
+
+    L = np.radians(lon2 - lon1)
+    U1 = np.arctan((1 - WGS84_F) * np.tan(np.radians(lat1)))
+    U2 = np.arctan((1 - WGS84_F) * np.tan(np.radians(lat2)))
+    sin_u1, cos_u1 = np.sin(U1), np.cos(U1)
+    sin_u2, cos_u2 = np.sin(U2), np.cos(U2)
+
+    lam = L
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for _ in range(max_iter):
+            sin_lam, cos_lam = np.sin(lam), np.cos(lam)
+            sin_sigma = np.sqrt(
+                (cos_u2 * sin_lam) ** 2
+                + (cos_u1 * sin_u2 - sin_u1 * cos_u2 * cos_lam) ** 2
+            )
+            cos_sigma = sin_u1 * sin_u2 + cos_u1 * cos_u2 * cos_lam
+            sigma = np.arctan2(sin_sigma, cos_sigma)
+            sin_alpha = np.where(
+                sin_sigma == 0, 0.0, cos_u1 * cos_u2 * sin_lam / sin_sigma
+            )
+            cos_sq_alpha = 1 - sin_alpha**2
+            cos_2sigma_m = np.where(
+                cos_sq_alpha == 0, 0.0, cos_sigma - 2 * sin_u1 * sin_u2 / cos_sq_alpha
+            )
+            C = WGS84_F / 16 * cos_sq_alpha * (4 + WGS84_F * (4 - 3 * cos_sq_alpha))
+            lam_prev = lam
+            lam = L + (1 - C) * WGS84_F * sin_alpha * (
+                sigma
+                + C
+                * sin_sigma
+                * (cos_2sigma_m + C * cos_sigma * (-1 + 2 * cos_2sigma_m**2))
+            )
+            if np.nanmax(np.abs(lam - lam_prev), initial=0.0) <= tolerance:
+                break
+
+    u_sq = cos_sq_alpha * (WGS84_A**2 - WGS84_B**2) / WGS84_B**2
+    A = 1 + u_sq / 16384 * (4096 + u_sq * (-768 + u_sq * (320 - 175 * u_sq)))
+    B = u_sq / 1024 * (256 + u_sq * (-128 + u_sq * (74 - 47 * u_sq)))
+    delta_sigma = (
+        B
+        * sin_sigma
+        * (
+            cos_2sigma_m
+            + B
+            / 4
+            * (
+                cos_sigma * (-1 + 2 * cos_2sigma_m**2)
+                - B
+                / 6
+                * cos_2sigma_m
+                * (-3 + 4 * sin_sigma**2)
+                * (-3 + 4 * cos_2sigma_m**2)
+            )
+        )
+    )
+    return WGS84_B * A * (sigma - delta_sigma) / 1000
 
 
 class PropertyDatasetProcessor:
-    def __init__(self, df, city, is_training=True, planned_mortgage_rate=None):
+    def __init__(
+        self,
+        df,
+        city,
+        is_training=True,
+        planned_mortgage_rate=None,
+        vectorized=True,
+        state=None,
+    ):
+        """
+        vectorized=False keeps the original row-wise feature engineering (parity checks).
+        """
         self.dataset = df
         self.city = city
         self.is_training = is_training
         self.planned_mortgage_rate = planned_mortgage_rate
+        self.vectorized = vectorized
 
-        geolocator = Nominatim(user_agent="RealEstateAdvisor")
-        location = geolocator.geocode(f"Downtown {city}")
-        self.downtown_lat, self.downtown_lon = location.latitude, location.longitude
+        self.downtown_lat, self.downtown_lon = get_downtown_coordinates(city, state)
 
     @staticmethod
     def calc_baths_num(full_baths, half_baths):
@@ -120,21 +367,19 @@ class PropertyDatasetProcessor:
     def calc_lat_lon_dist(lat1, lon1, lat2, lon2):
         if pd.isna(lat1) or pd.isna(lon1) or pd.isna(lat2) or pd.isna(lon2):
             return None
+        import geopy.distance
+
         return round(geopy.distance.geodesic((lat1, lon1), (lat2, lon2)).km, 1)
 
     @staticmethod
-    def fetch_mortgage_rates(series_id="MORTGAGE30US"):
-        url = f"https://api.stlouisfed.org/fred/series/observations"
-        params = {
-            "api_key": config.fred_api_key,
-            "file_type": "json",
-            "series_id": series_id,
-        }
-        response = requests.get(url, params=params)
-        data = response.json()
-        df = pd.DataFrame(data["observations"])
-        df["date"] = pd.to_datetime(df["date"])
-        return df[["date", "value"]]
+    def calc_baths_num_vectorized(full_baths, half_baths):
+        full_baths = pd.to_numeric(full_baths).fillna(0.0)
+        half_baths = pd.to_numeric(half_baths).fillna(0.0)
+        return full_baths + 0.5 * half_baths
+
+    @staticmethod
+    def calc_lat_lon_dist_vectorized(lat1, lon1, lat2, lon2):
+        return np.round(geodesic_distance_km(lat1, lon1, lat2, lon2), 1)
 
     @staticmethod
     def filter_iqr(df, column):
@@ -147,19 +392,27 @@ class PropertyDatasetProcessor:
         final_df: pd.DataFrame = self.dataset[(self.dataset.city == self.city)].copy()
 
         # Handling NULL values
-        final_df["baths"] = final_df.apply(
-            lambda row: self.calc_baths_num(row["full_baths"], row["half_baths"]),
-            axis=1,
-        )
-        final_df["lot_sqft"] = final_df.apply(
-            lambda row: 0.0 if pd.isna(row["lot_sqft"]) else row["lot_sqft"], axis=1
-        )
-        final_df["parking_garage"] = final_df.apply(
-            lambda row: (
-                0.0 if pd.isna(row["parking_garage"]) else row["parking_garage"]
-            ),
-            axis=1,
-        )
+        if self.vectorized:
+            final_df["baths"] = self.calc_baths_num_vectorized(
+                final_df["full_baths"], final_df["half_baths"]
+            )
+            for col in ("lot_sqft", "parking_garage"):
+                final_df[col] = pd.to_numeric(final_df[col]).fillna(0.0)
+        else:
+            final_df["baths"] = final_df.apply(
+                lambda row: self.calc_baths_num(row["full_baths"], row["half_baths"]),
+                axis=1,
+            )
+            final_df["lot_sqft"] = final_df.apply(
+                lambda row: 0.0 if pd.isna(row["lot_sqft"]) else row["lot_sqft"],
+                axis=1,
+            )
+            final_df["parking_garage"] = final_df.apply(
+                lambda row: (
+                    0.0 if pd.isna(row["parking_garage"]) else row["parking_garage"]
+                ),
+                axis=1,
+            )
 
         final_df.dropna(
             subset=[
@@ -184,50 +437,54 @@ class PropertyDatasetProcessor:
         final_df["last_sold_date"] = pd.to_datetime(final_df["last_sold_date"])
         final_df["sold_year"] = final_df["last_sold_date"].dt.year
 
-        mortgage_rates = self.fetch_mortgage_rates()
-
         if self.is_training:
-            mortgage_rates = mortgage_rates.sort_values(by="date")
-            final_df = final_df.sort_values(by="last_sold_date")
-
-            final_df = pd.merge_asof(
-                final_df,
-                mortgage_rates,
-                left_on="last_sold_date",
-                right_on="date",
-                direction="backward",
+            final_df = final_df.sort_values(by="last_sold_date").reset_index(drop=True)
+            final_df["mortgage_rate"] = mortgage_rate_store.rates_at(
+                final_df["last_sold_date"].to_numpy()
             )
-            final_df.rename(columns={"value": "mortgage_rate"}, inplace=True)
-            final_df.drop(["date"], axis=1, inplace=True)
         else:
             if self.planned_mortgage_rate:
                 final_df["mortgage_rate"] = self.planned_mortgage_rate
             else:
-                latest_mortgage_date = mortgage_rates[
-                    mortgage_rates["date"] == mortgage_rates["date"].max()
-                ]
-                latest_mortgage_rate = latest_mortgage_date["value"].iloc[0]
-                final_df["mortgage_rate"] = latest_mortgage_rate
+                final_df["mortgage_rate"] = mortgage_rate_store.latest_rate()
 
         # Adding age
-        final_df["age"] = final_df.apply(
-            lambda row: row["sold_year"] - row["year_built"], axis=1
-        )
+        if self.vectorized:
+            final_df["age"] = final_df["sold_year"] - pd.to_numeric(
+                final_df["year_built"]
+            )
+        else:
+            final_df["age"] = final_df.apply(
+                lambda row: row["sold_year"] - row["year_built"], axis=1
+            )
         final_df = final_df[final_df.age >= 0]
 
         # Adding distance to downtown
-        final_df["distance_to_downtown"] = final_df.apply(
-            lambda row: self.calc_lat_lon_dist(
-                row["latitude"], row["longitude"], self.downtown_lat, self.downtown_lon
-            ),
-            axis=1,
-        )
+        if self.vectorized:
+            final_df["distance_to_downtown"] = self.calc_lat_lon_dist_vectorized(
+                pd.to_numeric(final_df["latitude"]).to_numpy(dtype=float),
+                pd.to_numeric(final_df["longitude"]).to_numpy(dtype=float),
+                self.downtown_lat,
+                self.downtown_lon,
+            )
+        else:
+            final_df["distance_to_downtown"] = final_df.apply(
+                lambda row: self.calc_lat_lon_dist(
+                    row["latitude"],
+                    row["longitude"],
+                    self.downtown_lat,
+                    self.downtown_lon,
+                ),
+                axis=1,
+            )
 
         # Filtering out outliers
         for col in ("sqft", "year_built", "distance_to_downtown"):
             final_df = self.filter_iqr(final_df, col)
 
         if self.is_training:
+            from sklearn.cluster import DBSCAN
+
             dbscan = DBSCAN(eps=0.5, min_samples=10)
             final_df["cluster_label"] = dbscan.fit_predict(final_df[["sold_price"]])
             final_df = final_df[final_df["cluster_label"] != -1]
@@ -236,41 +493,48 @@ class PropertyDatasetProcessor:
         return final_df
 
 
-def train_model(dataset: pd.DataFrame):
-    cols_to_drop = [
-        "sold_price",
-        "property_url",
-        "status",
-        "style",
-        "street",
-        "unit",
-        "city",
-        "state",
-        "full_baths",
-        "half_baths",
-        "days_on_mls",
-        "list_price",
-        "list_date",
-        "last_sold_date",
-        "price_per_sqft",
-        "latitude",
-        "longitude",
-        "stories",
-        "hoa_fee",
-    ]
-
-    X = dataset.drop(cols_to_drop, axis=1)
+TRAINING_DROP_COLUMNS = [
+    "sold_price",
+    "property_url",
+    "status",
+    "style",
+    "street",
+    "unit",
+    "city",
+    "state",
+    "full_baths",
+    "half_baths",
+    "days_on_mls",
+    "list_price",
+    "list_date",
+    "last_sold_date",
+    "price_per_sqft",
+    "latitude",
+    "longitude",
+    "stories",
+    "hoa_fee",
+]
+
+
+def get_training_data(dataset: pd.DataFrame):
+    from sklearn.model_selection import train_test_split
+
+    X = dataset.drop(TRAINING_DROP_COLUMNS, axis=1)
     y = dataset["sold_price"]
 
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42
-    )
+    return train_test_split(X, y, test_size=0.2, random_state=42)
 
-    rf_model = RandomForestRegressor(n_estimators=50, random_state=42)
-    rf_model.fit(X_train, y_train)
+
+def evaluate_model(model, X_test, y_test) -> float:
+    from sklearn.metrics import (
+        explained_variance_score,
+        mean_absolute_error,
+        mean_squared_error,
+        r2_score,
+    )
 
     # Predictions on the test set
-    y_pred = rf_model.predict(X_test)
+    y_pred = model.predict(X_test)
 
     # Calculate metrics
     r2 = r2_score(y_test, y_pred)
@@ -285,43 +549,122 @@ def train_model(dataset: pd.DataFrame):
     print(f"Root Mean Squared Error: {rmse:.2f}")
     print(f"Explained Variance Score: {expl_rf:.2f}")
 
-    return rf_model, round(r2 * 100, 2)
+    return round(r2 * 100, 2)
 
 
-def get_chunk_blocks(data, blob_client, chunk_size=4 * 1024 * 1024):
-    block_list = []
+def train_model(dataset: pd.DataFrame):
+    from sklearn.ensemble import RandomForestRegressor
 
-    index = 0
-    while index < len(data):
-        chunk_data = data[index : index + chunk_size]
+    X_train, X_test, y_train, y_test = get_training_data(dataset)
 
-        if not chunk_data:
-            break
-        blk_id = str(uuid.uuid4())
-        blob_client.stage_block(block_id=blk_id, data=chunk_data)
-        block_list.append(BlobBlock(block_id=blk_id))
+    rf_model = RandomForestRegressor(n_estimators=50, random_state=42)
+    rf_model.fit(X_train, y_train)
 
-        index += chunk_size
+    return rf_model, evaluate_model(rf_model, X_test, y_test)
+
+
+def train_model_incremental(model, dataset: pd.DataFrame, since: str):
+    """
+    Grows config.training_incremental_trees new trees (warm start) on the rows
+    sold after `since`; the existing trees are kept as they are. The score is
+    measured on a holdout of those recent rows only.
+    Returns None when a full rebuild is needed instead: the tree cap would be
+    exceeded, the feature columns changed or there are too few recent rows.
+    """
+    recent = dataset[pd.to_datetime(dataset["last_sold_date"]) > pd.Timestamp(since)]
+    n_estimators = model.n_estimators + config.training_incremental_trees
+    if n_estimators > config.training_max_trees or len(recent) < 10:
+        return None
+
+    X_train, X_test, y_train, y_test = get_training_data(recent)
+    if list(X_train.columns) != list(getattr(model, "feature_names_in_", [])):
+        return None
+
+    model.set_params(warm_start=True, n_estimators=n_estimators)
+    model.fit(X_train, y_train)
+    model.set_params(warm_start=False)
+
+    return model, evaluate_model(model, X_test, y_test)
+
+
+def get_training_plan(
+    stored_fingerprint: Optional[dict], fingerprint: dict, force_full: bool = False
+) -> str:
+    """
+    "skip" when the cleaned dataset did not change materially since the stored
+    model was trained, "incremental" when TRAINING_MODE=incremental and only
+    newer sales were added, otherwise "full".
+    """
+    if force_full or not stored_fingerprint:
+        return "full"
+    if stored_fingerprint["content_hash"] == fingerprint["content_hash"]:
+        return "skip"
+
+    stored_rows = stored_fingerprint["row_count"]
+    change_ratio = abs(fingerprint["row_count"] - stored_rows) / max(stored_rows, 1)
+    if change_ratio < config.retrain_min_change_ratio:
+        return "skip"
+
+    stored_max_sold_date = stored_fingerprint["max_sold_date"]
+    if (
+        config.training_mode == "incremental"
+        and stored_max_sold_date
+        and fingerprint["max_sold_date"]
+        and pd.Timestamp(fingerprint["max_sold_date"])
+        > pd.Timestamp(stored_max_sold_date)
+    ):
+        return "incremental"
+    return "full"
+
+
+def get_chunk_blocks(
+    data, blob_client, chunk_size=4 * 1024 * 1024, max_concurrency=1
+):
+    """
+    Stages blocks on up to max_concurrency threads; the returned block list
+    keeps the original order.
+    """
+    from azure.storage.blob import BlobBlock
+
+    data = memoryview(data)
+    chunks = [
+        (str(uuid.uuid4()), data[index : index + chunk_size])
+        for index in range(0, len(data), chunk_size)
+    ]
 
-    return block_list
+    def stage_block(chunk):
+        blk_id, chunk_data = chunk
+        blob_client.stage_block(block_id=blk_id, data=chunk_data.tobytes())
+        return BlobBlock(block_id=blk_id)
+
+    with ThreadPoolExecutor(max_workers=max(max_concurrency, 1)) as executor:
+        return list(executor.map(stage_block, chunks))
 
 
 def write_model_to_storage(
-    engine: Engine, model, city: str, state: str, model_score: float
+    engine: Engine,
+    model,
+    city: str,
+    state: str,
+    model_score: float,
+    fingerprint: Optional[dict] = None,
 ):
-    serialized_model = pickle.dumps(model)
-
-    blob_service_client = BlobServiceClient.from_connection_string(
-        config.az_storage_conn_str
-    )
-    blob_name = f"{city.lower()}_{state.lower()}.pkl"
-    blob_client = blob_service_client.get_blob_client(
-        container=config.az_storage_container_name, blob=blob_name
+    serialized_model = dump_model_artifact(
+        model, fingerprint=fingerprint, compress=config.model_artifact_compress
     )
 
+    blob_name = get_model_blob_name(city, state)
+    blob_client = get_model_blob_client(blob_name)
+
     block_list = get_chunk_blocks(
-        serialized_model, blob_client, chunk_size=4 * 1024 * 1024
+        serialized_model,
+        blob_client,
+        chunk_size=4 * 1024 * 1024,
+        max_concurrency=config.blob_max_concurrency,
+    )
+    blob_client.commit_block_list(
+        block_list, metadata=artifact_blob_metadata(fingerprint)
     )
-    blob_client.commit_block_list(block_list)
+    model_cache.invalidate(blob_name)
     add_model_score(engine=engine, model_name=blob_name, score=model_score)
     print(f"{blob_name} uploaded successfully.")
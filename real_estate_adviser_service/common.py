@@ -1,6 +1,6 @@
 from fastapi import HTTPException
 import re
-from locations.service import get_location_names
+from locations.service import get_location_names, is_location_added
 import os
 
 
@@ -23,8 +23,8 @@ def format_location(location: str):
 
 
 def validate_is_location_added(location: str):
-    available_locations = get_location_names()
-    if location not in available_locations:
+    if not is_location_added(location):
+        available_locations = get_location_names()
         avail_locs_str = (
             ", ".join(available_locations) if available_locations else "None"
         )
@@ -12,14 +12,103 @@ class Config:
         self.hist_start_year = int(os.getenv("HISTORICAL_START_YEAR"))
         self.hist_batch_incr_days = int(os.getenv("HISTORICAL_BATCH_INCREMENT_DAYS"))
         self.active_listing_days = int(os.getenv("LOAD_ACTIVE_LISTINGS_DAYS"))
+        self.listings_cache_size = int(os.getenv("LISTINGS_CACHE_SIZE", 10))
+        self.listings_cache_ttl_sec = float(
+            os.getenv("LISTINGS_CACHE_TTL_SEC", 60 * 180)
+        )
+        self.listings_cache_stale_ttl_sec = float(
+            os.getenv("LISTINGS_CACHE_STALE_TTL_SEC", 60 * 60 * 24)
+        )
+        self.listings_refresh_workers = int(os.getenv("LISTINGS_REFRESH_WORKERS", 2))
+        self.listings_prediction_cache_size = int(
+            os.getenv("LISTINGS_PREDICTION_CACHE_SIZE", 32)
+        )
+        self.listings_batch_workers = int(os.getenv("LISTINGS_BATCH_WORKERS", 4))
+        self.listings_batch_max_locations = int(
+            os.getenv("LISTINGS_BATCH_MAX_LOCATIONS", 20)
+        )
+
+        self.scrape_max_workers = int(os.getenv("SCRAPE_MAX_WORKERS", 4))
+        self.scrape_requests_per_sec = float(os.getenv("SCRAPE_REQUESTS_PER_SEC", 2))
+        self.scrape_retries = int(os.getenv("SCRAPE_RETRIES", 3))
+        self.scrape_backoff_sec = float(os.getenv("SCRAPE_BACKOFF_SEC", 2))
+
+        self.jobs_max_workers = int(os.getenv("JOBS_MAX_WORKERS", 2))
+        self.jobs_history_size = int(os.getenv("JOBS_HISTORY_SIZE", 100))
+        self.training_max_processes = int(os.getenv("TRAINING_MAX_PROCESSES", 1))
+        self.training_mode = os.getenv("TRAINING_MODE", "full").lower()
+        self.retrain_min_change_ratio = float(
+            os.getenv("RETRAIN_MIN_CHANGE_RATIO", 0.01)
+        )
+        self.training_incremental_trees = int(
+            os.getenv("TRAINING_INCREMENTAL_TREES", 10)
+        )
+        self.training_max_trees = int(os.getenv("TRAINING_MAX_TREES", 150))
 
         self.db_host = os.getenv("DB_HOST")
         self.db_name = os.getenv("DB_NAME")
         self.db_port = os.getenv("DB_PORT")
         self.db_username = os.getenv("DB_USERNAME")
         self.db_password = os.getenv("DB_PASSWORD")
+        self.db_echo = os.getenv("DB_ECHO", "false").lower() == "true"
+        self.db_pool_size = int(os.getenv("DB_POOL_SIZE", 5))
+        self.db_max_overflow = int(os.getenv("DB_MAX_OVERFLOW", 10))
+        self.db_pool_timeout_sec = float(os.getenv("DB_POOL_TIMEOUT_SEC", 30))
+        self.db_pool_recycle_sec = int(os.getenv("DB_POOL_RECYCLE_SEC", 1800))
+        self.db_pool_pre_ping = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+        self.ingest_batch_size = int(os.getenv("INGEST_BATCH_SIZE", 5000))
+        self.db_migrate_on_startup = (
+            os.getenv("DB_MIGRATE_ON_STARTUP", "true").lower() == "true"
+        )
 
         self.fred_api_key = os.getenv("FRED_API_KEY")
 
+        self.cache_dir = os.getenv("CACHE_DIR", ".cache")
+        self.geocode_cache_path = os.getenv(
+            "GEOCODE_CACHE_PATH", os.path.join(self.cache_dir, "geocode.json")
+        )
+        self.geocode_seed_path = os.getenv("GEOCODE_SEED_PATH")
+
+        self.fred_fixture_path = os.getenv("FRED_FIXTURE_PATH")
+        self.mortgage_rates_store_path = os.getenv(
+            "MORTGAGE_RATES_STORE_PATH",
+            os.path.join(self.cache_dir, "mortgage_rates.npz"),
+        )
+        self.mortgage_rates_refresh_hours = float(
+            os.getenv("MORTGAGE_RATES_REFRESH_HOURS", 12)
+        )
+        # Seconds before a failed refresh is attempted again while stored rates exist
+        self.mortgage_rates_retry_sec = float(
+            os.getenv("MORTGAGE_RATES_RETRY_SEC", 300)
+        )
+
+        self.model_cache_max_mb = int(os.getenv("MODEL_CACHE_MAX_MB", 1024))
+        self.model_cache_revalidate_sec = float(
+            os.getenv("MODEL_CACHE_REVALIDATE_SEC", 60)
+        )
+        # Empty string disables the disk tier
+        self.model_cache_dir = os.getenv(
+            "MODEL_CACHE_DIR", os.path.join(self.cache_dir, "models")
+        )
+        # Compressed artifacts are smaller but cannot be memory-mapped
+        self.model_artifact_compress = int(os.getenv("MODEL_ARTIFACT_COMPRESS", 0))
+        self.blob_max_concurrency = int(os.getenv("BLOB_MAX_CONCURRENCY", 4))
+
+        self.locations_refresh_sec = float(os.getenv("LOCATIONS_REFRESH_SEC", 300))
+        self.warmup_imports = os.getenv("WARMUP_IMPORTS", "true").lower() == "true"
+
+        self.trend_sqft_bucket_size = int(os.getenv("TREND_SQFT_BUCKET_SIZE", 250))
+        self.trend_cache_max_mb = int(os.getenv("TREND_CACHE_MAX_MB", 32))
+        # Seconds before a failed rollup create/backfill is attempted again
+        self.trend_rollup_retry_sec = float(os.getenv("TREND_ROLLUP_RETRY_SEC", 300))
+
+        self.http_compress_min_bytes = int(os.getenv("HTTP_COMPRESS_MIN_BYTES", 1024))
+        self.http_gzip_level = int(os.getenv("HTTP_GZIP_LEVEL", 6))
+        # Only used when the optional brotli package is installed
+        self.http_brotli_quality = int(os.getenv("HTTP_BROTLI_QUALITY", 5))
+        self.http_compressed_cache_max_mb = int(
+            os.getenv("HTTP_COMPRESSED_CACHE_MAX_MB", 64)
+        )
+
 
 config = Config()
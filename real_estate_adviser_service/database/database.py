@@ -1,12 +1,60 @@
+import threading
+import time
 from typing import Annotated
 from fastapi import Depends
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.engine import URL, Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
 
 from config import config
 
 
-def get_engine():
+class PoolMetrics:
+    def __init__(self):
+        self.checkouts = 0
+        self.connects = 0
+        self.timeouts = 0
+        self.wait_total_sec = 0.0
+        self.wait_max_sec = 0.0
+        self._lock = threading.Lock()
+
+    def increment(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def record_wait(self, wait_sec: float, timed_out: bool = False):
+        with self._lock:
+            self.wait_total_sec += wait_sec
+            self.wait_max_sec = max(self.wait_max_sec, wait_sec)
+            if timed_out:
+                self.timeouts += 1
+
+
+pool_metrics = PoolMetrics()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that records how long callers wait for a connection.
+    """
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            pool_metrics.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        pool_metrics.record_wait(time.perf_counter() - start)
+        return connection
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def create_db_engine() -> Engine:
     connection_url = URL.create(
         "mssql+pyodbc",
         username=config.db_username,
@@ -19,10 +67,68 @@ def get_engine():
 
     engine = create_engine(
         connection_url,
-        echo=True,  # debug information
+        echo=config.db_echo,
         fast_executemany=True,
+        poolclass=InstrumentedQueuePool,
+        pool_size=config.db_pool_size,
+        max_overflow=config.db_max_overflow,
+        pool_timeout=config.db_pool_timeout_sec,
+        pool_recycle=config.db_pool_recycle_sec,
+        pool_pre_ping=config.db_pool_pre_ping,
     )
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        pool_metrics.increment("connects")
+
+    @event.listens_for(engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        pool_metrics.increment("checkouts")
+
     return engine
 
 
+def init_engine() -> Engine:
+    """
+    One engine (and connection pool) for the application lifetime, shared by
+    routes and background jobs.
+    """
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = create_db_engine()
+        return _engine
+
+
+def dispose_engine():
+    global _engine
+    with _engine_lock:
+        if _engine is not None:
+            _engine.dispose()
+            _engine = None
+
+
+def get_engine():
+    return _engine or init_engine()
+
+
+def get_pool_stats() -> dict:
+    engine = _engine
+    stats = {
+        "checkouts": pool_metrics.checkouts,
+        "connects": pool_metrics.connects,
+        "timeouts": pool_metrics.timeouts,
+        "wait_total_sec": round(pool_metrics.wait_total_sec, 4),
+        "wait_max_sec": round(pool_metrics.wait_max_sec, 4),
+    }
+    if engine is not None:
+        stats.update(
+            pool_size=engine.pool.size(),
+            checked_in=engine.pool.checkedin(),
+            checked_out=engine.pool.checkedout(),
+            overflow=engine.pool.overflow(),
+        )
+    return stats
+
+
 DbEngine = Annotated[Engine, Depends(get_engine)]
@@ -0,0 +1,35 @@
+import threading
+from collections import defaultdict
+from typing import Callable, List
+
+
+class DataGenerations:
+    """
+    Per-city counters bumped whenever HistoricalPropertyData changes for that
+    city. Caches put the generation into their keys (or subscribe to bumps)
+    so only the affected city's entries go stale.
+    """
+
+    def __init__(self):
+        self._generations = defaultdict(int)
+        self._subscribers: List[Callable[[str], None]] = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(city: str) -> str:
+        return city.strip().lower()
+
+    def get(self, city: str) -> int:
+        return self._generations[self._key(city)]
+
+    def bump(self, city: str):
+        with self._lock:
+            self._generations[self._key(city)] += 1
+        for callback in self._subscribers:
+            callback(self._key(city))
+
+    def subscribe(self, callback: Callable[[str], None]):
+        self._subscribers.append(callback)
+
+
+data_generations = DataGenerations()
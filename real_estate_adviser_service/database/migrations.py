@@ -0,0 +1,350 @@
+"""
+Versioned schema for the service's tables.
+
+Every migration is idempotent (tables and indexes are created with
+checkfirst), so it is safe against databases created before this module
+existed. Applied versions are recorded in SchemaVersion.
+
+CLI: python -m database.migrations [--url sqlite:///local.db] [--sql]
+"""
+
+import argparse
+import weakref
+from datetime import datetime
+
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Engine,
+    Float,
+    Index,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    Unicode,
+    create_engine,
+    func,
+    inspect,
+    select,
+)
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+metadata = MetaData()
+
+
+def property_data_columns():
+    return [
+        Column("property_url", Unicode(400)),
+        Column("status", Unicode(20)),
+        Column("style", Unicode(50)),
+        Column("street", Unicode(200)),
+        Column("unit", Unicode(50)),
+        Column("city", Unicode(100)),
+        Column("state", Unicode(10)),
+        Column("zip_code", Unicode(10)),
+        Column("beds", Float),
+        Column("full_baths", Float),
+        Column("half_baths", Float),
+        Column("sqft", Float),
+        Column("year_built", Float),
+        Column("days_on_mls", Float),
+        Column("list_price", Float),
+        Column("list_date", DateTime),
+        Column("sold_price", Float),
+        Column("last_sold_date", DateTime),
+        Column("lot_sqft", Float),
+        Column("price_per_sqft", Float),
+        Column("latitude", Float),
+        Column("longitude", Float),
+        Column("stories", Float),
+        Column("hoa_fee", Float),
+        Column("parking_garage", Float),
+    ]
+
+
+historical_property_data_table = Table(
+    "HistoricalPropertyData", metadata, *property_data_columns()
+)
+
+# Ingest batches are loaded here and merged into HistoricalPropertyData;
+# batch_id keeps concurrent ingests apart
+historical_property_data_staging_table = Table(
+    "HistoricalPropertyDataStaging",
+    metadata,
+    Column("batch_id", Unicode(36), nullable=False, index=True),
+    *property_data_columns(),
+)
+
+model_scores_table = Table(
+    "ModelScores",
+    metadata,
+    Column("model_name", Unicode(200), primary_key=True),
+    Column("score", Float),
+    Column("timestamp", DateTime),
+)
+
+# Sum/count of HistoricalPropertyData per city, state, year and every column the
+# trend chart filters on. sqft is kept as FLOOR(sqft / bucket size) buckets.
+# price_sum is SUM(sold_price / 1000.0) so SUM(price_sum) / SUM(price_count)
+# equals the AVG(sold_price / 1000.0) of the raw query. It is FLOAT like
+# sold_price so both are computed in the same floating point arithmetic.
+trend_chart_rollup_table = Table(
+    "TrendChartRollup",
+    metadata,
+    Column("city", Unicode(100)),
+    Column("state", Unicode(10)),
+    Column("year", Integer),
+    Column("style", Unicode(50)),
+    Column("beds", Float),
+    Column("full_baths", Float),
+    Column("stories", Float),
+    Column("year_built", Float),
+    Column("sqft_bucket", Integer),
+    Column("price_sum", Float),
+    Column("price_count", Integer, nullable=False),
+    Column("properties_sold", Integer, nullable=False),
+)
+
+schema_version_table = Table(
+    "SchemaVersion",
+    metadata,
+    Column("version", Integer, primary_key=True, autoincrement=False),
+    Column("description", Unicode(200)),
+    Column("applied_at", DateTime),
+)
+
+# Incremental scrape, delete and read_historical_property_data
+location_sold_date_index = Index(
+    "IX_HistoricalPropertyData_state_city_last_sold_date",
+    historical_property_data_table.c.state,
+    historical_property_data_table.c.city,
+    historical_property_data_table.c.last_sold_date,
+)
+
+# Raw trend chart query: seek on city, aggregate by YEAR(last_sold_date)
+# without key lookups for the filtered and aggregated columns
+trend_chart_index = Index(
+    "IX_HistoricalPropertyData_city_last_sold_date",
+    historical_property_data_table.c.city,
+    historical_property_data_table.c.last_sold_date,
+    mssql_include=[
+        "sold_price",
+        "style",
+        "beds",
+        "full_baths",
+        "sqft",
+        "stories",
+        "year_built",
+    ],
+)
+
+# SELECT DISTINCT [style] ... WHERE city = ?
+styles_index = Index(
+    "IX_HistoricalPropertyData_city_style",
+    historical_property_data_table.c.city,
+    historical_property_data_table.c.style,
+)
+
+# Natural key the ingest MERGE matches on. Not unique: rows written before
+# the upsert path existed may contain duplicates
+natural_key_index = Index(
+    "IX_HistoricalPropertyData_property_url_last_sold_date",
+    historical_property_data_table.c.property_url,
+    historical_property_data_table.c.last_sold_date,
+)
+
+trend_chart_rollup_index = Index(
+    "IX_TrendChartRollup_city_year",
+    trend_chart_rollup_table.c.city,
+    trend_chart_rollup_table.c.year,
+    mssql_clustered=True,
+)
+
+
+def create_tables(connection, *tables):
+    for table in tables:
+        table.create(connection, checkfirst=True)
+
+
+def create_indexes(connection, *indexes):
+    for index in indexes:
+        index.create(connection, checkfirst=True)
+
+
+def bound_text_columns(connection, table):
+    """
+    Tables first written by DataFrame.to_sql have NVARCHAR(max) text columns,
+    which SQL Server cannot use as index keys. Alters every unbounded text
+    column to the declared Unicode(n) type; fails if existing values are longer.
+    """
+    if connection.dialect.name != "mssql":
+        return
+
+    existing = {
+        column["name"]: column["type"]
+        for column in inspect(connection).get_columns(table.name)
+    }
+    for column in table.columns:
+        current = existing.get(column.name)
+        if (
+            not isinstance(column.type, Unicode)
+            or not isinstance(current, String)
+            or current.length is not None
+        ):
+            continue
+        column_type = column.type.compile(dialect=connection.dialect)
+        connection.exec_driver_sql(
+            f"ALTER TABLE [{table.name}] ALTER COLUMN [{column.name}] "
+            f"{column_type} NULL"
+        )
+        print(f"Altered {table.name}.{column.name} to {column_type}")
+
+
+def float_rollup_price_sum(connection):
+    """
+    price_sum was NUMERIC(38, 6). Rows are deleted so the next
+    ensure_trend_rollup backfills them from HistoricalPropertyData.
+    """
+    if connection.dialect.name == "mssql":
+        connection.exec_driver_sql(
+            "ALTER TABLE [TrendChartRollup] ALTER COLUMN [price_sum] FLOAT NULL"
+        )
+    connection.execute(trend_chart_rollup_table.delete())
+
+
+MIGRATIONS = [
+    (
+        1,
+        "Create HistoricalPropertyData and ModelScores",
+        lambda connection: create_tables(
+            connection, historical_property_data_table, model_scores_table
+        ),
+    ),
+    (
+        2,
+        "Index HistoricalPropertyData for location and trend chart reads",
+        lambda connection: (
+            bound_text_columns(connection, historical_property_data_table),
+            create_indexes(
+                connection, location_sold_date_index, trend_chart_index, styles_index
+            ),
+        ),
+    ),
+    (
+        3,
+        "Create TrendChartRollup",
+        lambda connection: (
+            create_tables(connection, trend_chart_rollup_table),
+            create_indexes(connection, trend_chart_rollup_index),
+        ),
+    ),
+    (
+        4,
+        "Create HistoricalPropertyDataStaging and the natural key index",
+        lambda connection: (
+            create_tables(connection, historical_property_data_staging_table),
+            create_indexes(connection, natural_key_index),
+        ),
+    ),
+    (5, "Store TrendChartRollup.price_sum as FLOAT", float_rollup_price_sum),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(engine: Engine) -> int:
+    with engine.begin() as connection:
+        schema_version_table.create(connection, checkfirst=True)
+        version = connection.execute(
+            select(func.max(schema_version_table.c.version))
+        ).scalar()
+    return version or 0
+
+
+def run_migrations(engine: Engine) -> int:
+    """
+    Applies pending migrations, each in its own transaction.
+    Returns the schema version the database is at afterwards.
+    """
+    current_version = get_schema_version(engine)
+
+    for version, description, migrate in MIGRATIONS:
+        if version <= current_version:
+            continue
+        with engine.begin() as connection:
+            migrate(connection)
+            connection.execute(
+                schema_version_table.insert().values(
+                    version=version,
+                    description=description,
+                    applied_at=datetime.utcnow(),
+                )
+            )
+        print(f"Applied schema migration {version}: {description}")
+        current_version = version
+
+    return current_version
+
+
+_latest_schema_engines = weakref.WeakSet()
+
+
+def require_latest_schema(engine: Engine):
+    """
+    Raises when the database is below LATEST_VERSION, e.g. after a failed
+    migration. Only checked once per engine once the schema is current.
+    """
+    if engine in _latest_schema_engines:
+        return
+
+    version = get_schema_version(engine)
+    if version < LATEST_VERSION:
+        raise RuntimeError(
+            f"Database schema is at version {version}, version {LATEST_VERSION} "
+            "is required. Apply it with python -m database.migrations"
+        )
+    _latest_schema_engines.add(engine)
+
+
+def get_schema_sql(engine: Engine) -> str:
+    statements = [
+        str(CreateTable(table).compile(engine)).strip()
+        for table in metadata.sorted_tables
+    ]
+    for table in metadata.sorted_tables:
+        statements += [
+            str(CreateIndex(index).compile(engine)).strip() for index in table.indexes
+        ]
+    return ";\n\n".join(statements) + ";"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply database schema migrations")
+    parser.add_argument(
+        "--url", help="SQLAlchemy URL; defaults to the configured database"
+    )
+    parser.add_argument(
+        "--sql", action="store_true", help="Print the schema DDL instead of applying"
+    )
+    args = parser.parse_args()
+
+    if args.url:
+        engine = create_engine(args.url)
+    else:
+        from database.database import create_db_engine
+
+        engine = create_db_engine()
+
+    try:
+        if args.sql:
+            print(get_schema_sql(engine))
+        else:
+            version = run_migrations(engine)
+            print(f"Schema is at version {version} (latest {LATEST_VERSION})")
+    finally:
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
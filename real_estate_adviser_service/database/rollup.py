@@ -0,0 +1,207 @@
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+
+import pandas as pd
+from sqlalchemy import Connection, Engine, select, text
+
+from config import config
+from database.migrations import (
+    create_indexes,
+    create_tables,
+    trend_chart_rollup_index,
+    trend_chart_rollup_table,
+)
+
+# Table definition: database.migrations.trend_chart_rollup_table
+ROLLUP_INSERT_QUERY = """
+INSERT INTO [dbo].[TrendChartRollup] (
+    city, state, [year], [style], beds, full_baths, stories, year_built,
+    sqft_bucket, price_sum, price_count, properties_sold
+)
+SELECT
+    city,
+    state,
+    YEAR(last_sold_date),
+    [style],
+    beds,
+    full_baths,
+    stories,
+    year_built,
+    CAST(FLOOR(sqft / {bucket_size}.0) AS INT),
+    SUM(sold_price / 1000.0),
+    COUNT(sold_price),
+    COUNT(*)
+FROM [dbo].[HistoricalPropertyData]
+WHERE 1 = 1 {filters}
+GROUP BY
+    city, state, YEAR(last_sold_date), [style], beds, full_baths, stories,
+    year_built, CAST(FLOOR(sqft / {bucket_size}.0) AS INT)
+"""
+
+
+def refresh_trend_rollup(
+    connection: Connection,
+    city: Optional[str] = None,
+    state: Optional[str] = None,
+    start_year: Optional[int] = None,
+):
+    """
+    Recomputes the rollup rows of one city/state (all cities when city is None)
+    from start_year onwards. Runs inside the caller's transaction.
+    """
+    delete_filters, insert_filters, params = "", "", {}
+    if city is not None:
+        delete_filters += " AND city = :city AND state = :state"
+        insert_filters += " AND city = :city AND state = :state"
+        params.update(city=city, state=state)
+    if start_year is not None:
+        delete_filters += " AND [year] >= :start_year"
+        insert_filters += " AND last_sold_date >= :start_date"
+        params.update(start_year=start_year, start_date=datetime(start_year, 1, 1))
+
+    connection.execute(
+        text(f"DELETE FROM [dbo].[TrendChartRollup] WHERE 1 = 1 {delete_filters}"),
+        params,
+    )
+    connection.execute(
+        text(
+            ROLLUP_INSERT_QUERY.format(
+                bucket_size=int(config.trend_sqft_bucket_size), filters=insert_filters
+            )
+        ),
+        params,
+    )
+
+
+def refresh_trend_rollup_for_frame(connection: Connection, df: pd.DataFrame):
+    """
+    Refreshes the years touched by newly written rows, per city/state in df.
+    """
+    if len(df) == 0:
+        return
+    sold_years = pd.to_datetime(df["last_sold_date"]).dt.year
+    start_years = (
+        pd.DataFrame({"city": df["city"], "state": df["state"], "year": sold_years})
+        .dropna(subset=["city", "state"])
+        .groupby(["city", "state"])["year"]
+        .min()
+    )
+    for (city, state), start_year in start_years.items():
+        refresh_trend_rollup(
+            connection,
+            city=city,
+            state=state,
+            start_year=None if pd.isna(start_year) else int(start_year),
+        )
+
+
+class RollupState:
+    """
+    Whether the rollup can be read and maintained. A failed create/backfill is
+    not retried before retry_at; writes made while the rollup is unavailable
+    record their (city, state) as stale, and the next successful ensure
+    recomputes those cities before the rollup is used again.
+    """
+
+    def __init__(self):
+        self.ready = False
+        self.retry_at = 0.0
+        self.stale = set()
+        self.lock = threading.Lock()
+        # Guards stale and worker
+        self.stale_lock = threading.Lock()
+        self.worker = None
+
+
+_rollup_state = RollupState()
+
+
+def mark_trend_rollup_stale(locations):
+    """
+    locations: (city, state) pairs written without maintaining the rollup.
+    """
+    with _rollup_state.stale_lock:
+        _rollup_state.stale.update(locations)
+
+
+def ensure_trend_rollup(engine: Engine) -> bool:
+    """
+    Creates the rollup table (and backfills it from HistoricalPropertyData)
+    if needed and recomputes stale cities. Returns False when the rollup cannot
+    be used. Writers call this; requests use is_trend_rollup_ready.
+    """
+    state = _rollup_state
+    if state.ready and not state.stale:
+        return True
+
+    with state.lock:
+        if state.ready and not state.stale:
+            return True
+        if time.monotonic() < state.retry_at:
+            return False
+
+        with state.stale_lock:
+            stale = set(state.stale)
+        try:
+            with engine.begin() as connection:
+                if not state.ready:
+                    create_tables(connection, trend_chart_rollup_table)
+                    create_indexes(connection, trend_chart_rollup_index)
+                is_empty = (
+                    connection.execute(
+                        select(trend_chart_rollup_table.c.city).limit(1)
+                    ).first()
+                    is None
+                )
+                if is_empty:
+                    refresh_trend_rollup(connection)
+                else:
+                    for city, location_state in sorted(stale):
+                        refresh_trend_rollup(
+                            connection, city=city, state=location_state
+                        )
+        except Exception as e:
+            state.retry_at = time.monotonic() + config.trend_rollup_retry_sec
+            print(
+                f"Trend chart rollup is not available, retrying in "
+                f"{config.trend_rollup_retry_sec:.0f}s: {e}"
+            )
+            return False
+
+        # Cities marked while this ran stay stale for the next call
+        with state.stale_lock:
+            state.stale -= stale
+        state.ready = True
+        return not state.stale
+
+
+def ensure_trend_rollup_in_background(engine: Engine):
+    """
+    Runs ensure_trend_rollup on a daemon thread unless one is already running
+    or a failure is still backing off.
+    """
+    state = _rollup_state
+    with state.stale_lock:
+        if state.worker is not None and state.worker.is_alive():
+            return
+        if time.monotonic() < state.retry_at:
+            return
+        state.worker = threading.Thread(
+            target=ensure_trend_rollup, args=(engine,), name="trend-rollup", daemon=True
+        )
+        state.worker.start()
+
+
+def is_trend_rollup_ready(engine: Engine) -> bool:
+    """
+    For the request path, which never creates or refreshes the rollup itself:
+    True when the rollup is current, otherwise hands the work to a background
+    thread and returns False so the raw query is used meanwhile.
+    """
+    state = _rollup_state
+    if state.ready and not state.stale:
+        return True
+    ensure_trend_rollup_in_background(engine)
+    return False
@@ -1,26 +1,211 @@
 import pandas as pd
+import uuid
 from datetime import datetime
-from sqlalchemy import Engine, text
+from sqlalchemy import Connection, Engine, text
+
+from config import config
+from database.generations import data_generations
+from database.migrations import (
+    historical_property_data_staging_table,
+    historical_property_data_table,
+    require_latest_schema,
+)
+from database.rollup import (
+    ensure_trend_rollup,
+    mark_trend_rollup_stale,
+    refresh_trend_rollup,
+    refresh_trend_rollup_for_frame,
+)
 
 
 def read_historical_property_data(engine: Engine, city: str, state: str):
-    query = f"""
+    query = text(
+        """
     SELECT * FROM HistoricalPropertyData
-    WHERE city = '{city.capitalize()}' and state = '{state.upper()}'
+    WHERE city = :city and state = :state
     """
+    )
+    params = {"city": city.capitalize(), "state": state.upper()}
 
-    df = pd.read_sql(query, engine)
+    df = pd.read_sql(query, engine, params=params)
     return df
 
 
+def get_latest_sold_date(engine: Engine, city: str, state: str):
+    query = text(
+        """
+    SELECT MAX(last_sold_date) FROM HistoricalPropertyData
+    WHERE city = :city AND state = :state
+    """
+    )
+    params = {"city": city.capitalize(), "state": state.upper()}
+
+    with engine.connect() as connection:
+        latest_sold_date = connection.execute(query, params).scalar()
+
+    if latest_sold_date is None:
+        return None
+    return pd.to_datetime(latest_sold_date).to_pydatetime()
+
+
+def get_frame_locations(df: pd.DataFrame) -> set:
+    return set(df[["city", "state"]].dropna().itertuples(index=False, name=None))
+
+
 def write_historical_property_data(engine: Engine, df):
-    df.to_sql(
-        "HistoricalPropertyData",
-        con=engine,
-        index=False,
-        if_exists="append",
-        chunksize=5000,
+    maintain_rollup = ensure_trend_rollup(engine)
+
+    with engine.begin() as connection:
+        df.to_sql(
+            "HistoricalPropertyData",
+            con=connection,
+            index=False,
+            if_exists="append",
+            chunksize=5000,
+        )
+        if maintain_rollup:
+            refresh_trend_rollup_for_frame(connection, df)
+
+    if not maintain_rollup:
+        mark_trend_rollup_stale(get_frame_locations(df))
+    for city in df["city"].dropna().unique():
+        data_generations.bump(city)
+
+
+PROPERTY_DATA_KEY = ["property_url", "last_sold_date"]
+
+
+def merge_staging_batch(connection: Connection, batch_id: str, columns: list):
+    """
+    Merges one staged batch into HistoricalPropertyData on the natural key.
+    Returns (inserted, updated). SQL Server uses MERGE; other engines (local
+    tests, benchmarks) run the equivalent UPDATE ... FROM + INSERT ... SELECT.
+    """
+    key_match = " AND ".join(
+        f"target.[{name}] = source.[{name}]" for name in PROPERTY_DATA_KEY
     )
+    column_list = ", ".join(f"[{name}]" for name in columns)
+    params = {"batch_id": batch_id}
+
+    if connection.dialect.name == "mssql":
+        updates = ", ".join(
+            f"target.[{name}] = source.[{name}]"
+            for name in columns
+            if name not in PROPERTY_DATA_KEY
+        )
+        source_values = ", ".join(f"source.[{name}]" for name in columns)
+        query = text(
+            f"""
+        SET NOCOUNT ON;
+        DECLARE @actions TABLE (merge_action NVARCHAR(10));
+        MERGE [dbo].[HistoricalPropertyData] WITH (HOLDLOCK) AS target
+        USING (
+            SELECT {column_list} FROM [dbo].[HistoricalPropertyDataStaging]
+            WHERE batch_id = :batch_id
+        ) AS source
+        ON {key_match}
+        WHEN MATCHED THEN
+            UPDATE SET {updates}
+        WHEN NOT MATCHED BY TARGET THEN
+            INSERT ({column_list}) VALUES ({source_values})
+        OUTPUT $action INTO @actions;
+        SELECT
+            COALESCE(SUM(CASE WHEN merge_action = 'INSERT' THEN 1 ELSE 0 END), 0),
+            COALESCE(SUM(CASE WHEN merge_action = 'UPDATE' THEN 1 ELSE 0 END), 0)
+        FROM @actions;
+        """
+        )
+        inserted, updated = connection.execute(query, params).one()
+        return int(inserted), int(updated)
+
+    updates = ", ".join(
+        f"[{name}] = source.[{name}]"
+        for name in columns
+        if name not in PROPERTY_DATA_KEY
+    )
+    update_key_match = " AND ".join(
+        f"HistoricalPropertyData.[{name}] = source.[{name}]"
+        for name in PROPERTY_DATA_KEY
+    )
+    updated = connection.execute(
+        text(
+            f"""
+        UPDATE HistoricalPropertyData SET {updates}
+        FROM HistoricalPropertyDataStaging AS source
+        WHERE source.batch_id = :batch_id AND {update_key_match}
+        """
+        ),
+        params,
+    ).rowcount
+    inserted = connection.execute(
+        text(
+            f"""
+        INSERT INTO HistoricalPropertyData ({column_list})
+        SELECT {column_list} FROM HistoricalPropertyDataStaging AS source
+        WHERE source.batch_id = :batch_id AND NOT EXISTS (
+            SELECT 1 FROM HistoricalPropertyData AS target WHERE {key_match}
+        )
+        """
+        ),
+        params,
+    ).rowcount
+    return inserted, updated
+
+
+def upsert_historical_property_data(engine: Engine, df, batch_size: int = None):
+    """
+    Loads df into HistoricalPropertyDataStaging in batches and merges each batch
+    into HistoricalPropertyData on (property_url, last_sold_date), one bounded
+    transaction per batch. Rows without a full key are always inserted.
+    Returns {"inserted": ..., "updated": ...}. Raises before writing anything
+    when the staging table's migration has not been applied.
+    """
+    require_latest_schema(engine)
+    batch_size = batch_size or config.ingest_batch_size
+    columns = [
+        column.name
+        for column in historical_property_data_table.columns
+        if column.name in df.columns
+    ]
+    has_key = df[PROPERTY_DATA_KEY].notna().all(axis=1)
+    df = pd.concat(
+        [
+            df[has_key].drop_duplicates(subset=PROPERTY_DATA_KEY, keep="last"),
+            df[~has_key],
+        ]
+    )
+    maintain_rollup = ensure_trend_rollup(engine)
+    counts = {"inserted": 0, "updated": 0}
+
+    for start in range(0, len(df), batch_size):
+        batch = df.iloc[start : start + batch_size]
+        batch_id = str(uuid.uuid4())
+        values = batch[columns].astype(object).where(batch[columns].notna(), None)
+        records = [
+            dict(zip(columns, row), batch_id=batch_id)
+            for row in values.itertuples(index=False, name=None)
+        ]
+
+        with engine.begin() as connection:
+            connection.execute(historical_property_data_staging_table.insert(), records)
+            inserted, updated = merge_staging_batch(connection, batch_id, columns)
+            connection.execute(
+                historical_property_data_staging_table.delete().where(
+                    historical_property_data_staging_table.c.batch_id == batch_id
+                )
+            )
+            if maintain_rollup:
+                refresh_trend_rollup_for_frame(connection, batch)
+
+        counts["inserted"] += inserted
+        counts["updated"] += updated
+
+    if not maintain_rollup:
+        mark_trend_rollup_stale(get_frame_locations(df))
+    for city in df["city"].dropna().unique():
+        data_generations.bump(city)
+
+    return counts
 
 
 def remove_location_from_db(
@@ -38,13 +223,24 @@ def remove_location_from_db(
         params["last_sold_date"] = last_sold_date
 
     delete_query = text(query_text)
+    maintain_rollup = ensure_trend_rollup(engine)
 
     with engine.connect() as connection:
         with connection.begin() as transaction:
             try:
                 result = connection.execute(delete_query, params)
+                if maintain_rollup:
+                    refresh_trend_rollup(
+                        connection,
+                        city=params["city"],
+                        state=params["state"],
+                        start_year=last_sold_date and last_sold_date.year,
+                    )
                 transaction.commit()
                 print(f"Deleted {result.rowcount} rows.")
+                if not maintain_rollup:
+                    mark_trend_rollup_stale([(params["city"], params["state"])])
+                data_generations.bump(params["city"])
             except Exception as e:
                 print("An error occurred:", e)
                 transaction.rollback()
@@ -1,19 +1,28 @@
-from azure.storage.blob import BlobServiceClient
 from sqlalchemy import Engine
 
+from active_listings.cache import (
+    get_listings_cache_key,
+    listings_cache,
+    prediction_cache,
+)
+from add_location.utils import remove_scrape_state
 from database.utils import remove_location_from_db
-from config import config
+from model_storage.cache import model_cache
+from model_storage.utils import get_model_blob_name, get_model_blob_client
+from locations.service import location_registry
 
 
 def delete_location(engine: Engine, city: str, state: str):
     remove_location_from_db(engine=engine, city=city, state=state, last_sold_date=None)
+    # A later re-add scrapes the full history instead of resuming this one
+    remove_scrape_state(city, state)
 
-    blob_service_client = BlobServiceClient.from_connection_string(
-        config.az_storage_conn_str
-    )
-    blob_name = f"{city.lower()}_{state.lower()}.pkl"
-    blob_client = blob_service_client.get_blob_client(
-        container=config.az_storage_container_name, blob=blob_name
-    )
+    blob_name = get_model_blob_name(city, state)
+    blob_client = get_model_blob_client(blob_name)
 
     blob_client.delete_blob()
+    model_cache.invalidate(blob_name)
+    location_registry.remove(f"{city}, {state}")
+    location_key = get_listings_cache_key(f"{city}, {state}")
+    listings_cache.invalidate(location_key)
+    prediction_cache.invalidate(location_key)
@@ -0,0 +1,127 @@
+import json
+import os
+import threading
+from typing import Optional, Tuple
+
+from config import config
+
+
+def normalize_location_key(city: str, state: Optional[str] = None) -> str:
+    return f"{city.strip().lower()}, {(state or '').strip().lower()}"
+
+
+class GeocodeCache:
+    """
+    Downtown coordinates per city/state.
+    Lookups go through an in-process memo, then the on-disk JSON store,
+    and only then to Nominatim. The store can be seeded from a file so that
+    training and inference work without the geocoder.
+    File format: {"seattle, wa": {"latitude": 47.60, "longitude": -122.33}, ...}
+    """
+
+    def __init__(self, store_path: str, seed_path: Optional[str] = None):
+        self.store_path = store_path
+        self.seed_path = seed_path
+        self._memo = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _read_file(path: str) -> dict:
+        if not path or not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            data = json.load(f)
+        return {
+            normalize_location_key(*key.split(",", 1)): (
+                float(value["latitude"]),
+                float(value["longitude"]),
+            )
+            for key, value in data.items()
+        }
+
+    def _write_store(self):
+        # Best effort: the memo stays authoritative for this process either way
+        data = {
+            key: {"latitude": lat, "longitude": lon}
+            for key, (lat, lon) in sorted(self._memo.items())
+        }
+        tmp_path = f"{self.store_path}.tmp"
+        try:
+            directory = os.path.dirname(self.store_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(tmp_path, "w") as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp_path, self.store_path)
+        except OSError as e:
+            print(f"Writing the geocode cache to {self.store_path} failed: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        seeded = self._read_file(self.seed_path)
+        stored = self._read_file(self.store_path)
+        self._memo = {**seeded, **stored, **self._memo}
+        self._loaded = True
+        if set(seeded) - set(stored):
+            self._write_store()
+
+    def seed_from_file(self, path: str):
+        with self._lock:
+            self._ensure_loaded()
+            self._memo.update(self._read_file(path))
+            self._write_store()
+
+    def set(
+        self,
+        city: str,
+        state: Optional[str],
+        latitude: float,
+        longitude: float,
+        persist: bool = True,
+    ):
+        with self._lock:
+            self._ensure_loaded()
+            self._memo[normalize_location_key(city, state)] = (latitude, longitude)
+            if persist:
+                self._write_store()
+
+    def get(self, city: str, state: Optional[str] = None) -> Tuple[float, float]:
+        key = normalize_location_key(city, state)
+        coordinates = self._memo.get(key)
+        if coordinates:
+            return coordinates
+
+        with self._lock:
+            self._ensure_loaded()
+            coordinates = self._memo.get(key)
+            if coordinates:
+                return coordinates
+
+            from geopy.geocoders import Nominatim
+
+            place = f"{city}, {state}" if state else city
+            geolocator = Nominatim(user_agent="RealEstateAdvisor")
+            location = geolocator.geocode(f"Downtown {place}")
+            if location is None:
+                raise ValueError(f"Could not geocode downtown of {place}")
+
+            coordinates = (location.latitude, location.longitude)
+            self._memo[key] = coordinates
+            self._write_store()
+            print(f"Geocoded downtown of {place}: {coordinates}")
+            return coordinates
+
+
+geocode_cache = GeocodeCache(
+    store_path=config.geocode_cache_path, seed_path=config.geocode_seed_path
+)
+
+
+def get_downtown_coordinates(city: str, state: Optional[str] = None):
+    return geocode_cache.get(city, state)
@@ -0,0 +1,190 @@
+import gzip
+import hashlib
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from fastapi import Request, Response
+
+from config import config
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Generations and index versions are per-process counters, so every ETag also
+# carries the id of the process that issued it
+BOOT_ID = uuid.uuid4().hex
+
+ENCODINGS = ["br", "gzip"] if brotli else ["gzip"]
+
+
+def make_etag(*parts) -> str:
+    """
+    Strong ETag of the identity representation. Only pass values that change
+    whenever the response body does (data generations, cache versions, query).
+    """
+    digest = hashlib.sha1(":".join(map(str, (BOOT_ID,) + parts)).encode())
+    return f'"{digest.hexdigest()[:24]}"'
+
+
+def encoded_etag(etag: str, encoding: Optional[str]) -> str:
+    # Each content coding is its own representation, so it gets its own tag
+    return f'{etag[:-1]}-{encoding}"' if encoding else etag
+
+
+def matching_etag(request: Request, etag: str) -> Optional[str]:
+    """
+    The If-None-Match tag that matches the current representation in any
+    content coding, or None.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return None
+    if if_none_match.strip() == "*":
+        return etag
+
+    variants = {encoded_etag(etag, encoding) for encoding in [None] + ENCODINGS}
+    for tag in if_none_match.split(","):
+        # If-None-Match uses weak comparison
+        tag = tag.strip().removeprefix("W/")
+        if tag in variants:
+            return tag
+    return None
+
+
+def choose_encoding(request: Request) -> Optional[str]:
+    accepted = {}
+    for item in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                continue
+        accepted[name.strip().lower()] = quality
+
+    for encoding in ENCODINGS:
+        if accepted.get(encoding, accepted.get("*", 0)) > 0:
+            return encoding
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=config.http_brotli_quality)
+    return gzip.compress(body, compresslevel=config.http_gzip_level, mtime=0)
+
+
+class CompressedBodyCache:
+    """
+    Memory-bounded LRU of compressed response bodies keyed by (ETag, coding).
+    A strong ETag identifies the exact body, so hits never go stale.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._counters = {
+            "hits": 0,
+            "misses": 0,
+            "not_modified": 0,
+            "bytes_in": 0,
+            "bytes_out": 0,
+        }
+        self._lock = threading.Lock()
+
+    def count_not_modified(self):
+        with self._lock:
+            self._counters["not_modified"] += 1
+
+    def get_or_compress(self, etag: str, encoding: str, body: bytes) -> bytes:
+        key = (etag, encoding)
+        with self._lock:
+            compressed = self._entries.get(key)
+            if compressed is not None:
+                self._entries.move_to_end(key)
+                self._counters["hits"] += 1
+            else:
+                self._counters["misses"] += 1
+
+        if compressed is None:
+            compressed = compress(body, encoding)
+            with self._lock:
+                if key not in self._entries:
+                    self._entries[key] = compressed
+                    self._bytes += len(compressed)
+                while self._bytes > self.max_bytes and self._entries:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._bytes -= len(evicted)
+
+        with self._lock:
+            self._counters["bytes_in"] += len(body)
+            self._counters["bytes_out"] += len(compressed)
+        return compressed
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "encodings": ENCODINGS,
+                **self._counters,
+            }
+
+
+compressed_body_cache = CompressedBodyCache(
+    max_bytes=config.http_compressed_cache_max_mb * 1024 * 1024
+)
+
+
+def not_modified_response(
+    request: Request, etag: str, cache_control: str
+) -> Optional[Response]:
+    """
+    304 response when the client already has the current representation,
+    checked before the body is built.
+    """
+    matched = matching_etag(request, etag)
+    if matched is None:
+        return None
+
+    compressed_body_cache.count_not_modified()
+    return Response(
+        status_code=304,
+        headers={
+            "ETag": matched,
+            "Cache-Control": cache_control,
+            "Vary": "Accept-Encoding",
+        },
+    )
+
+
+def cached_response(
+    request: Request,
+    body: bytes,
+    etag: str,
+    cache_control: str,
+    headers: Optional[Dict[str, str]] = None,
+    media_type: str = "application/json",
+) -> Response:
+    headers = {
+        **(headers or {}),
+        "Cache-Control": cache_control,
+        "Vary": "Accept-Encoding",
+    }
+    encoding = (
+        choose_encoding(request)
+        if len(body) >= config.http_compress_min_bytes
+        else None
+    )
+    if encoding:
+        body = compressed_body_cache.get_or_compress(etag, encoding, body)
+        headers["Content-Encoding"] = encoding
+    headers["ETag"] = encoded_etag(etag, encoding)
+    return Response(content=body, media_type=media_type, headers=headers)
@@ -0,0 +1,15 @@
+from fastapi import APIRouter, HTTPException
+
+from jobs.schemas import Job
+from jobs.service import job_queue
+
+
+router = APIRouter()
+
+
+@router.get("/jobs/{job_id}", operation_id="get_job")
+def get_job(job_id: str) -> Job:
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} was not found")
+    return job
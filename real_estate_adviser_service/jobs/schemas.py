@@ -0,0 +1,29 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import List, Optional
+
+
+class JobStage(BaseModel):
+    name: str
+    status: str = "pending"
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    duration_sec: Optional[float] = None
+
+
+class Job(BaseModel):
+    job_id: str
+    location: str
+    status: str = "queued"
+    current_stage: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
+    stages: List[JobStage]
+
+
+class JobSubmission(BaseModel):
+    status: str
+    job_id: str
+    message: str
@@ -0,0 +1,157 @@
+import multiprocessing
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Optional
+
+from config import config
+from jobs.schemas import Job, JobStage
+
+
+LOCATION_STAGES = ("scrape", "clean", "train", "upload")
+
+
+class JobProgress:
+    def __init__(self, queue: "JobQueue", job_id: str):
+        self.queue = queue
+        self.job_id = job_id
+
+    @contextmanager
+    def stage(self, name: str):
+        self.queue._update_stage(self.job_id, name, "running")
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.queue._update_stage(
+                self.job_id, name, "failed", time.perf_counter() - start
+            )
+            raise
+        self.queue._update_stage(
+            self.job_id, name, "completed", time.perf_counter() - start
+        )
+
+
+class JobQueue:
+    """
+    Runs long location jobs on a dedicated thread pool and keeps their status
+    in memory. Submitting a key that already has a queued/running job returns
+    that job instead of starting a new one.
+    """
+
+    def __init__(self, max_workers: int, history_size: int):
+        self.history_size = history_size
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="job"
+        )
+        self._jobs = OrderedDict()
+        self._active_by_key = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key: str, location: str, func, stages=LOCATION_STAGES, **kwargs):
+        """
+        Returns (job, created). func is called with progress=JobProgress and kwargs.
+        """
+        with self._lock:
+            active_job_id = self._active_by_key.get(key)
+            if active_job_id:
+                return self._jobs[active_job_id].model_copy(deep=True), False
+
+            job = Job(
+                job_id=str(uuid.uuid4()),
+                location=location,
+                created_at=datetime.utcnow(),
+                stages=[JobStage(name=name) for name in stages],
+            )
+            self._jobs[job.job_id] = job
+            self._active_by_key[key] = job.job_id
+            self._trim_history()
+            submitted = job.model_copy(deep=True)
+
+        self._executor.submit(self._run, key, job.job_id, func, kwargs)
+        return submitted, True
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.model_copy(deep=True) if job else None
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _trim_history(self):
+        finished_ids = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job.status in ("completed", "failed")
+        ]
+        for job_id in finished_ids[: max(len(self._jobs) - self.history_size, 0)]:
+            del self._jobs[job_id]
+
+    def _run(self, key: str, job_id: str, func, kwargs):
+        with self._lock:
+            job = self._jobs[job_id]
+            job.status = "running"
+            job.started_at = datetime.utcnow()
+
+        try:
+            func(progress=JobProgress(self, job_id), **kwargs)
+            status, error = "completed", None
+        except Exception as e:
+            print(f"Job {job_id} ({job.location}) failed: {e}")
+            status, error = "failed", str(e)
+
+        with self._lock:
+            job.status = status
+            job.error = error
+            job.current_stage = None
+            job.finished_at = datetime.utcnow()
+            self._active_by_key.pop(key, None)
+
+    def _update_stage(
+        self, job_id: str, name: str, status: str, duration_sec: float = None
+    ):
+        with self._lock:
+            job = self._jobs[job_id]
+            stage = next(stage for stage in job.stages if stage.name == name)
+            stage.status = status
+            if status == "running":
+                job.current_stage = name
+                stage.started_at = datetime.utcnow()
+            else:
+                stage.finished_at = datetime.utcnow()
+                stage.duration_sec = round(duration_sec, 3)
+
+
+job_queue = JobQueue(
+    max_workers=config.jobs_max_workers, history_size=config.jobs_history_size
+)
+
+_process_pool = None
+_process_pool_lock = threading.Lock()
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """
+    Process pool for CPU-bound work (model training). Uses spawn so workers
+    do not inherit the server's threads and sockets.
+    """
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(
+                max_workers=config.training_max_processes,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _process_pool
+
+
+def shutdown_executors():
+    job_queue.shutdown()
+    with _process_pool_lock:
+        if _process_pool is not None:
+            _process_pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,127 @@
+import threading
+from typing import Callable, Dict, List
+
+from locations.schemas import Location
+
+
+class LocationRegistry:
+    """
+    In-memory snapshot of the added locations (one per model blob) and their
+    model scores. Reads never touch storage once loaded; a daemon thread makes
+    the first load and then reloads the snapshot every refresh_interval_sec or
+    as soon as invalidate() is called.
+    """
+
+    def __init__(
+        self,
+        load_locations: Callable[[], List[Location]],
+        load_model_scores: Callable[[], Dict[str, dict]],
+        refresh_interval_sec: float,
+    ):
+        self._load_locations = load_locations
+        self._load_model_scores = load_model_scores
+        self.refresh_interval_sec = refresh_interval_sec
+
+        self.version = 0
+        self._locations: Dict[str, Location] = {}
+        self._model_scores: Dict[str, dict] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+        # Serializes loads, so reads before the first load wait for it
+        self._load_lock = threading.Lock()
+        self._refresh_requested = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def refresh(self):
+        with self._load_lock:
+            self._refresh()
+
+    def _refresh(self):
+        locations = {location.location: location for location in self._load_locations()}
+        try:
+            model_scores = self._load_model_scores()
+        except Exception as e:
+            print(f"Could not load model scores, keeping cached ones: {e}")
+            model_scores = self._model_scores
+
+        with self._lock:
+            if locations != self._locations or model_scores != self._model_scores:
+                self.version += 1
+            self._locations = locations
+            self._model_scores = model_scores
+            self._loaded = True
+
+    def _refresh_loop(self):
+        try:
+            self._ensure_loaded()
+        except Exception as e:
+            print(f"Initial location registry load failed: {e}")
+
+        while not self._stopped.is_set():
+            self._refresh_requested.wait(self.refresh_interval_sec)
+            self._refresh_requested.clear()
+            if self._stopped.is_set():
+                break
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Location registry refresh failed: {e}")
+
+    def start(self):
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self._refresh_loop, name="location-registry", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._refresh_requested.set()
+
+    def invalidate(self):
+        self._refresh_requested.set()
+
+    def remove(self, location: str):
+        with self._lock:
+            if self._locations.pop(location, None):
+                self.version += 1
+        self.invalidate()
+
+    def _ensure_loaded(self):
+        # Only blocks until the first load succeeded; a read waiting for the
+        # background load does not start a second one
+        if self._loaded:
+            return
+        with self._load_lock:
+            if not self._loaded:
+                self._refresh()
+
+    def current_version(self) -> int:
+        self._ensure_loaded()
+        return self.version
+
+    def contains(self, location: str) -> bool:
+        self._ensure_loaded()
+        return location in self._locations
+
+    def names(self) -> List[str]:
+        self._ensure_loaded()
+        return list(self._locations)
+
+    def locations(self) -> List[Location]:
+        self._ensure_loaded()
+        with self._lock:
+            locations, model_scores = self._locations, self._model_scores
+
+        return [
+            location.model_copy(
+                update={
+                    "score": model_scores.get(location.file_name, {}).get("score"),
+                    "score_calculated": model_scores.get(location.file_name, {}).get(
+                        "timestamp"
+                    ),
+                }
+            )
+            for location in locations.values()
+        ]
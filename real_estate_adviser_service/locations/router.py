@@ -1,14 +1,24 @@
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Request
+from pydantic import TypeAdapter
 
 from typing import List
 from locations.schemas import Location
 from locations import service
-from database.database import DbEngine
-
+from http_cache import cached_response, make_etag, not_modified_response
 
 router = APIRouter()
 
+LOCATIONS_ADAPTER = TypeAdapter(List[Location])
+# The registry reloads in the background and on add/delete, so clients revalidate
+LOCATIONS_CACHE_CONTROL = "no-cache"
+
+
+@router.get("/locations", operation_id="get_locations", response_model=List[Location])
+def get_locations(request: Request):
+    etag = make_etag("locations", service.get_locations_version())
+    not_modified = not_modified_response(request, etag, LOCATIONS_CACHE_CONTROL)
+    if not_modified:
+        return not_modified
 
-@router.get("/locations", operation_id="get_locations")
-def get_locations(db_engine: DbEngine) -> List[Location]:
-    return service.get_added_locations(engine=db_engine)
+    body = LOCATIONS_ADAPTER.dump_json(service.get_locations())
+    return cached_response(request, body, etag, LOCATIONS_CACHE_CONTROL)
@@ -1,16 +1,19 @@
-from azure.storage.blob import BlobServiceClient
 from typing import Optional
 
 from config import config
 from locations.schemas import Location
+from locations.registry import LocationRegistry
 from sqlalchemy import Engine
+from database.database import get_engine
 from database.utils import get_model_scores
 
 
 def get_added_locations(engine: Optional[Engine] = None):
     """
-    If engine is passed, returns also model_score and score_calculated.
+    Lists the model container. If engine is passed, returns also model_score and score_calculated.
     """
+    from azure.storage.blob import BlobServiceClient
+
     blob_service_client = BlobServiceClient.from_connection_string(
         config.az_storage_conn_str
     )
@@ -39,6 +42,24 @@ def get_added_locations(engine: Optional[Engine] = None):
     return locations
 
 
+location_registry = LocationRegistry(
+    load_locations=get_added_locations,
+    load_model_scores=lambda: get_model_scores(engine=get_engine()),
+    refresh_interval_sec=config.locations_refresh_sec,
+)
+
+
+def get_locations():
+    return location_registry.locations()
+
+
+def get_locations_version() -> int:
+    return location_registry.current_version()
+
+
 def get_location_names():
-    locations = get_added_locations()
-    return [location.location for location in locations]
+    return location_registry.names()
+
+
+def is_location_added(location: str) -> bool:
+    return location_registry.contains(location)
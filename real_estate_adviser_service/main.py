@@ -1,4 +1,5 @@
 import uvicorn
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -6,11 +7,44 @@ from fastapi.middleware.cors import CORSMiddleware
 from active_listings.router import router as active_listings_router
 from add_location.router import router as add_location_router
 from delete_location.router import router as delete_location_router
+from jobs.router import router as jobs_router
 from locations.router import router as locations_router
+from metrics.router import router as metrics_router
 from trend_chart.router import router as trend_chart_router
+from jobs.service import shutdown_executors
+from active_listings.cache import listings_cache
+from active_listings.service import shutdown_batch_executor
+from config import config
+from database.database import init_engine, dispose_engine
+from database.migrations import require_latest_schema, run_migrations
+from locations.service import location_registry
+from database.rollup import ensure_trend_rollup_in_background
+from warmup import import_warmup
 
 
-app = FastAPI(debug=True)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if config.warmup_imports:
+        import_warmup.start()
+    engine = init_engine()
+    # A failed migration stops startup: ingest and the rollup need the latest schema
+    if config.db_migrate_on_startup:
+        run_migrations(engine)
+    require_latest_schema(engine)
+    # The rollup backfill and the first registry load (a storage listing) run
+    # in the background; until they finish, trend charts use the raw query
+    # and location reads wait for the registry
+    ensure_trend_rollup_in_background(engine)
+    location_registry.start()
+    yield
+    location_registry.stop()
+    shutdown_executors()
+    listings_cache.shutdown()
+    shutdown_batch_executor()
+    dispose_engine()
+
+
+app = FastAPI(debug=True, lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -18,13 +52,16 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Total-Count", "X-Next-Cursor"],
 )
 
 app.include_router(active_listings_router, prefix="", tags=["Listings"])
 app.include_router(add_location_router, prefix="", tags=["Locations"])
 app.include_router(delete_location_router, prefix="", tags=["Locations"])
+app.include_router(jobs_router, prefix="", tags=["Jobs"])
 app.include_router(locations_router, prefix="", tags=["Locations"])
 app.include_router(trend_chart_router, prefix="", tags=["Trend Chart"])
+app.include_router(metrics_router, prefix="", tags=["Metrics"])
 
 
 if __name__ == "__main__":
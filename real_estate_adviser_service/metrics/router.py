@@ -0,0 +1,25 @@
+from fastapi import APIRouter
+
+from active_listings.cache import listings_cache, prediction_cache
+from active_listings.encoding import payload_metrics
+from database.database import get_pool_stats
+from http_cache import compressed_body_cache
+from model_storage.cache import model_cache
+from trend_chart.cache import trend_chart_cache
+from warmup import import_warmup
+
+router = APIRouter()
+
+
+@router.get("/metrics", operation_id="get_metrics")
+def get_metrics():
+    return {
+        "model_cache": model_cache.stats(),
+        "db_pool": get_pool_stats(),
+        "trend_chart_cache": trend_chart_cache.stats(),
+        "active_listings_cache": listings_cache.stats(),
+        "active_listings_predictions": prediction_cache.stats(),
+        "active_listings_payloads": payload_metrics.stats(),
+        "http_cache": compressed_body_cache.stats(),
+        "import_warmup": import_warmup.stats(),
+    }
@@ -0,0 +1,117 @@
+import hashlib
+import io
+import warnings
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, List, Optional
+
+import pandas as pd
+
+
+ARTIFACT_FORMAT_VERSION = 1
+
+
+@dataclass
+class ModelArtifact:
+    """
+    format_version 0 is a legacy blob holding a bare pickled model.
+    """
+
+    model: Any
+    feature_columns: List[str] = field(default_factory=list)
+    fingerprint: Optional[dict] = None
+    format_version: int = ARTIFACT_FORMAT_VERSION
+    created_at: Optional[str] = None
+
+
+def dataset_fingerprint(dataset: pd.DataFrame) -> dict:
+    row_hashes = pd.util.hash_pandas_object(dataset, index=False).to_numpy()
+    max_sold_date = (
+        pd.to_datetime(dataset["last_sold_date"]).max()
+        if "last_sold_date" in dataset and len(dataset)
+        else None
+    )
+    return {
+        "row_count": len(dataset),
+        "max_sold_date": max_sold_date.isoformat() if max_sold_date else None,
+        "content_hash": hashlib.sha256(row_hashes.tobytes()).hexdigest(),
+    }
+
+
+def dump_model_artifact(
+    model,
+    feature_columns: Optional[List[str]] = None,
+    fingerprint: Optional[dict] = None,
+    compress: int = 0,
+) -> bytes:
+    """
+    joblib container with the model and its metadata. Uncompressed artifacts
+    keep NumPy arrays as raw aligned buffers that load memory-mapped.
+    """
+    import joblib
+
+    if feature_columns is None:
+        feature_columns = list(getattr(model, "feature_names_in_", []))
+
+    payload = {
+        "format_version": ARTIFACT_FORMAT_VERSION,
+        "feature_columns": list(feature_columns),
+        "fingerprint": fingerprint,
+        "created_at": datetime.utcnow().isoformat(),
+        "model": model,
+    }
+    buffer = io.BytesIO()
+    joblib.dump(payload, buffer, compress=compress)
+    return buffer.getvalue()
+
+
+def load_model_artifact(source, mmap: bool = True) -> ModelArtifact:
+    """
+    source is a file path (memory-mapped when the artifact is uncompressed and
+    mmap=True) or raw bytes. Legacy pickled models are loaded as format_version 0.
+    """
+    import joblib
+
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        payload = joblib.load(io.BytesIO(source))
+    else:
+        with warnings.catch_warnings():
+            # Compressed artifacts silently fall back to a regular load
+            warnings.filterwarnings("ignore", message="mmap_mode .* compressed")
+            payload = joblib.load(source, mmap_mode="r" if mmap else None)
+
+    if isinstance(payload, dict) and "format_version" in payload:
+        return ModelArtifact(
+            model=payload["model"],
+            feature_columns=payload["feature_columns"],
+            fingerprint=payload["fingerprint"],
+            format_version=payload["format_version"],
+            created_at=payload["created_at"],
+        )
+
+    return ModelArtifact(
+        model=payload,
+        feature_columns=list(getattr(payload, "feature_names_in_", [])),
+        format_version=0,
+    )
+
+
+def artifact_blob_metadata(artifact_fingerprint: Optional[dict]) -> dict:
+    """
+    Blob metadata mirrors the fingerprint so it can be checked without a download.
+    """
+    metadata = {"format_version": str(ARTIFACT_FORMAT_VERSION)}
+    for key, value in (artifact_fingerprint or {}).items():
+        if value is not None:
+            metadata[key] = str(value)
+    return metadata
+
+
+def fingerprint_from_blob_metadata(metadata: Optional[dict]) -> Optional[dict]:
+    if not metadata or "content_hash" not in metadata:
+        return None
+    return {
+        "row_count": int(metadata.get("row_count", 0)),
+        "max_sold_date": metadata.get("max_sold_date"),
+        "content_hash": metadata["content_hash"],
+    }
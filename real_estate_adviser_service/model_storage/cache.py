@@ -0,0 +1,225 @@
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, Tuple
+
+from config import config
+from model_storage.artifact import ModelArtifact, load_model_artifact
+from model_storage.utils import get_model_blob_client
+
+
+@dataclass
+class CachedModel:
+    artifact: ModelArtifact
+    etag: str
+    last_modified: Optional[datetime]
+    size: int
+    validated_at: float
+
+
+class ModelCache:
+    """
+    Memory-bounded LRU of deserialized model artifacts keyed by blob name, with
+    an optional disk tier holding the raw blob and its ETag. Artifacts on disk
+    are loaded memory-mapped.
+    Entries are revalidated with a conditional (If-None-Match) download at most
+    every revalidate_sec, so an unchanged blob is neither re-downloaded nor
+    re-unpickled.
+    """
+
+    def __init__(
+        self, max_bytes: int, revalidate_sec: float, disk_dir: Optional[str] = None
+    ):
+        self.max_bytes = max_bytes
+        self.revalidate_sec = revalidate_sec
+        self.disk_dir = disk_dir
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._blob_locks = defaultdict(threading.Lock)
+        self._counters = defaultdict(int)
+
+    def _count(self, name: str, value: int = 1):
+        with self._lock:
+            self._counters[name] += value
+
+    def _disk_paths(self, blob_name: str):
+        blob_path = os.path.join(self.disk_dir, blob_name)
+        return blob_path, f"{blob_path}.json"
+
+    def _read_disk_etag(self, blob_name: str) -> Optional[str]:
+        if not self.disk_dir:
+            return None
+        blob_path, meta_path = self._disk_paths(blob_name)
+        if not (os.path.exists(blob_path) and os.path.exists(meta_path)):
+            return None
+        with open(meta_path) as f:
+            return json.load(f)["etag"]
+
+    def _load_download(
+        self, blob_name: str, blob_client, downloader, etag: str
+    ) -> ModelArtifact:
+        """
+        Keeps the download in the disk tier and loads it memory-mapped. The disk
+        tier is best effort: when it cannot be written the artifact is loaded
+        from memory instead.
+        """
+        if self.disk_dir:
+            blob_path, meta_path = self._disk_paths(blob_name)
+            # Unique per writer, processes may share disk_dir
+            tmp_path = f"{blob_path}.{uuid.uuid4().hex}.tmp"
+            try:
+                os.makedirs(self.disk_dir, exist_ok=True)
+                tmp_file = open(tmp_path, "wb")
+            except OSError as e:
+                print(
+                    f"Model disk cache is not writable, loading {blob_name} in memory: {e}"
+                )
+            else:
+                try:
+                    with tmp_file:
+                        downloader.readinto(tmp_file)
+                    os.replace(tmp_path, blob_path)
+                    with open(meta_path, "w") as f:
+                        json.dump({"etag": etag}, f)
+                    return load_model_artifact(blob_path)
+                except OSError as e:
+                    print(f"Writing {blob_name} to the model disk cache failed: {e}")
+                    self._discard_disk_files(tmp_path, blob_path, meta_path)
+                except BaseException:
+                    self._discard_disk_files(tmp_path)
+                    raise
+
+                # The failed write consumed the download, fetch the same version again
+                from azure.core import MatchConditions
+
+                downloader = blob_client.download_blob(
+                    max_concurrency=config.blob_max_concurrency,
+                    etag=etag,
+                    match_condition=MatchConditions.IfNotModified,
+                )
+
+        return load_model_artifact(downloader.readall())
+
+    @staticmethod
+    def _discard_disk_files(*paths):
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _remove_disk(self, blob_name: str):
+        if not self.disk_dir:
+            return
+        for path in self._disk_paths(blob_name):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _put(self, blob_name: str, entry: CachedModel):
+        with self._lock:
+            self._entries[blob_name] = entry
+            self._entries.move_to_end(blob_name)
+            while len(self._entries) > 1 and self._total_bytes() > self.max_bytes:
+                self._entries.popitem(last=False)
+                self._counters["evictions"] += 1
+
+    def _total_bytes(self) -> int:
+        return sum(entry.size for entry in self._entries.values())
+
+    def get(self, blob_name: str) -> ModelArtifact:
+        return self.get_versioned(blob_name)[0]
+
+    def get_versioned(self, blob_name: str) -> Tuple[ModelArtifact, str]:
+        """
+        Returns (artifact, ETag of the blob it was loaded from).
+        """
+        from azure.core import MatchConditions
+        from azure.core.exceptions import HttpResponseError
+
+        with self._blob_locks[blob_name]:
+            with self._lock:
+                entry = self._entries.get(blob_name)
+                if entry:
+                    self._entries.move_to_end(blob_name)
+
+            if entry and time.monotonic() - entry.validated_at < self.revalidate_sec:
+                self._count("hits")
+                return entry.artifact, entry.etag
+
+            blob_client = get_model_blob_client(blob_name)
+            known_etag = entry.etag if entry else self._read_disk_etag(blob_name)
+            download_kwargs = {"max_concurrency": config.blob_max_concurrency}
+            if known_etag:
+                download_kwargs.update(
+                    etag=known_etag, match_condition=MatchConditions.IfModified
+                )
+
+            try:
+                downloader = blob_client.download_blob(**download_kwargs)
+            except HttpResponseError as e:
+                # The SDK reports the 304 of an unchanged blob as
+                # ResourceModifiedError or a bare HttpResponseError
+                if e.status_code != 304:
+                    raise
+                if entry:
+                    entry.validated_at = time.monotonic()
+                    self._count("hits")
+                    self._count("revalidations")
+                    return entry.artifact, entry.etag
+
+                self._count("disk_hits")
+                blob_path, _ = self._disk_paths(blob_name)
+                artifact = load_model_artifact(blob_path)
+                etag, last_modified = known_etag, None
+                size = os.path.getsize(blob_path)
+            else:
+                self._count("misses")
+                etag = downloader.properties.etag
+                last_modified = downloader.properties.last_modified
+                size = downloader.size
+                self._count("bytes_downloaded", size)
+                artifact = self._load_download(blob_name, blob_client, downloader, etag)
+
+            self._put(
+                blob_name,
+                CachedModel(
+                    artifact=artifact,
+                    etag=etag,
+                    last_modified=last_modified,
+                    size=size,
+                    validated_at=time.monotonic(),
+                ),
+            )
+            return artifact, etag
+
+    def invalidate(self, blob_name: str):
+        with self._lock:
+            self._entries.pop(blob_name, None)
+        self._remove_disk(blob_name)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes(),
+                "max_bytes": self.max_bytes,
+                "hits": self._counters["hits"],
+                "misses": self._counters["misses"],
+                "revalidations": self._counters["revalidations"],
+                "disk_hits": self._counters["disk_hits"],
+                "evictions": self._counters["evictions"],
+                "bytes_downloaded": self._counters["bytes_downloaded"],
+            }
+
+
+model_cache = ModelCache(
+    max_bytes=config.model_cache_max_mb * 1024 * 1024,
+    revalidate_sec=config.model_cache_revalidate_sec,
+    disk_dir=config.model_cache_dir,
+)
@@ -0,0 +1,33 @@
+from typing import Optional
+
+from config import config
+from model_storage.artifact import fingerprint_from_blob_metadata
+
+
+def get_model_blob_name(city: str, state: str) -> str:
+    return f"{city.lower()}_{state.lower()}.pkl"
+
+
+def get_model_blob_client(blob_name: str):
+    from azure.storage.blob import BlobServiceClient
+
+    blob_service_client = BlobServiceClient.from_connection_string(
+        config.az_storage_conn_str
+    )
+    return blob_service_client.get_blob_client(
+        container=config.az_storage_container_name, blob=blob_name
+    )
+
+
+def read_stored_fingerprint(blob_name: str) -> Optional[dict]:
+    """
+    Dataset fingerprint of the stored model, read from blob metadata without
+    downloading the model. None when there is no model or it predates fingerprints.
+    """
+    from azure.core.exceptions import ResourceNotFoundError
+
+    try:
+        properties = get_model_blob_client(blob_name).get_blob_properties()
+    except ResourceNotFoundError:
+        return None
+    return fingerprint_from_blob_metadata(properties.metadata)
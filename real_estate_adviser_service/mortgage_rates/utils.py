@@ -0,0 +1,200 @@
+import json
+import os
+import threading
+import time
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import requests
+
+from config import config
+
+
+class FredClient:
+    url = "https://api.stlouisfed.org/fred/series/observations"
+
+    def __init__(self, api_key: Optional[str]):
+        self.api_key = api_key
+
+    def fetch_observations(
+        self, series_id: str, observation_start: Optional[str] = None
+    ) -> pd.DataFrame:
+        params = {
+            "api_key": self.api_key,
+            "file_type": "json",
+            "series_id": series_id,
+        }
+        if observation_start:
+            params["observation_start"] = observation_start
+
+        response = requests.get(self.url, params=params, timeout=30)
+        response.raise_for_status()
+        return observations_to_frame(response.json()["observations"])
+
+
+class FredFixtureClient:
+    """
+    Serves observations from a saved FRED JSON response instead of the API.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def fetch_observations(
+        self, series_id: str, observation_start: Optional[str] = None
+    ) -> pd.DataFrame:
+        with open(self.path) as f:
+            df = observations_to_frame(json.load(f)["observations"])
+        if observation_start:
+            df = df[df["date"] >= pd.Timestamp(observation_start)]
+        return df
+
+
+def observations_to_frame(observations) -> pd.DataFrame:
+    df = pd.DataFrame(observations, columns=["date", "value"])
+    df["date"] = pd.to_datetime(df["date"])
+    # FRED marks missing observations with "."
+    df["value"] = pd.to_numeric(df["value"], errors="coerce")
+    return df.dropna(subset=["value"])[["date", "value"]]
+
+
+class MortgageRateStore:
+    """
+    Local copy of a FRED series kept as two sorted arrays (dates, values) in a
+    compact .npz file. Only observations newer than the last stored date are
+    fetched, at most once per refresh interval. A failed fetch while stored
+    rates exist is not retried for retry_after_sec.
+    """
+
+    def __init__(
+        self,
+        series_id: str,
+        store_path: str,
+        client,
+        refresh_interval_sec: float,
+        retry_after_sec: float = 300,
+    ):
+        self.series_id = series_id
+        self.store_path = store_path
+        self.client = client
+        self.refresh_interval_sec = refresh_interval_sec
+        self.retry_after_sec = retry_after_sec
+
+        self.dates = np.array([], dtype="datetime64[D]")
+        self.values = np.array([], dtype=np.float64)
+        self.checked_at = 0.0
+        self.retry_at = 0.0
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _load_from_disk(self):
+        if os.path.exists(self.store_path):
+            with np.load(self.store_path) as data:
+                self.dates = data["dates"].astype("datetime64[D]")
+                self.values = data["values"].astype(np.float64)
+                self.checked_at = float(data["checked_at"])
+        self._loaded = True
+
+    def _write_to_disk(self):
+        # Best effort: the arrays in memory are served either way
+        tmp_path = f"{self.store_path}.tmp"
+        try:
+            directory = os.path.dirname(self.store_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                np.savez(
+                    f, dates=self.dates, values=self.values, checked_at=self.checked_at
+                )
+            os.replace(tmp_path, self.store_path)
+        except OSError as e:
+            print(f"Writing {self.series_id} to {self.store_path} failed: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def refresh(self, force: bool = False):
+        with self._lock:
+            if not self._loaded:
+                self._load_from_disk()
+
+            is_stale = time.time() - self.checked_at >= self.refresh_interval_sec
+            if not (force or is_stale or len(self.dates) == 0):
+                return
+            if not force and len(self.dates) and time.monotonic() < self.retry_at:
+                return
+
+            observation_start = (
+                str(self.dates[-1] + np.timedelta64(1, "D"))
+                if len(self.dates)
+                else None
+            )
+            try:
+                new_df = self.client.fetch_observations(
+                    self.series_id, observation_start=observation_start
+                )
+            except Exception as e:
+                if len(self.dates) == 0:
+                    raise
+                self.retry_at = time.monotonic() + self.retry_after_sec
+                print(
+                    f"{self.series_id} refresh failed, serving stored rates and "
+                    f"retrying in {self.retry_after_sec:.0f}s: {e}"
+                )
+                return
+
+            new_dates = new_df["date"].to_numpy(dtype="datetime64[D]")
+            new_values = new_df["value"].to_numpy(dtype=np.float64)
+            if len(self.dates):
+                is_new = new_dates > self.dates[-1]
+                new_dates, new_values = new_dates[is_new], new_values[is_new]
+
+            dates = np.concatenate([self.dates, new_dates])
+            values = np.concatenate([self.values, new_values])
+            order = np.argsort(dates, kind="stable")
+            self.dates, self.values = dates[order], values[order]
+            self.checked_at = time.time()
+            self._write_to_disk()
+            print(f"{self.series_id}: fetched {len(new_dates)} new observations")
+
+    def as_frame(self) -> pd.DataFrame:
+        self.refresh()
+        return pd.DataFrame(
+            {"date": self.dates.astype("datetime64[ns]"), "value": self.values}
+        )
+
+    def latest_rate(self) -> float:
+        self.refresh()
+        return float(self.values[-1])
+
+    def rates_at(self, dates) -> np.ndarray:
+        """
+        Rate in effect on each date, i.e. the last observation on or before it
+        (same as merge_asof with direction="backward"). NaN before the series starts.
+        """
+        self.refresh()
+        dates = np.asarray(dates, dtype="datetime64[D]")
+        if len(self.values) == 0:
+            return np.full(len(dates), np.nan)
+
+        positions = np.searchsorted(self.dates, dates, side="right") - 1
+        return np.where(
+            positions >= 0, self.values[np.clip(positions, 0, None)], np.nan
+        )
+
+
+def _get_fred_client():
+    if config.fred_fixture_path:
+        return FredFixtureClient(config.fred_fixture_path)
+    return FredClient(config.fred_api_key)
+
+
+mortgage_rate_store = MortgageRateStore(
+    series_id="MORTGAGE30US",
+    store_path=config.mortgage_rates_store_path,
+    client=_get_fred_client(),
+    refresh_interval_sec=config.mortgage_rates_refresh_hours * 60 * 60,
+    retry_after_sec=config.mortgage_rates_retry_sec,
+)
@@ -0,0 +1,72 @@
+import threading
+from collections import OrderedDict
+
+from config import config
+from database.generations import data_generations
+from trend_chart.schemas import TrendChartResponse
+
+
+class TrendChartCache:
+    """
+    Memory-bounded LRU of trend chart responses keyed by city, the city's data
+    generation and the normalized filter set.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(city: str, **filters) -> tuple:
+        # The query ignores falsy filters, so 0 / "" / None share an entry
+        normalized = tuple(
+            sorted((name, value or None) for name, value in filters.items())
+        )
+        city_key = city.strip().lower()
+        return city_key, data_generations.get(city), normalized
+
+    def get(self, key: tuple):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: tuple, response: TrendChartResponse):
+        size = len(response.model_dump_json())
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (response, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+
+    def invalidate_city(self, city_key: str):
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == city_key]:
+                self._bytes -= self._entries.pop(key)[1]
+
+    def stats(self) -> dict:
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / requests, 4) if requests else None,
+            }
+
+
+trend_chart_cache = TrendChartCache(max_bytes=config.trend_cache_max_mb * 1024 * 1024)
+data_generations.subscribe(trend_chart_cache.invalidate_city)
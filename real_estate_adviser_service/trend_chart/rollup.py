@@ -0,0 +1,24 @@
+from typing import Optional
+
+from config import config
+
+
+def get_sqft_buckets(min_sqft: Optional[int], max_sqft: Optional[int]):
+    """
+    Maps sqft filters to inclusive bucket bounds, or returns None when a bound
+    does not fall on a bucket edge and the raw query is needed.
+    Assumes whole-number sqft, which is what the scraper stores.
+    """
+    bucket_size = int(config.trend_sqft_bucket_size)
+    min_bucket, max_bucket = None, None
+
+    if min_sqft:
+        if min_sqft % bucket_size:
+            return None
+        min_bucket = min_sqft // bucket_size
+    if max_sqft:
+        if (max_sqft + 1) % bucket_size:
+            return None
+        max_bucket = (max_sqft + 1) // bucket_size - 1
+
+    return min_bucket, max_bucket
@@ -1,15 +1,25 @@
-from fastapi import APIRouter, Query, HTTPException
+from fastapi import APIRouter, Query, HTTPException, Request
 
 from trend_chart import service
+from trend_chart.schemas import TrendChartResponse
 from common import format_location, validate_is_location_added
 from database.database import DbEngine
-
+from database.generations import data_generations
+from http_cache import cached_response, make_etag, not_modified_response
 
 router = APIRouter()
 
 
-@router.get("/trend_chart", operation_id="trend_chart")
+# Trend charts only change when the city is re-ingested, not after a set time,
+# so clients revalidate every time (a 304 needs no database round trip)
+TREND_CHART_CACHE_CONTROL = "no-cache"
+
+
+@router.get(
+    "/trend_chart", operation_id="trend_chart", response_model=TrendChartResponse
+)
 def get_trend_chart(
+    request: Request,
     db_engine: DbEngine,
     location: str = Query(..., description="Location"),
     style: str = Query(None, description="Style"),
@@ -27,8 +37,18 @@ def get_trend_chart(
 
     validate_is_location_added(location)
 
+    etag = make_etag(
+        "trend_chart",
+        city.lower(),
+        data_generations.get(city),
+        sorted(request.query_params.multi_items()),
+    )
+    not_modified = not_modified_response(request, etag, TREND_CHART_CACHE_CONTROL)
+    if not_modified:
+        return not_modified
+
     try:
-        return service.get_trend_chart_data(
+        response = service.get_trend_chart_data(
             engine=db_engine,
             city=city,
             style=style,
@@ -44,3 +64,7 @@ def get_trend_chart(
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+    return cached_response(
+        request, response.model_dump_json().encode(), etag, TREND_CHART_CACHE_CONTROL
+    )
@@ -4,6 +4,36 @@ from jinja2 import Template
 
 from common import get_query
 from trend_chart.schemas import DataPoint, TrendChartResponse
+from database.rollup import is_trend_rollup_ready
+from trend_chart.rollup import get_sqft_buckets
+from trend_chart.cache import trend_chart_cache
+
+TREND_CHART_TEMPLATE = Template(
+    get_query(file_path="/trend_chart/trend_chart_query.jinja")
+)
+TREND_CHART_ROLLUP_TEMPLATE = Template(
+    get_query(file_path="/trend_chart/trend_chart_rollup_query.jinja")
+)
+STYLES_QUERY = text(
+    "SELECT DISTINCT [style] FROM [dbo].[HistoricalPropertyData] WHERE city = :city"
+)
+STYLES_ROLLUP_QUERY = text(
+    "SELECT DISTINCT [style] FROM [dbo].[TrendChartRollup] WHERE city = :city"
+)
+
+
+def build_trend_chart_query(template: Template, filters: dict):
+    """
+    Renders only which predicates are present; every value is a bound
+    parameter, so the number of distinct statements (and server plans) stays
+    bounded by the filter combinations, not by cities and filter values.
+    """
+    params = {
+        name: value
+        for name, value in filters.items()
+        if value or (name.endswith("_bucket") and value is not None)
+    }
+    return text(template.render(**filters)), params
 
 
 def get_trend_chart_data(
@@ -20,12 +50,8 @@ def get_trend_chart_data(
     max_stories: Optional[int],
     year_built: Optional[int],
 ):
-    styles_query = f"""
-    SELECT DISTINCT [style] FROM [dbo].[HistoricalPropertyData] WHERE city = '{city}'
-    """
-    trend_chart_query = get_query(file_path="/trend_chart/trend_chart_query.jinja")
-    parsed_chart_query = Template(trend_chart_query).render(
-        city=city,
+    cache_key = trend_chart_cache.make_key(
+        city,
         style=style,
         min_beds=min_beds,
         max_beds=max_beds,
@@ -37,10 +63,40 @@ def get_trend_chart_data(
         max_stories=max_stories,
         year_built=year_built,
     )
+    cached_response = trend_chart_cache.get(cache_key)
+    if cached_response is not None:
+        return cached_response
+
+    sqft_buckets = get_sqft_buckets(min_sqft, max_sqft)
+    use_rollup = sqft_buckets is not None and is_trend_rollup_ready(engine)
+    filters = dict(
+        city=city,
+        style=style,
+        min_beds=min_beds,
+        max_beds=max_beds,
+        min_baths=min_baths,
+        max_baths=max_baths,
+        min_stories=min_stories,
+        max_stories=max_stories,
+        year_built=year_built,
+    )
+
+    if use_rollup:
+        styles_query = STYLES_ROLLUP_QUERY
+        filters.update(min_sqft_bucket=sqft_buckets[0], max_sqft_bucket=sqft_buckets[1])
+        chart_query, chart_params = build_trend_chart_query(
+            TREND_CHART_ROLLUP_TEMPLATE, filters
+        )
+    else:
+        styles_query = STYLES_QUERY
+        filters.update(min_sqft=min_sqft, max_sqft=max_sqft)
+        chart_query, chart_params = build_trend_chart_query(
+            TREND_CHART_TEMPLATE, filters
+        )
 
     with engine.connect() as connection:
-        styles_result = connection.execute(text(styles_query)).fetchall()
-        chart_result = connection.execute(text(parsed_chart_query)).fetchall()
+        styles_result = connection.execute(styles_query, {"city": city}).fetchall()
+        chart_result = connection.execute(chart_query, chart_params).fetchall()
 
     styles = [style[0] for style in styles_result if style[0]]
     percentages, chart_data = [], []
@@ -62,10 +118,12 @@ def get_trend_chart_data(
             )
         )
 
-    return TrendChartResponse(
+    response = TrendChartResponse(
         styles=styles,
         avg_year_percent_change=(
             round(sum(percentages) / len(percentages), 2) if percentages else None
         ),
         chart_data=chart_data,
     )
+    trend_chart_cache.put(cache_key, response)
+    return response
@@ -0,0 +1,62 @@
+import importlib
+import threading
+import time
+from typing import List
+
+from config import config
+
+# Heavy libraries the service only imports where they are used. Loading them
+# on a background thread right after startup keeps the import cost off both
+# the cold start and the first requests that need them. Serving paths first
+# (blob access, model unpickling, listing scrapes), training-only ones last.
+WARMUP_MODULES = [
+    "azure.storage.blob",
+    "joblib",
+    "sklearn.ensemble",
+    "homeharvest",
+    "sklearn.cluster",
+    "sklearn.metrics",
+    "sklearn.model_selection",
+    "geopy.distance",
+    "geopy.geocoders",
+]
+
+
+class ImportWarmup:
+    def __init__(self, modules: List[str]):
+        self.modules = modules
+        self._timings = {}
+        self._errors = {}
+        self._done = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        for module in self.modules:
+            start = time.perf_counter()
+            try:
+                importlib.import_module(module)
+            except Exception as e:
+                print(f"Warming up {module} failed: {e}")
+                self._errors[module] = str(e)
+                continue
+            self._timings[module] = round(time.perf_counter() - start, 3)
+        self._done.set()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="import-warmup", daemon=True
+        )
+        self._thread.start()
+
+    def stats(self) -> dict:
+        return {
+            "enabled": config.warmup_imports,
+            "done": self._done.is_set(),
+            "import_sec": dict(self._timings),
+            "errors": dict(self._errors),
+        }
+
+
+import_warmup = ImportWarmup(WARMUP_MODULES)
@@ -0,0 +1,142 @@
+import math
+import os
+import sys
+
+import pytest
+
+SERVICE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "real_estate_adviser_service",
+)
+
+TEST_ENV = {
+    "YEARS_TO_PREDICT": "10",
+    "HISTORICAL_START_YEAR": "2010",
+    "HISTORICAL_BATCH_INCREMENT_DAYS": "30",
+    "LOAD_ACTIVE_LISTINGS_DAYS": "30",
+}
+
+# Service modules import each other relative to real_estate_adviser_service
+for key, value in TEST_ENV.items():
+    os.environ.setdefault(key, value)
+if SERVICE_DIR not in sys.path:
+    sys.path.insert(0, SERVICE_DIR)
+
+
+def pytest_sessionstart(session):
+    # Query templates are read relative to the working directory
+    os.chdir(SERVICE_DIR)
+
+
+def sqlite_year(value):
+    return value and int(value[:4])
+
+
+def sqlite_floor(value):
+    return None if value is None else math.floor(value)
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    """
+    In-memory SQLite stand-in for SQL Server: tables live in an attached "dbo"
+    database so [dbo].[...] queries resolve, with the T-SQL functions the
+    service's queries use.
+    """
+    from sqlalchemy import create_engine, event
+    from sqlalchemy.pool import StaticPool
+
+    import database.rollup as rollup
+
+    # Rollup readiness and staleness are per process, reset them per database
+    monkeypatch.setattr(rollup, "_rollup_state", rollup.RollupState())
+
+    # One shared connection; tests hand it to background threads in turn
+    base_engine = create_engine(
+        "sqlite://",
+        poolclass=StaticPool,
+        connect_args={"check_same_thread": False},
+    )
+
+    @event.listens_for(base_engine, "connect")
+    def on_connect(dbapi_connection, _):
+        dbapi_connection.execute("ATTACH DATABASE ':memory:' AS dbo")
+        dbapi_connection.create_function("YEAR", 1, sqlite_year, deterministic=True)
+        dbapi_connection.create_function("FLOOR", 1, sqlite_floor, deterministic=True)
+
+    yield base_engine.execution_options(schema_translate_map={None: "dbo"})
+    base_engine.dispose()
+
+
+@pytest.fixture
+def sales_frame():
+    def make(rows=20, city="Seattle", state="WA", seed=0):
+        import numpy as np
+        import pandas as pd
+
+        rng = np.random.default_rng(seed)
+        return pd.DataFrame(
+            {
+                "property_url": [
+                    f"https://example.com/{city}/{i}" for i in range(rows)
+                ],
+                "status": "SOLD",
+                "style": rng.choice(["SINGLE_FAMILY", "CONDOS"], rows),
+                "city": city,
+                "state": state,
+                "beds": rng.integers(1, 5, rows).astype(float),
+                "full_baths": rng.integers(1, 3, rows).astype(float),
+                "sqft": rng.integers(500, 3000, rows).astype(float),
+                "year_built": rng.integers(1950, 2014, rows).astype(float),
+                "stories": rng.integers(1, 3, rows).astype(float),
+                "sold_price": rng.integers(200_000, 900_000, rows).astype(float),
+                "last_sold_date": pd.Timestamp("2018-01-01")
+                + pd.to_timedelta(rng.integers(0, 365 * 5, rows), unit="D"),
+            }
+        )
+
+    return make
+
+
+@pytest.fixture
+def listing():
+    """
+    One predicted active listing as the prediction step returns it.
+    """
+    return {
+        "property_url": "https://example.com/1",
+        "mls": "NWMLS",
+        "mls_id": "1",
+        "status": "FOR_SALE",
+        "style": "CONDOS",
+        "street": "1 Main St",
+        "unit": None,
+        "city": "Seattle",
+        "state": "WA",
+        "zip_code": 98101,
+        "beds": 2,
+        "full_baths": 1,
+        "half_baths": None,
+        "sqft": 900,
+        "year_built": 1999,
+        "days_on_mls": 12,
+        "list_price": 650000,
+        "list_date": "2024-03-01T00:00:00",
+        "last_sold_date": None,
+        "lot_sqft": None,
+        "price_per_sqft": 722,
+        "latitude": 47.61,
+        "longitude": -122.33,
+        "stories": 1,
+        "hoa_fee": 400,
+        "parking_garage": 1,
+        "primary_photo": "https://example.com/1.jpg",
+        "alt_photos": ["https://example.com/2.jpg"],
+        "distance_to_downtown": 0.5,
+        "baths": 1.0,
+        "mortgage_rate": 6.5,
+        "predicted_prices": [
+            {"sold_year": 2025, "sold_price": 680000.0, "percentage": 4.6},
+            {"sold_year": 2026, "sold_price": 700000.0, "percentage": 7.7},
+        ],
+    }
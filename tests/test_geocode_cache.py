@@ -0,0 +1,49 @@
+import json
+
+import geopy.geocoders
+import pytest
+
+from geocoding.utils import GeocodeCache
+
+
+class FakeNominatim:
+    queries = []
+
+    def __init__(self, user_agent):
+        pass
+
+    def geocode(self, query):
+        self.queries.append(query)
+        return type("Location", (), {"latitude": 47.6, "longitude": -122.33})
+
+
+@pytest.fixture
+def nominatim(monkeypatch):
+    monkeypatch.setattr(FakeNominatim, "queries", [])
+    monkeypatch.setattr(geopy.geocoders, "Nominatim", FakeNominatim)
+    return FakeNominatim
+
+
+def test_lookup_includes_the_state(tmp_path, nominatim):
+    cache = GeocodeCache(str(tmp_path / "geocode.json"))
+
+    assert cache.get("Portland", "OR") == (47.6, -122.33)
+    assert cache.get("Portland", "ME") == (47.6, -122.33)
+    assert cache.get("Portland", "OR") == (47.6, -122.33)
+
+    assert nominatim.queries == ["Downtown Portland, OR", "Downtown Portland, ME"]
+    stored = json.loads((tmp_path / "geocode.json").read_text())
+    assert set(stored) == {"portland, or", "portland, me"}
+
+
+def test_unwritable_store_keeps_the_memo(tmp_path, nominatim):
+    (tmp_path / "not-a-dir").write_text("")
+    store_path = tmp_path / "not-a-dir" / "geocode.json"
+    seed_path = tmp_path / "seed.json"
+    seed_path.write_text(json.dumps({"seattle, wa": {"latitude": 1, "longitude": 2}}))
+    cache = GeocodeCache(str(store_path), seed_path=str(seed_path))
+
+    assert cache.get("Seattle", "WA") == (1.0, 2.0)
+    assert cache.get("Tacoma", "WA") == (47.6, -122.33)
+    assert cache.get("Tacoma", "WA") == (47.6, -122.33)
+    assert nominatim.queries == ["Downtown Tacoma, WA"]
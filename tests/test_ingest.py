@@ -0,0 +1,48 @@
+import pandas as pd
+import pytest
+from sqlalchemy import text
+
+from database.migrations import run_migrations
+from database.utils import upsert_historical_property_data
+
+
+def count_rows(engine, table="HistoricalPropertyData") -> int:
+    with engine.connect() as connection:
+        return connection.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar()
+
+
+def test_upsert_inserts_then_updates(engine, sales_frame):
+    run_migrations(engine)
+    df = sales_frame(rows=20)
+
+    counts = upsert_historical_property_data(engine, df, batch_size=7)
+    assert counts == {"inserted": 20, "updated": 0}
+
+    df["sold_price"] = df["sold_price"] + 1000
+    new_rows = sales_frame(rows=25).tail(5)
+    counts = upsert_historical_property_data(
+        engine, pd.concat([df, new_rows], ignore_index=True), batch_size=7
+    )
+    assert counts == {"inserted": 5, "updated": 20}
+    assert count_rows(engine) == 25
+    assert count_rows(engine, "HistoricalPropertyDataStaging") == 0
+
+    with engine.connect() as connection:
+        total = connection.execute(
+            text("SELECT SUM(sold_price) FROM HistoricalPropertyData")
+        ).scalar()
+    assert total == pytest.approx(df["sold_price"].sum() + new_rows["sold_price"].sum())
+
+
+def test_upsert_collapses_duplicate_keys(engine, sales_frame):
+    run_migrations(engine)
+    df = sales_frame(rows=10)
+
+    counts = upsert_historical_property_data(engine, pd.concat([df, df]))
+    assert counts == {"inserted": 10, "updated": 0}
+    assert count_rows(engine) == 10
+
+
+def test_upsert_requires_latest_schema(engine, sales_frame):
+    with pytest.raises(RuntimeError, match="schema"):
+        upsert_historical_property_data(engine, sales_frame(rows=5))
@@ -0,0 +1,54 @@
+import orjson
+import pytest
+from pydantic import TypeAdapter
+
+from active_listings.encoding import (
+    encode_listings,
+    join_listing_fragments,
+    parse_fields,
+)
+from active_listings.schemas import Listing, ListingProjection, ListingSummary
+
+
+def encode_page(listing, fields=None, view="full"):
+    summary = view == "summary"
+    encoded = encode_listings([listing])
+    body, _ = join_listing_fragments(
+        encoded, [(0, 4.6)], fields=parse_fields(fields, summary), summary=summary
+    )
+    return orjson.loads(body)
+
+
+@pytest.mark.parametrize(
+    "fields, view, model",
+    [
+        (None, "full", Listing),
+        ("city,list_price,predicted_prices", "full", ListingProjection),
+        (None, "summary", ListingSummary),
+        ("city,predicted_prices", "summary", ListingSummary),
+    ],
+)
+def test_encoded_listings_match_declared_schema(listing, fields, view, model):
+    listings = TypeAdapter(list[model]).validate_python(
+        encode_page(listing, fields, view)
+    )
+    assert listings[0].sort_percentage == 4.6
+
+
+def test_summary_drops_photos_and_columns_predicted_prices(listing):
+    listing = encode_page(listing, view="summary")[0]
+    assert "primary_photo" not in listing and "alt_photos" not in listing
+    assert listing["predicted_prices"] == {
+        "sold_year": [2025, 2026],
+        "sold_price": [680000.0, 700000.0],
+        "percentage": [4.6, 7.7],
+    }
+
+
+def test_openapi_declares_projected_and_summary_listings():
+    import main
+
+    schemas = main.app.openapi()["components"]["schemas"]
+    assert {"Listing", "ListingProjection", "ListingSummary"} <= set(schemas)
+    assert "alt_photos" not in schemas["ListingSummary"]["properties"]
+    assert schemas["ListingProjection"]["required"] == ["sort_percentage"]
@@ -0,0 +1,57 @@
+import orjson
+import pytest
+
+from active_listings import service
+from active_listings.index import ListingIndex
+
+
+@pytest.fixture
+def batch(monkeypatch, listing):
+    builds = []
+
+    def get_listings_index(location, city, state, planned_mortgage_rate=None):
+        builds.append(location)
+        if city == "Tacoma":
+            raise RuntimeError("scrape failed")
+        return ListingIndex([{**listing, "city": city}])
+
+    monkeypatch.setattr(
+        service, "get_location_names", lambda: ["Seattle, WA", "Tacoma, WA"]
+    )
+    monkeypatch.setattr(service, "get_listings_index", get_listings_index)
+
+    def run(locations, **options):
+        filters = dict(min_price=None, max_price=None, sort_by_year=None, amount=None)
+        body = service.get_active_listings_batch(locations, **{**filters, **options})
+        return orjson.loads(body), builds
+
+    return run
+
+
+def test_every_requested_location_gets_a_result(batch):
+    locations = ["Seattle, WA", "seattle,wa", "Tacoma, WA", "Nowhere, WA", "Seattle"]
+    response, builds = batch(locations, top_n=5)
+
+    assert [(r["location"], r["status_code"]) for r in response["results"]] == [
+        ("Seattle, WA", 200),
+        ("Seattle, WA", 200),
+        ("Tacoma, WA", 500),
+        ("Nowhere, WA", 404),
+        ("Seattle", 400),
+    ]
+    assert sorted(builds) == ["Seattle, WA", "Tacoma, WA"]
+    assert response["results"][0]["listings"] == response["results"][1]["listings"]
+    # A repeated location is ranked once
+    assert len(response["top"]) == 1
+
+
+def test_bad_sort_year_is_a_client_error(batch):
+    response, _ = batch(["Seattle, WA"], sort_by_year=1990)
+    result = response["results"][0]
+    assert result["status_code"] == 400
+    assert "Incorrect sort year" in result["error"]
+
+
+def test_unknown_field_is_a_client_error(batch):
+    response, _ = batch(["Seattle, WA"], fields="city,garden")
+    assert response["results"][0]["status_code"] == 400
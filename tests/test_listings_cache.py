@@ -0,0 +1,107 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from active_listings.cache import ListingsCache
+
+KEY = "seattle,wa"
+
+
+@pytest.fixture
+def make_cache():
+    caches = []
+
+    def make(ttl_sec=60, stale_ttl_sec=60):
+        cache = ListingsCache(
+            maxsize=4, ttl_sec=ttl_sec, stale_ttl_sec=stale_ttl_sec, refresh_workers=2
+        )
+        caches.append(cache)
+        return cache
+
+    yield make
+    for cache in caches:
+        cache.shutdown()
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def requests_seen(cache):
+    metrics = cache.stats()["locations"].get(KEY, {})
+    return metrics.get("misses", 0) + metrics.get("coalesced", 0)
+
+
+def test_concurrent_misses_run_one_build(make_cache):
+    cache, release, calls = make_cache(), threading.Event(), []
+
+    def build():
+        calls.append(threading.current_thread().name)
+        release.wait(5)
+        return {"rows": 3}
+
+    with ThreadPoolExecutor(8) as executor:
+        futures = [executor.submit(cache.get_or_build, KEY, build) for _ in range(8)]
+        wait_until(lambda: requests_seen(cache) == 8)
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    metrics = cache.stats()["locations"][KEY]
+    assert metrics["misses"] == 1 and metrics["coalesced"] == 7
+    assert metrics["rebuilds"] == 1
+
+
+def test_stale_entry_is_served_while_one_refresh_runs(make_cache):
+    cache, release, calls = make_cache(ttl_sec=0.05), threading.Event(), []
+    assert cache.get_or_build(KEY, lambda: "old") == "old"
+    time.sleep(0.1)
+
+    def refresh():
+        calls.append(threading.current_thread().name)
+        release.wait(5)
+        return "new"
+
+    with ThreadPoolExecutor(8) as executor:
+        results = list(
+            executor.map(lambda _: cache.get_or_build(KEY, refresh), range(8))
+        )
+
+    assert results == ["old"] * 8
+    assert cache.stats()["refreshing"] == [KEY]
+    release.set()
+    wait_until(lambda: not cache.stats()["refreshing"])
+
+    assert len(calls) == 1 and calls[0].startswith("listings-refresh")
+    assert cache.get_or_build(KEY, refresh) == "new"
+    metrics = cache.stats()["locations"][KEY]
+    assert metrics["stale_hits"] == 8 and metrics["rebuilds"] == 2
+
+
+def test_failed_build_is_raised_to_every_waiter_and_not_cached(make_cache):
+    cache, release, calls = make_cache(), threading.Event(), []
+
+    def fail():
+        calls.append(1)
+        release.wait(5)
+        raise RuntimeError("scrape failed")
+
+    with ThreadPoolExecutor(4) as executor:
+        futures = [executor.submit(cache.get_or_build, KEY, fail) for _ in range(4)]
+        wait_until(lambda: requests_seen(cache) == 4)
+        release.set()
+    for future in futures:
+        with pytest.raises(RuntimeError, match="scrape failed"):
+            future.result()
+
+    assert len(calls) == 1
+    stats = cache.stats()
+    assert stats["entries"] == 0 and stats["refreshing"] == []
+    assert stats["locations"][KEY]["rebuild_errors"] == 1
+    assert cache.get_or_build(KEY, lambda: "rebuilt") == "rebuilt"
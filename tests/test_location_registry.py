@@ -0,0 +1,45 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from locations.registry import LocationRegistry
+from locations.schemas import Location
+
+
+def make_location(name: str) -> Location:
+    city, state = name.split("_")
+    return Location(
+        file_name=f"{name}.joblib",
+        location=f"{city.title()}, {state.upper()}",
+        city=city.title(),
+        state=state.upper(),
+        last_modified=datetime(2024, 1, 1),
+        size_mb=1.0,
+        score=None,
+        score_calculated=None,
+    )
+
+
+def test_start_does_not_wait_for_the_first_load():
+    loads, release = [], threading.Event()
+
+    def load_locations():
+        loads.append(threading.current_thread().name)
+        release.wait(5)
+        return [make_location("seattle_wa")]
+
+    registry = LocationRegistry(load_locations, lambda: {}, refresh_interval_sec=60)
+    start = time.perf_counter()
+    registry.start()
+    assert time.perf_counter() - start < 0.5
+
+    # Reads issued before the background load finishes wait for it
+    with ThreadPoolExecutor(4) as executor:
+        reads = [executor.submit(registry.names) for _ in range(4)]
+        time.sleep(0.1)
+        release.set()
+        assert all(read.result() == ["Seattle, WA"] for read in reads)
+
+    registry.stop()
+    assert loads == ["location-registry"]
@@ -0,0 +1,37 @@
+import pytest
+from sqlalchemy import inspect
+
+from database.migrations import (
+    LATEST_VERSION,
+    get_schema_version,
+    require_latest_schema,
+    run_migrations,
+)
+
+
+def test_run_migrations_creates_latest_schema(engine):
+    assert run_migrations(engine) == LATEST_VERSION
+
+    with engine.connect() as connection:
+        tables = set(inspect(connection).get_table_names(schema="dbo"))
+    assert {
+        "HistoricalPropertyData",
+        "HistoricalPropertyDataStaging",
+        "ModelScores",
+        "SchemaVersion",
+        "TrendChartRollup",
+    } <= tables
+
+
+def test_run_migrations_is_idempotent(engine):
+    run_migrations(engine)
+    assert run_migrations(engine) == LATEST_VERSION
+    assert get_schema_version(engine) == LATEST_VERSION
+
+
+def test_require_latest_schema(engine):
+    with pytest.raises(RuntimeError, match="version 0"):
+        require_latest_schema(engine)
+
+    run_migrations(engine)
+    require_latest_schema(engine)
@@ -0,0 +1,136 @@
+import io
+
+import pytest
+import requests
+from azure.core.pipeline.transport import HttpTransport, RequestsTransportResponse
+from azure.storage.blob import BlobClient
+
+import model_storage.cache as model_storage_cache
+from model_storage.artifact import dump_model_artifact
+from model_storage.cache import ModelCache
+
+BLOB_URL = "https://account.blob.core.windows.net/models/seattle_wa.pkl"
+
+
+class BlobTransport(HttpTransport):
+    """
+    Serves one blob to a real BlobClient and answers conditional downloads for
+    its current ETag with 304, optionally with an x-ms-error-code.
+    """
+
+    def __init__(self, body: bytes, etag: str, not_modified_error_code=None):
+        self.body = body
+        self.etag = etag
+        self.not_modified_error_code = not_modified_error_code
+        self.statuses = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def send(self, request, **kwargs):
+        response = requests.Response()
+        response.request = requests.Request(request.method, request.url).prepare()
+        if request.headers.get("If-None-Match") == self.etag:
+            response.status_code = 304
+            response.headers["ETag"] = self.etag
+            if self.not_modified_error_code:
+                response.headers["x-ms-error-code"] = self.not_modified_error_code
+            response.raw = io.BytesIO(b"")
+        else:
+            response.status_code = 206
+            response.headers.update(
+                {
+                    "ETag": self.etag,
+                    "Content-Length": str(len(self.body)),
+                    "Content-Range": f"bytes 0-{len(self.body) - 1}/{len(self.body)}",
+                    "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT",
+                    "x-ms-blob-type": "BlockBlob",
+                }
+            )
+            response.raw = io.BytesIO(self.body)
+        self.statuses.append(response.status_code)
+        return RequestsTransportResponse(request, response)
+
+
+@pytest.fixture(params=[None, "ConditionNotMet"])
+def transport(request, monkeypatch):
+    transport = BlobTransport(
+        dump_model_artifact({"trees": [1, 2, 3]}),
+        '"0x8DC0000000000001"',
+        not_modified_error_code=request.param,
+    )
+    monkeypatch.setattr(
+        model_storage_cache,
+        "get_model_blob_client",
+        lambda blob_name: BlobClient.from_blob_url(BLOB_URL, transport=transport),
+    )
+    return transport
+
+
+def test_unchanged_blob_revalidates_as_a_hit(transport):
+    cache = ModelCache(max_bytes=1 << 30, revalidate_sec=0)
+
+    first = cache.get("seattle_wa.pkl")
+    second = cache.get("seattle_wa.pkl")
+
+    assert second is first
+    assert transport.statuses == [206, 304]
+    stats = cache.stats()
+    assert (stats["misses"], stats["hits"], stats["revalidations"]) == (1, 1, 1)
+
+
+def test_unchanged_blob_loads_from_the_disk_tier(transport, tmp_path):
+    ModelCache(max_bytes=1 << 30, revalidate_sec=0, disk_dir=str(tmp_path)).get(
+        "seattle_wa.pkl"
+    )
+
+    # A new process starts with the blob and its ETag on disk only
+    cache = ModelCache(max_bytes=1 << 30, revalidate_sec=0, disk_dir=str(tmp_path))
+    artifact = cache.get("seattle_wa.pkl")
+
+    assert artifact.model == {"trees": [1, 2, 3]}
+    assert transport.statuses == [206, 304]
+    assert cache.stats()["disk_hits"] == 1
+
+
+def test_changed_blob_is_downloaded_again(transport):
+    cache = ModelCache(max_bytes=1 << 30, revalidate_sec=0)
+    cache.get("seattle_wa.pkl")
+
+    transport.body = dump_model_artifact({"trees": [4]})
+    transport.etag = '"0x8DC0000000000002"'
+
+    assert cache.get("seattle_wa.pkl").model == {"trees": [4]}
+    assert cache.stats()["misses"] == 2
+
+
+def test_unwritable_disk_tier_loads_in_memory(transport, tmp_path):
+    not_a_directory = tmp_path / "cache"
+    not_a_directory.write_text("")
+    cache = ModelCache(
+        max_bytes=1 << 30, revalidate_sec=0, disk_dir=str(not_a_directory / "models")
+    )
+
+    assert cache.get("seattle_wa.pkl").model == {"trees": [1, 2, 3]}
+    assert transport.statuses == [206]
+
+
+def test_failed_disk_write_downloads_again(transport, tmp_path, monkeypatch):
+    def replace(source, destination):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(model_storage_cache.os, "replace", replace)
+    cache = ModelCache(max_bytes=1 << 30, revalidate_sec=0, disk_dir=str(tmp_path))
+
+    assert cache.get("seattle_wa.pkl").model == {"trees": [1, 2, 3]}
+    assert transport.statuses == [206, 206]
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,64 @@
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from mortgage_rates.utils import MortgageRateStore
+
+
+class FakeFredClient:
+    def __init__(self):
+        self.calls = 0
+        self.fail = False
+
+    def fetch_observations(self, series_id, observation_start=None):
+        self.calls += 1
+        if self.fail:
+            raise ConnectionError("FRED is down")
+        return pd.DataFrame(
+            {"date": pd.to_datetime(["2024-01-04", "2024-01-11"]), "value": [6.6, 6.7]}
+        )
+
+
+@pytest.fixture
+def client():
+    return FakeFredClient()
+
+
+def make_store(store_path, client):
+    return MortgageRateStore(
+        "MORTGAGE30US",
+        str(store_path),
+        client,
+        refresh_interval_sec=60 * 60,
+        retry_after_sec=60,
+    )
+
+
+def test_failed_refresh_is_not_retried_until_retry_after(tmp_path, client):
+    store = make_store(tmp_path / "rates.npz", client)
+    assert store.latest_rate() == 6.7
+
+    client.fail = True
+    store.checked_at = time.time() - 2 * 60 * 60
+    for _ in range(3):
+        assert store.latest_rate() == 6.7
+    assert client.calls == 2
+
+    store.retry_at = time.monotonic()
+    client.fail = False
+    assert store.latest_rate() == 6.7
+    assert client.calls == 3
+
+
+def test_unwritable_store_serves_fetched_rates(tmp_path, client):
+    (tmp_path / "not-a-dir").write_text("")
+    store = make_store(tmp_path / "not-a-dir" / "rates.npz", client)
+
+    np.testing.assert_array_equal(
+        store.rates_at(["2024-01-01", "2024-01-05", "2024-02-01"]),
+        [np.nan, 6.6, 6.7],
+    )
+    assert store.latest_rate() == 6.7
+    assert client.calls == 1
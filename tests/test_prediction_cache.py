@@ -0,0 +1,98 @@
+import gc
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+from active_listings import service
+from active_listings.cache import ListingsCache, PredictionCache
+
+
+def test_concurrent_misses_compute_once():
+    cache, version, calls = PredictionCache(maxsize=4), (1, '"etag-1"'), []
+
+    def compute():
+        calls.append(threading.get_ident())
+        time.sleep(0.1)
+        return {"prices": [1, 2, 3]}
+
+    with ThreadPoolExecutor(8) as executor:
+        results = list(
+            executor.map(
+                lambda _: cache.get_or_compute(("Seattle", None), version, compute),
+                range(8),
+            )
+        )
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    stats = cache.stats()
+    assert stats["misses"] == 1 and stats["coalesced"] + stats["hits"] == 7
+    assert stats["computing"] == 0
+
+
+def test_new_versions_are_not_served_from_an_older_compute():
+    cache, key = PredictionCache(maxsize=4), ("Seattle", None)
+    cache.get_or_compute(key, (1, '"etag-1"'), lambda: "old")
+    assert cache.get_or_compute(key, (1, '"etag-1"'), lambda: "new") == "old"
+    assert cache.get_or_compute(key, (2, '"etag-1"'), lambda: "features") == "features"
+    assert cache.get_or_compute(key, (2, '"etag-2"'), lambda: "model") == "model"
+
+
+def test_failed_compute_is_raised_to_waiters_and_retried():
+    cache, version = PredictionCache(maxsize=4), (1, '"etag-1"')
+
+    def fail():
+        time.sleep(0.05)
+        raise RuntimeError("model not loaded")
+
+    with ThreadPoolExecutor(4) as executor:
+        futures = [
+            executor.submit(cache.get_or_compute, ("Seattle", None), version, fail)
+            for _ in range(4)
+        ]
+    for future in futures:
+        with pytest.raises(RuntimeError):
+            future.result()
+
+    assert cache.get_or_compute(("Seattle", None), version, lambda: 1) == 1
+
+
+def test_cached_predictions_do_not_keep_features_or_models_alive(monkeypatch):
+    class Model:
+        pass
+
+    listings_cache = ListingsCache(
+        maxsize=4, ttl_sec=60, stale_ttl_sec=60, refresh_workers=1
+    )
+    prediction_cache = PredictionCache(maxsize=4)
+    model = Model()
+    monkeypatch.setattr(service, "listings_cache", listings_cache)
+    monkeypatch.setattr(service, "prediction_cache", prediction_cache)
+    monkeypatch.setattr(
+        service,
+        "build_listing_features",
+        lambda location, city, state: pd.DataFrame({"price": [1]}),
+    )
+    monkeypatch.setattr(
+        service,
+        "read_versioned_model_from_storage",
+        lambda city, state: (model, '"etag-1"'),
+    )
+    monkeypatch.setattr(service, "predict_listings", lambda *args: [])
+
+    index = service.get_listings_index("Seattle, WA", "Seattle", "WA")
+    features = weakref.ref(listings_cache.get_or_build("seattle,wa", None))
+    model_ref = weakref.ref(model)
+    assert service.get_listings_index("Seattle, WA", "Seattle", "WA") is index
+
+    # Evicted features and models are freed even though the prediction is cached
+    listings_cache.invalidate("seattle,wa")
+    del model
+    gc.collect()
+    assert features() is None and model_ref() is None
+    assert prediction_cache.stats()["entries"] == 1
+    listings_cache.shutdown()
@@ -0,0 +1,137 @@
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+import add_location.utils as add_location_utils
+from add_location.utils import (
+    read_scrape_state,
+    scrape_historical_sales,
+    write_scrape_state,
+)
+from config import config
+
+FAILED_WINDOWS = [
+    (pd.Timestamp("2020-01-01"), pd.Timestamp("2020-01-31")),
+    (pd.Timestamp("2020-02-01"), pd.Timestamp("2020-03-02")),
+    (pd.Timestamp("2020-03-03"), pd.Timestamp("2020-04-02")),
+]
+
+
+@pytest.fixture
+def scrape(monkeypatch, tmp_path):
+    monkeypatch.setattr(config, "cache_dir", str(tmp_path))
+    monkeypatch.setattr(config, "scrape_requests_per_sec", None)
+    monkeypatch.setattr(config, "scrape_retries", 0)
+    # Only the seeded retry windows and one new window are fetched
+    monkeypatch.setattr(
+        add_location_utils,
+        "get_latest_sold_date",
+        lambda engine, city, state: datetime.utcnow() - timedelta(days=1),
+    )
+    write_scrape_state(
+        "Seattle", "WA", {"failed_windows": FAILED_WINDOWS, "completed_through": None}
+    )
+
+    def run(failing_dates=(), fail_upsert_on_call=None):
+        upserts = []
+
+        def scraper(location, listing_type, date_from, date_to):
+            if date_from in failing_dates:
+                raise ConnectionError("blocked")
+            return pd.DataFrame(
+                {
+                    "property_url": [f"https://example.com/{date_from}"],
+                    "style": [None],
+                    "mls": [None],
+                    "mls_id": [None],
+                    "primary_photo": [None],
+                    "alt_photos": [None],
+                }
+            )
+
+        def upsert(engine, df):
+            upserts.append(df)
+            if len(upserts) == fail_upsert_on_call:
+                raise RuntimeError("database unavailable")
+            return {"inserted": len(df), "updated": 0}
+
+        monkeypatch.setattr(
+            add_location_utils, "upsert_historical_property_data", upsert
+        )
+        return scrape_historical_sales(None, "Seattle, WA", "Seattle", "WA", scraper)
+
+    return run
+
+
+def saved_failed_windows():
+    return [
+        tuple(map(pd.Timestamp, window))
+        for window in read_scrape_state("Seattle", "WA")["failed_windows"]
+    ]
+
+
+def test_crash_during_retries_keeps_unprocessed_windows(scrape):
+    with pytest.raises(RuntimeError):
+        scrape(fail_upsert_on_call=2)
+
+    assert saved_failed_windows() == FAILED_WINDOWS[1:]
+
+
+def test_retried_windows_are_removed_once_written(scrape):
+    new_window_start = (datetime.utcnow() - timedelta(days=1)).strftime("%Y-%m-%d")
+    scrape(failing_dates={"2020-02-01", new_window_start})
+
+    failed = saved_failed_windows()
+    assert failed[0] == FAILED_WINDOWS[1]
+    assert len(failed) == 2 and failed[1][0].strftime("%Y-%m-%d") == new_window_start
+
+
+def test_resume_does_not_skip_history_missing_from_the_database(scrape, monkeypatch):
+    write_scrape_state(
+        "Seattle",
+        "WA",
+        {
+            "failed_windows": [],
+            "completed_through": datetime.utcnow() - timedelta(days=1),
+        },
+    )
+    # The location was deleted after the interrupted run
+    monkeypatch.setattr(
+        add_location_utils, "get_latest_sold_date", lambda engine, city, state: None
+    )
+    monkeypatch.setattr(config, "hist_start_year", datetime.utcnow().year - 1)
+    fetched = []
+    monkeypatch.setattr(
+        add_location_utils,
+        "fetch_historical_windows",
+        lambda location, windows, scraper: fetched.extend(windows) or [],
+    )
+
+    scrape()
+
+    assert fetched[0][0] == datetime(datetime.utcnow().year - 1, 1, 1)
+
+
+class FakeBlobClient:
+    def delete_blob(self):
+        pass
+
+
+def test_delete_location_removes_the_scrape_state(scrape, monkeypatch):
+    import delete_location.service as delete_service
+
+    monkeypatch.setattr(
+        delete_service, "remove_location_from_db", lambda **kwargs: None
+    )
+    monkeypatch.setattr(
+        delete_service, "get_model_blob_client", lambda blob_name: FakeBlobClient()
+    )
+    monkeypatch.setattr(delete_service.model_cache, "disk_dir", None)
+
+    delete_service.delete_location(None, "Seattle", "WA")
+
+    assert read_scrape_state("Seattle", "WA") == {
+        "failed_windows": [],
+        "completed_through": None,
+    }
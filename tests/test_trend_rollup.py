@@ -0,0 +1,116 @@
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from database.migrations import run_migrations
+from database.utils import remove_location_from_db, upsert_historical_property_data
+from trend_chart.rollup import get_sqft_buckets
+from trend_chart.service import (
+    TREND_CHART_ROLLUP_TEMPLATE,
+    TREND_CHART_TEMPLATE,
+    build_trend_chart_query,
+)
+
+FILTERS = [
+    {},
+    {"style": "CONDOS"},
+    {"min_beds": 2, "max_baths": 2},
+    {"min_sqft": 1000, "max_sqft": 1999},
+    {"max_sqft": 1499, "min_stories": 2},
+]
+
+
+def trend_chart_rows(engine, city: str, filters: dict, rollup: bool):
+    filters = {"city": city, **filters}
+    min_sqft, max_sqft = filters.pop("min_sqft", None), filters.pop("max_sqft", None)
+    if rollup:
+        min_bucket, max_bucket = get_sqft_buckets(min_sqft, max_sqft)
+        filters.update(min_sqft_bucket=min_bucket, max_sqft_bucket=max_bucket)
+        template = TREND_CHART_ROLLUP_TEMPLATE
+    else:
+        filters.update(min_sqft=min_sqft, max_sqft=max_sqft)
+        template = TREND_CHART_TEMPLATE
+
+    query, params = build_trend_chart_query(template, filters)
+    with engine.connect() as connection:
+        return [tuple(row) for row in connection.execute(query, params)]
+
+
+def assert_rollup_matches_raw(engine, city: str):
+    for filters in FILTERS:
+        raw = trend_chart_rows(engine, city, filters, rollup=False)
+        rolled_up = trend_chart_rows(engine, city, filters, rollup=True)
+        assert raw, filters
+        assert len(rolled_up) == len(raw), filters
+        for raw_row, rollup_row in zip(raw, rolled_up):
+            year, avg_price, properties_sold, percentage_change = raw_row
+            assert rollup_row[:3] == (year, avg_price, properties_sold), filters
+            assert rollup_row[3] == pytest.approx(percentage_change, abs=0.01)
+
+
+def test_rollup_matches_raw_query(engine, sales_frame):
+    run_migrations(engine)
+    upsert_historical_property_data(
+        engine,
+        pd.concat(
+            [sales_frame(rows=400), sales_frame(rows=100, city="Tacoma", seed=1)],
+            ignore_index=True,
+        ),
+    )
+    assert_rollup_matches_raw(engine, "Seattle")
+    assert_rollup_matches_raw(engine, "Tacoma")
+
+
+def test_rollup_follows_updates_and_deletes(engine, sales_frame):
+    run_migrations(engine)
+    df = sales_frame(rows=400)
+    upsert_historical_property_data(engine, df)
+
+    df["sold_price"] = df["sold_price"] * 1.1
+    upsert_historical_property_data(engine, df.sample(frac=0.5, random_state=0))
+    assert_rollup_matches_raw(engine, "Seattle")
+
+    remove_location_from_db(engine, "Seattle", "WA", pd.Timestamp("2021-01-01"))
+    assert_rollup_matches_raw(engine, "Seattle")
+
+
+def test_requests_hand_rollup_work_to_a_background_thread(
+    engine, sales_frame, monkeypatch
+):
+    import database.rollup as rollup
+
+    run_migrations(engine)
+    with engine.begin() as connection:
+        sales_frame(rows=50).to_sql(
+            "HistoricalPropertyData",
+            connection,
+            schema="dbo",
+            index=False,
+            if_exists="append",
+        )
+
+    refresh_threads = []
+    refresh_trend_rollup = rollup.refresh_trend_rollup
+
+    def record_refresh(connection, **kwargs):
+        refresh_threads.append(threading.current_thread().name)
+        refresh_trend_rollup(connection, **kwargs)
+
+    monkeypatch.setattr(rollup, "refresh_trend_rollup", record_refresh)
+
+    assert not rollup.is_trend_rollup_ready(engine)
+    rollup._rollup_state.worker.join(5)
+    assert refresh_threads == ["trend-rollup"]
+    assert rollup.is_trend_rollup_ready(engine)
+    assert_rollup_matches_raw(engine, "Seattle")
+
+
+def test_requests_do_not_retry_during_the_backoff(engine, monkeypatch):
+    import database.rollup as rollup
+
+    monkeypatch.setattr(rollup._rollup_state, "retry_at", time.monotonic() + 60)
+
+    assert not rollup.is_trend_rollup_ready(engine)
+    assert rollup._rollup_state.worker is None